@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.retention import purge_notifications
+
+
+class Command(BaseCommand):
+    help = 'Apply the notification retention policies now (normally run nightly by Celery beat)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows per delete batch')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Purging notifications...')
+        reclaimed = purge_notifications(options['batch_size'])
+        for policy, rows in reclaimed.items():
+            if policy != 'total':
+                self.stdout.write(f'  {policy:15s}: {rows}')
+        self.stdout.write(self.style.SUCCESS(f'✓ Reclaimed {reclaimed["total"]} row(s)'))
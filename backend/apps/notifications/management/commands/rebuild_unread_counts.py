@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.notifications.unread import rebuild_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user unread notification counters from the notifications'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding unread notification counters...')
+        users = rebuild_unread_counts()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt counters for {users} user(s) with unread notifications'))
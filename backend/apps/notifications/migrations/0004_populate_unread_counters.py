@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_unread_counters(apps, schema_editor):
+    InAppNotification = apps.get_model("notifications", "InAppNotification")
+    UnreadNotificationCounter = apps.get_model("notifications", "UnreadNotificationCounter")
+
+    counts = (
+        InAppNotification.objects.filter(read=False)
+        .order_by()
+        .values("user_id")
+        .annotate(n=Count("id"))
+    )
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=row["user_id"], unread=row["n"]) for row in counts],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_unread_notification_counter"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_populate_unread_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inappnotification',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='inapp_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inappnotification',
+            index=models.Index(fields=['user', 'read', '-created_at', '-id'], name='inapp_user_read_created_idx'),
+        ),
+    ]
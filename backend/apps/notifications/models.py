@@ -29,4 +29,22 @@ class InAppNotification(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        ordering = ["-created_at"]
\ No newline at end of file
+        ordering = ["-created_at"]
+        indexes = [
+            # Keyset pages of a user's notifications, optionally unread only.
+            models.Index(fields=["user", "-created_at", "-id"], name="inapp_user_created_idx"),
+            models.Index(fields=["user", "read", "-created_at", "-id"], name="inapp_user_read_created_idx"),
+        ]
+
+class UnreadNotificationCounter(models.Model):
+    """Number of unread ``InAppNotification`` rows for one user.
+
+    Lets the notification bell read a single row by primary key instead of
+    counting notifications. Maintained by ``apps.notifications.unread``.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
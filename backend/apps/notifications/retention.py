@@ -0,0 +1,112 @@
+"""Retention for ``InAppNotification`` and ``EmailNotification``.
+
+Run periodically by the ``purge_notifications`` task. Rows are deleted in
+primary-key-ordered batches of ``NOTIFICATION_PURGE_BATCH_SIZE``, each in its
+own short transaction, so the purge never holds many row locks at once and
+autovacuum can reuse the space as it goes.
+
+Policies (settings, in days / rows; 0 disables one):
+
+- ``NOTIFICATION_READ_RETENTION_DAYS``: read notifications older than this.
+- ``NOTIFICATION_UNREAD_RETENTION_DAYS``: any notification older than this.
+- ``NOTIFICATION_MAX_PER_USER``: only the newest N per user are kept.
+- ``EMAIL_NOTIFICATION_RETENTION_DAYS``: email log rows older than this.
+
+Deleting unread rows lowers the owners' unread counters in the same
+transaction and pushes the new counts.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import EmailNotification, InAppNotification
+from .unread import adjust_unread, counted_deletes, publish_unread_count
+
+
+def _delete_in_batches(qs, *, batch_size: int, track_unread: bool = False) -> int:
+    model = qs.model
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(qs.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        last_id = ids[-1]
+        with transaction.atomic():
+            batch = model.objects.filter(pk__in=ids)
+            if track_unread:
+                # Read state under lock, so a concurrent mark-read is not counted twice.
+                rows = list(batch.select_for_update().values_list("user_id", "read"))
+                _release_unread(Counter(user_id for user_id, read in rows if not read))
+            # Counted above, one update per user rather than one per row.
+            with counted_deletes():
+                deleted += batch.delete()[0]
+
+
+def _release_unread(unread_by_user: Counter) -> None:
+    for user_id, removed in unread_by_user.items():
+        count = adjust_unread([user_id], -removed)[user_id]
+        publish_unread_count(user_id, count)
+
+
+def purge_expired_notifications(batch_size: int) -> dict:
+    now = timezone.now()
+    reclaimed = {"read_expired": 0, "unread_expired": 0}
+    read_days = settings.NOTIFICATION_READ_RETENTION_DAYS
+    if read_days:
+        reclaimed["read_expired"] = _delete_in_batches(
+            InAppNotification.objects.filter(read=True, created_at__lt=now - timedelta(days=read_days)),
+            batch_size=batch_size,
+        )
+    unread_days = settings.NOTIFICATION_UNREAD_RETENTION_DAYS
+    if unread_days:
+        reclaimed["unread_expired"] = _delete_in_batches(
+            InAppNotification.objects.filter(created_at__lt=now - timedelta(days=unread_days)),
+            batch_size=batch_size,
+            track_unread=True,
+        )
+    return reclaimed
+
+
+def enforce_per_user_cap(batch_size: int) -> int:
+    """Keep only the newest ``NOTIFICATION_MAX_PER_USER`` rows of each user."""
+    cap = settings.NOTIFICATION_MAX_PER_USER
+    if not cap:
+        return 0
+    over_cap = list(
+        InAppNotification.objects.order_by()
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=cap)
+        .values_list("user_id", flat=True)
+    )
+    deleted = 0
+    for user_id in over_cap:
+        rows = InAppNotification.objects.filter(user_id=user_id)
+        oldest_kept = rows.order_by("-created_at", "-id").values_list("created_at", "id")[cap - 1]
+        created_at, pk = oldest_kept
+        older = rows.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=pk)
+        deleted += _delete_in_batches(older, batch_size=batch_size, track_unread=True)
+    return deleted
+
+
+def purge_email_notifications(batch_size: int) -> int:
+    days = settings.EMAIL_NOTIFICATION_RETENTION_DAYS
+    if not days:
+        return 0
+    cutoff = timezone.now() - timedelta(days=days)
+    return _delete_in_batches(EmailNotification.objects.filter(sent_at__lt=cutoff), batch_size=batch_size)
+
+
+def purge_notifications(batch_size: int | None = None) -> dict:
+    """Apply every retention policy. Returns rows reclaimed per policy."""
+    batch_size = batch_size or settings.NOTIFICATION_PURGE_BATCH_SIZE
+    reclaimed = purge_expired_notifications(batch_size)
+    reclaimed["over_cap"] = enforce_per_user_cap(batch_size)
+    reclaimed["email"] = purge_email_notifications(batch_size)
+    reclaimed["total"] = sum(reclaimed.values())
+    return reclaimed
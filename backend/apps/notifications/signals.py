@@ -0,0 +1,6 @@
+from django.db.models.signals import post_delete
+
+from .models import InAppNotification
+from .unread import release_deleted_unread
+
+post_delete.connect(release_deleted_unread, sender=InAppNotification, dispatch_uid='release_deleted_unread')
@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from .retention import purge_notifications as purge
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.notifications.tasks.purge_notifications")
+def purge_notifications():
+    reclaimed = purge()
+    if reclaimed["total"]:
+        logger.info("purge_notifications: reclaimed %s rows %s", reclaimed["total"], reclaimed)
+    return reclaimed
@@ -1,10 +1,21 @@
+import asyncio
 import json
+from datetime import timedelta
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from apps.notifications.models import InAppNotification
+from apps.notifications.models import EmailNotification, InAppNotification, UnreadNotificationCounter
+from apps.notifications.retention import purge_notifications
+from apps.notifications.unread import rebuild_unread_counts, unread_count
+from apps.notifications.utils import STAFF_GROUP, create_in_app_notification, notify_ticket_created
+from apps.realtime.models import OutboxEvent
 from apps.tickets.models import Category, Ticket, TicketPriority
+from apps.tickets.ws.consumers import TicketNotificationConsumer
 
 
 User = get_user_model()
@@ -146,3 +157,259 @@ class NotificationsApiTests(TestCase):
         )
 
         self.assertEqual(response.status_code, 201)
+
+    def test_staff_fanout_is_one_insert_and_one_group_message(self) -> None:
+        for i in range(5):
+            User.objects.create_user(
+                email=f"admin{i}@usls.edu.ph", password=self.password, is_staff=True)
+
+        with CaptureQueriesContext(connection) as ctx:
+            notify_ticket_created(
+                ticket_id=self.ticket.id,
+                ticket_number=self.ticket.ticket_number,
+                ticket_title=self.ticket.title,
+                student_name="Student",
+            )
+
+        inserts = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 3)
+        self.assertTrue(inserts[0].startswith('INSERT INTO "notifications_inappnotification"'))
+        # First notification for these users: their unread counters, in one statement.
+        self.assertIn('"notifications_unreadnotificationcounter"', inserts[1])
+        self.assertTrue(inserts[2].startswith('INSERT INTO "realtime_outboxevent"'))
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.group, STAFF_GROUP)
+        staff_rows = InAppNotification.objects.filter(event="ticket_created")
+        self.assertEqual(staff_rows.count(), 6)
+        self.assertEqual(
+            event.message["notification_ids"],
+            {str(n.user_id): str(n.id) for n in staff_rows},
+        )
+        self.assertEqual(event.message["unread_counts"], {str(n.user_id): 1 for n in staff_rows})
+
+    def test_staff_socket_receives_its_own_notification_id(self) -> None:
+        consumer = TicketNotificationConsumer()
+        consumer.user_id = self.staff.id
+        consumer.send_queue = asyncio.Queue()
+        event = {
+            "type": "send_staff_notification",
+            "data": {"type": "new_notification", "notification": {"id": None, "title": "T"}},
+            "notification_ids": {str(self.staff.id): "41"},
+            "unread_counts": {str(self.staff.id): 3},
+        }
+
+        async_to_sync(consumer.send_staff_notification)(event)
+        sent = json.loads(consumer.send_queue.get_nowait())
+        self.assertEqual(sent["notification"], {"id": "41", "title": "T"})
+        self.assertEqual(sent["unread_count"], 3)
+
+        consumer.user_id = self.student.id
+        async_to_sync(consumer.send_staff_notification)(event)
+        self.assertTrue(consumer.send_queue.empty())
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self) -> None:
+        self.student = User.objects.create_user(email="student@usls.edu.ph", password="x")
+        self.client.force_login(self.student)
+
+    def _notify(self, title: str) -> InAppNotification:
+        return create_in_app_notification(
+            self.student, event="ticket_updated", title=title, message=title)
+
+    def _unread_count(self) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/notifications/inapp/unread-count")
+        self.assertEqual(response.status_code, 200)
+        counter_queries = [q["sql"] for q in ctx.captured_queries if "notifications_" in q["sql"]]
+        self.assertEqual(len(counter_queries), 1)
+        self.assertIn('"notifications_unreadnotificationcounter"', counter_queries[0])
+        return response.json()["unread_count"]
+
+    def _last_pushed_count(self) -> int:
+        event = OutboxEvent.objects.filter(group=f"user_{self.student.id}").latest("id")
+        return event.message["data"]["unread_count"]
+
+    def test_counter_follows_create_read_and_delete(self) -> None:
+        self.assertEqual(self._unread_count(), 0)
+        first, second, third = self._notify("A"), self._notify("B"), self._notify("C")
+        self.assertEqual(self._unread_count(), 3)
+        self.assertEqual(self._last_pushed_count(), 3)
+
+        self.client.patch(
+            f"/api/notifications/inapp/{first.id}/",
+            data=json.dumps({"read": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(self._unread_count(), 2)
+        self.assertEqual(self._last_pushed_count(), 2)
+
+        # Marking an already-read notification read changes nothing.
+        self.client.patch(
+            f"/api/notifications/inapp/{first.id}/",
+            data=json.dumps({"read": True}),
+            content_type="application/json",
+        )
+        self.assertEqual(self._unread_count(), 2)
+
+        # Released once the delete commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/notifications/inapp/{second.id}/")
+        self.assertEqual(self._unread_count(), 1)
+
+        self.client.post("/api/notifications/inapp/mark-all-read/")
+        self.assertEqual(self._unread_count(), 0)
+        self.assertEqual(self._last_pushed_count(), 0)
+        self.assertFalse(InAppNotification.objects.filter(pk=third.pk, read=False).exists())
+
+    def test_cascade_delete_of_a_ticket_releases_its_unread_notifications(self) -> None:
+        category = Category.objects.create(name="Electrical")
+        priority = TicketPriority.objects.create(name="Medium", level=2, color_code="#f59e0b")
+        ticket = Ticket.objects.create(
+            title="Projector", description="Black screen", student=self.student,
+            category=category, priority=priority, building="Main", room_name="M204")
+        read, _, _ = [
+            create_in_app_notification(self.student, ticket_id=ticket.id, event="e", title=title, message=title)
+            for title in ("A", "B", "C")
+        ]
+        self.client.patch(
+            f"/api/notifications/inapp/{read.id}/",
+            data=json.dumps({"read": True}),
+            content_type="application/json",
+        )
+        self._notify("Unrelated")
+        self.assertEqual(self._unread_count(), 3)
+        pushes = OutboxEvent.objects.filter(group=f"user_{self.student.id}").count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+        self.assertEqual(self._unread_count(), 1)
+        self.assertEqual(self._last_pushed_count(), 1)
+        # Both rows are released with one adjustment and one push.
+        self.assertEqual(OutboxEvent.objects.filter(group=f"user_{self.student.id}").count(), pushes + 1)
+
+    def test_rolled_back_delete_releases_nothing(self) -> None:
+        notification = self._notify("A")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    notification.delete()
+                    raise RuntimeError("boom")
+
+        self.assertEqual(self._unread_count(), 1)
+
+    def test_rebuild_recounts_rows_written_outside_the_api(self) -> None:
+        self._notify("A")
+        InAppNotification.objects.create(user=self.student, event="e", title="B", message="B")
+
+        self.assertEqual(self._unread_count(), 1)
+        self.assertEqual(rebuild_unread_counts(), 1)
+        self.assertEqual(self._unread_count(), 2)
+        self.assertEqual(UnreadNotificationCounter.objects.get(pk=self.student.id).unread, 2)
+
+
+class InAppListingTests(TestCase):
+    def setUp(self) -> None:
+        self.student = User.objects.create_user(email="student@usls.edu.ph", password="x")
+        self.client.force_login(self.student)
+        self.notifications = [
+            create_in_app_notification(
+                self.student, event="ticket_updated", title=f"N{i}", message=f"N{i}")
+            for i in range(5)
+        ]
+
+    def _list(self, **params):
+        response = self.client.get("/api/notifications/inapp/", params)
+        return response, [n["title"] for n in response.json()] if response.status_code == 200 else None
+
+    def test_cursor_pages_back_through_all_notifications(self) -> None:
+        response, titles = self._list(limit=2)
+        self.assertEqual(titles, ["N4", "N3"])
+        seen = list(titles)
+        while response.get("X-Next-Cursor"):
+            response, titles = self._list(limit=2, cursor=response["X-Next-Cursor"])
+            seen.extend(titles)
+        self.assertEqual(seen, ["N4", "N3", "N2", "N1", "N0"])
+
+    def test_since_returns_only_newer_notifications(self) -> None:
+        response, titles = self._list(since=str(self.notifications[2].id))
+        self.assertEqual(titles, ["N4", "N3"])
+        self.assertFalse(response.has_header("X-Next-Cursor"))
+
+        # More new rows than fit: the cursor tells the client to reload.
+        response, titles = self._list(since=str(self.notifications[0].id), limit=2)
+        self.assertEqual(titles, ["N4", "N3"])
+        self.assertTrue(response.has_header("X-Next-Cursor"))
+
+        _, titles = self._list(since=self.notifications[4].created_at.isoformat())
+        self.assertEqual(titles, [])
+
+    def test_unread_only_and_bad_input(self) -> None:
+        InAppNotification.objects.filter(pk__in=[n.pk for n in self.notifications[:3]]).update(read=True)
+        _, titles = self._list(unread_only="true")
+        self.assertEqual(titles, ["N4", "N3"])
+
+        self.assertEqual(self._list(cursor="not-a-cursor")[0].status_code, 400)
+        self.assertEqual(self._list(since="yesterday")[0].status_code, 400)
+
+
+@override_settings(
+    NOTIFICATION_READ_RETENTION_DAYS=30,
+    NOTIFICATION_UNREAD_RETENTION_DAYS=180,
+    NOTIFICATION_MAX_PER_USER=3,
+    EMAIL_NOTIFICATION_RETENTION_DAYS=90,
+)
+class RetentionTests(TestCase):
+    def setUp(self) -> None:
+        self.student = User.objects.create_user(email="student@usls.edu.ph", password="x")
+        self.other = User.objects.create_user(email="other@usls.edu.ph", password="x")
+
+    def _notify(self, user, title: str, *, days_ago: int, read: bool = False) -> InAppNotification:
+        n = create_in_app_notification(user, event="ticket_updated", title=title, message=title)
+        InAppNotification.objects.filter(pk=n.pk).update(
+            created_at=timezone.now() - timedelta(days=days_ago))
+        if read:
+            self.client.force_login(user)
+            self.client.patch(
+                f"/api/notifications/inapp/{n.id}/",
+                data=json.dumps({"read": True}),
+                content_type="application/json",
+            )
+        return n
+
+    def _titles(self, user) -> list[str]:
+        return sorted(InAppNotification.objects.filter(user=user).values_list("title", flat=True))
+
+    def test_policies_delete_in_batches_and_keep_counters_right(self) -> None:
+        self._notify(self.student, "old-read", days_ago=40, read=True)
+        self._notify(self.student, "recent-read", days_ago=5, read=True)
+        self._notify(self.student, "ancient-unread", days_ago=200)
+        self._notify(self.student, "recent-unread", days_ago=1)
+        for i in range(5):
+            self._notify(self.other, f"o{i}", days_ago=10 - i)
+        ticket = Ticket.objects.create(
+            title="T", description="T", building="Main", room_name="1", student=self.student,
+            category=Category.objects.create(name="Electrical"),
+            priority=TicketPriority.objects.create(name="Medium", level=2, color_code="#f59e0b"),
+        )
+        old_email = EmailNotification.objects.create(user=self.student, ticket=ticket, event="e")
+        EmailNotification.objects.filter(pk=old_email.pk).update(sent_at=timezone.now() - timedelta(days=100))
+        EmailNotification.objects.create(user=self.student, ticket=ticket, event="e")
+
+        reclaimed = purge_notifications(batch_size=1)
+
+        self.assertEqual(reclaimed, {
+            "read_expired": 1, "unread_expired": 1, "over_cap": 2, "email": 1, "total": 5})
+        self.assertEqual(self._titles(self.student), ["recent-read", "recent-unread"])
+        self.assertEqual(self._titles(self.other), ["o2", "o3", "o4"])
+        self.assertEqual(EmailNotification.objects.count(), 1)
+
+        self.assertEqual(unread_count(self.student.id), 1)
+        self.assertEqual(unread_count(self.other.id), 3)
+        pushed = OutboxEvent.objects.filter(group=f"user_{self.other.id}").latest("id")
+        self.assertEqual(pushed.message["data"], {"type": "unread_count", "unread_count": 3})
+
+        self.assertEqual(purge_notifications()["total"], 0)
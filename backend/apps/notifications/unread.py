@@ -0,0 +1,136 @@
+"""Incremental maintenance of ``UnreadNotificationCounter``.
+
+Callers adjust counters inside the same transaction as the notification
+write and push the new value to the user's socket with
+``publish_unread_count``. Deleting an unread notification by any route
+(API, admin, a ticket's cascade) releases it through ``release_deleted_unread``,
+which batches a transaction's deletes into one adjustment and one push per
+user once it commits; code that deletes in bulk and adjusts the counters
+itself does so inside ``counted_deletes()``. ``rebuild_unread_counts`` (and the
+``rebuild_unread_counts`` command) recomputes every counter from the rows,
+for writes that bypass all of this, e.g. raw SQL or ``QuerySet.update``.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from apps.realtime.outbox import publish
+
+from .models import InAppNotification, UnreadNotificationCounter
+
+_deletes_counted = ContextVar("unread_deletes_counted", default=False)
+
+
+def adjust_unread(user_ids, delta: int) -> dict[int, int]:
+    """Add ``delta`` to each user's counter; returns the new counts by user id."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return {}
+    counters = UnreadNotificationCounter.objects.filter(user_id__in=user_ids)
+    change = {"unread": Greatest(F("unread") + delta, Value(0))}
+    if counters.update(**change) < len(user_ids):
+        # First notification for some users: create their rows at zero (a
+        # concurrent writer may win the insert) and apply the delta to them.
+        existing = set(counters.values_list("user_id", flat=True))
+        missing = [user_id for user_id in user_ids if user_id not in existing]
+        UnreadNotificationCounter.objects.bulk_create(
+            [UnreadNotificationCounter(user_id=user_id) for user_id in missing],
+            ignore_conflicts=True,
+        )
+        UnreadNotificationCounter.objects.filter(user_id__in=missing).update(**change)
+    return dict(counters.values_list("user_id", "unread"))
+
+
+def unread_count(user_id: int) -> int:
+    count = (
+        UnreadNotificationCounter.objects.filter(pk=user_id)
+        .values_list("unread", flat=True)
+        .first()
+    )
+    return count or 0
+
+
+def publish_unread_count(user_id: int, count: int) -> None:
+    publish(
+        f"user_{user_id}",
+        {
+            "type": "send_notification",
+            "data": {"type": "unread_count", "unread_count": count},
+        },
+    )
+
+
+@contextmanager
+def counted_deletes():
+    """Deletes in this block have their counters adjusted by the caller."""
+    token = _deletes_counted.set(True)
+    try:
+        yield
+    finally:
+        _deletes_counted.reset(token)
+
+
+class _ReleasedUnread:
+    """``on_commit`` callback releasing a transaction's deleted unread rows."""
+
+    def __init__(self, using):
+        self.using = using
+        self.removed = Counter()
+
+    def __call__(self):
+        by_delta = defaultdict(list)
+        for user_id, removed in self.removed.items():
+            by_delta[removed].append(user_id)
+        with transaction.atomic(using=self.using):
+            counters = UnreadNotificationCounter.objects.using(self.using)
+            # Update only: when the owner was deleted too, their counter is
+            # already gone and must not be recreated.
+            for removed, user_ids in by_delta.items():
+                counters.filter(user_id__in=user_ids).update(
+                    unread=Greatest(F("unread") - removed, Value(0)))
+            for user_id, count in counters.filter(user_id__in=list(self.removed)).values_list("user_id", "unread"):
+                publish_unread_count(user_id, count)
+
+
+def _released_unread(using) -> _ReleasedUnread:
+    """The callback collecting this transaction's deletes at the current savepoint.
+
+    Matching the savepoint means rows deleted in a savepoint that is rolled
+    back are discarded along with their callback.
+    """
+    connection = transaction.get_connection(using)
+    savepoints = set(connection.savepoint_ids)
+    for sids, callback, _ in connection.run_on_commit:
+        if isinstance(callback, _ReleasedUnread) and sids == savepoints:
+            return callback
+    callback = _ReleasedUnread(using)
+    transaction.on_commit(callback, using=using)
+    return callback
+
+
+def release_deleted_unread(sender, instance: InAppNotification, using, **kwargs) -> None:
+    """``post_delete`` receiver: one less unread notification for its owner."""
+    if instance.read or _deletes_counted.get():
+        return
+    _released_unread(using).removed[instance.user_id] += 1
+
+
+def rebuild_unread_counts() -> int:
+    """Recompute every counter. Returns the number of users with unread rows."""
+    counts = (
+        InAppNotification.objects.filter(read=False)
+        .order_by()
+        .values("user_id")
+        .annotate(n=Count("id"))
+    )
+    with transaction.atomic():
+        UnreadNotificationCounter.objects.all().delete()
+        created = UnreadNotificationCounter.objects.bulk_create(
+            [UnreadNotificationCounter(user_id=row["user_id"], unread=row["n"]) for row in counts],
+            batch_size=1000,
+        )
+    return len(created)
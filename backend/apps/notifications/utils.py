@@ -1,13 +1,18 @@
 import logging
+from django.db import transaction
 from django.utils import timezone
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
 
+from apps.realtime.outbox import publish
+
 from .models import InAppNotification
+from .unread import adjust_unread
 
 logger = logging.getLogger(__name__)
 
+# Channel group every staff user's socket joins; see TicketNotificationConsumer.
+STAFF_GROUP = "staff"
+
 
 def serialize_inapp_notification(n: InAppNotification) -> dict:
     ts = timezone.localtime(n.created_at).isoformat() if n.created_at else ""
@@ -29,6 +34,20 @@ def serialize_inapp_notification(n: InAppNotification) -> dict:
         "actionLabel": None,
     }
 
+def _notification_payload(notification: InAppNotification, action_url: str = "") -> dict:
+    ts = timezone.localtime(notification.created_at).isoformat() if notification.created_at else ""
+    return {
+        "id": str(notification.id),
+        "type": notification.notification_type,
+        "title": notification.title,
+        "message": notification.message,
+        "timestamp": ts,
+        "read": notification.read,
+        "actionUrl": action_url or None,
+        "actionLabel": None,
+    }
+
+
 def create_in_app_notification(
     user,
     *,
@@ -39,42 +58,97 @@ def create_in_app_notification(
     notification_type: str = "info",
     action_url: str = "",
 ):
-    notification = InAppNotification.objects.create(
-        user=user,
-        ticket_id=ticket_id,
-        event=event,
-        title=title,
-        message=message,
-        notification_type=notification_type,
-        action_url=action_url or "",
-    )
+    # Row, counter and event commit together or not at all.
+    with transaction.atomic():
+        notification = InAppNotification.objects.create(
+            user=user,
+            ticket_id=ticket_id,
+            event=event,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            action_url=action_url or "",
+        )
+        unread = adjust_unread([user.id], 1)[user.id]
 
-    try:
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            ts = timezone.localtime(notification.created_at).isoformat() if notification.created_at else ""
-            notification_data = {
-                "id": str(notification.id),
-                "type": notification.notification_type,
-                "title": notification.title,
-                "message": notification.message,
-                "timestamp": ts,
-                "read": notification.read,
-                "actionUrl": action_url or None,
-                "actionLabel": None,
-            }
-            async_to_sync(channel_layer.group_send)(
-                f"user_{user.id}",
-                {
-                    "type": "send_notification",
-                    "data": {
-                        "type": "new_notification",
-                        "notification": notification_data,
-                    },
+        publish(
+            f"user_{user.id}",
+            {
+                "type": "send_notification",
+                "data": {
+                    "type": "new_notification",
+                    "notification": _notification_payload(notification, action_url),
+                    "unread_count": unread,
                 },
+            },
+        )
+    return notification
+
+
+def create_staff_notifications(
+    *,
+    ticket_id: int | None = None,
+    event: str,
+    title: str,
+    message: str,
+    notification_type: str = "info",
+    action_url: str = "",
+    exclude_user_id: int | None = None,
+    recipient_ids: list[int] | None = None,
+) -> list[InAppNotification]:
+    """Notify every staff user with one INSERT and one outbox message.
+
+    Each staff socket is in the ``staff`` group and picks its own row id out
+    of ``notification_ids`` (and its unread count out of ``unread_counts``),
+    so the fan-out cost no longer grows with the number of staff accounts.
+    ``recipient_ids`` narrows the fan-out to those staff users.
+    """
+    User = get_user_model()
+    staff = User.objects.filter(is_staff=True)
+    if recipient_ids is not None:
+        staff = staff.filter(pk__in=recipient_ids)
+    if exclude_user_id is not None:
+        staff = staff.exclude(pk=exclude_user_id)
+    staff_ids = list(staff.values_list("id", flat=True))
+    if not staff_ids:
+        return []
+
+    created_at = timezone.now()
+    with transaction.atomic():
+        notifications = InAppNotification.objects.bulk_create([
+            InAppNotification(
+                user_id=user_id,
+                ticket_id=ticket_id,
+                event=event,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                action_url=action_url or "",
+                created_at=created_at,
             )
-    except Exception as e:
-        logger.warning("WebSocket broadcast failed: %s", e)
+            for user_id in staff_ids
+        ])
+        unread = adjust_unread(staff_ids, 1)
+
+        payload = _notification_payload(notifications[0], action_url)
+        payload["id"] = None
+        publish(
+            STAFF_GROUP,
+            {
+                "type": "send_staff_notification",
+                "data": {
+                    "type": "new_notification",
+                    "notification": payload,
+                },
+                "notification_ids": {
+                    str(n.user_id): str(n.id) for n in notifications
+                },
+                "unread_counts": {
+                    str(user_id): count for user_id, count in unread.items()
+                },
+            },
+        )
+    return notifications
 
 STATUS_LABELS = {
     "pending": ("Ticket updated", 'Your ticket "{title}" status was set to Pending.', "info"),
@@ -117,17 +191,14 @@ def notify_ticket_created(
     ticket_title: str,
     student_name: str,
 ):
-    User = get_user_model()
-    for admin_user in User.objects.filter(is_staff=True):
-        create_in_app_notification(
-            user=admin_user,
-            ticket_id=ticket_id,
-            event="ticket_created",
-            title="New ticket submitted",
-            message=f'{student_name} submitted: "{ticket_title}"',
-            notification_type="info",
-            action_url=f"/tickets/{ticket_number}",
-        )
+    create_staff_notifications(
+        ticket_id=ticket_id,
+        event="ticket_created",
+        title="New ticket submitted",
+        message=f'{student_name} submitted: "{ticket_title}"',
+        notification_type="info",
+        action_url=f"/tickets/{ticket_number}",
+    )
 
 
 def notify_ticket_comment(
@@ -148,6 +219,24 @@ def notify_ticket_comment(
         action_url=f"/tickets/{ticket_number}",
     )
 
+def notify_staff_ticket_comment(
+    *,
+    author_id: int,
+    ticket_id: int,
+    ticket_number: str,
+    ticket_title: str,
+    message_preview: str,
+):
+    create_staff_notifications(
+        ticket_id=ticket_id,
+        event="comment_added",
+        title="New comment on your ticket",
+        message=f'"{ticket_title}": {message_preview}',
+        notification_type="info",
+        action_url=f"/tickets/{ticket_number}",
+        exclude_user_id=author_id,
+    )
+
 def notify_feedback_submitted(
     *,
     ticket_id: int,
@@ -156,16 +245,12 @@ def notify_feedback_submitted(
     rating: int,
     student_name: str,
 ):
-    User = get_user_model()
     stars = "⭐" * rating
-    
-    for admin_user in User.objects.filter(is_staff=True):
-        create_in_app_notification(
-            user=admin_user,
-            ticket_id=ticket_id,
-            event="feedback_submitted",
-            title=f"New Feedback: {ticket_number}",
-            message=f'{student_name} rated "{ticket_title}" {stars} ({rating}/5)',
-            notification_type="info",
-            action_url=f"/tickets/{ticket_number}",
-        )
\ No newline at end of file
+    create_staff_notifications(
+        ticket_id=ticket_id,
+        event="feedback_submitted",
+        title=f"New Feedback: {ticket_number}",
+        message=f'{student_name} rated "{ticket_title}" {stars} ({rating}/5)',
+        notification_type="info",
+        action_url=f"/tickets/{ticket_number}",
+    )
@@ -1,7 +1,14 @@
+from datetime import datetime
+
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
 from ninja import Router
 from ninja.errors import HttpError
 from ninja.security import SessionAuth
 
+from apps.tickets.pagination import keyset_page
+
 from .models import EmailNotification, InAppNotification
 from .schemas import (
     EmailNotificationCreateSchema,
@@ -9,6 +16,7 @@ from .schemas import (
     InAppNotificationSchema,
     InAppNotificationMarkReadSchema,
 )
+from .unread import adjust_unread, publish_unread_count, unread_count
 from .utils import serialize_inapp_notification
 
 router = Router(auth=SessionAuth())
@@ -25,38 +33,98 @@ def serialize_email_notification(notification: EmailNotification) -> dict:
     }
 
 
-@router.get("/inapp/", response=list[InAppNotificationSchema])
-def list_inapp_notifications(request, limit: int = 50):
-    qs = InAppNotification.objects.filter(
-        user=request.user).select_related("ticket")[:limit]
-    return [serialize_inapp_notification(n) for n in qs]
+INAPP_PAGE_SIZE_DEFAULT = 50
+INAPP_PAGE_SIZE_MAX = 200
+
+
+def _since_filter(since: str) -> dict:
+    """``since`` is a notification id or an ISO timestamp."""
+    if since.isdigit():
+        return {"id__gt": int(since)}
+    try:
+        moment = datetime.fromisoformat(since)
+    except ValueError as exc:
+        raise ValueError("since must be a notification id or an ISO timestamp.") from exc
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return {"created_at__gt": moment}
+
+
+@router.get("/inapp/", response={200: list[InAppNotificationSchema], 400: dict})
+def list_inapp_notifications(
+    request,
+    response: HttpResponse,
+    limit: int = INAPP_PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+    since: str | None = None,
+    unread_only: bool = False,
+):
+    """Newest first, keyset-paged on ``(created_at, id)``.
+
+    ``since`` returns only notifications newer than an id or timestamp, so a
+    client can fetch what it missed instead of the whole list. The body stays
+    a plain list; the cursor for the next (older) page travels in the
+    ``X-Next-Cursor`` header, and in ``since`` mode its presence means more
+    than ``limit`` notifications are new.
+    """
+    limit = min(max(1, limit), INAPP_PAGE_SIZE_MAX)
+    qs = InAppNotification.objects.filter(user=request.user).select_related("ticket")
+    if unread_only:
+        qs = qs.filter(read=False)
+    try:
+        if since:
+            qs = qs.filter(**_since_filter(since))
+        page, next_cursor, _ = keyset_page(qs, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return 400, {"detail": str(exc)}
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return 200, [serialize_inapp_notification(n) for n in page]
+
+
+@router.get("/inapp/unread-count", response={200: dict})
+def get_unread_count(request):
+    return 200, {"unread_count": unread_count(request.user.id)}
+
+
+def _apply_unread_change(user_id: int, delta: int) -> None:
+    if delta:
+        count = adjust_unread([user_id], delta)[user_id]
+        publish_unread_count(user_id, count)
 
 
 @router.post("/inapp/mark-all-read/", response={200: dict})
 def mark_all_inapp_read(request):
-    updated = InAppNotification.objects.filter(
-        user=request.user, read=False).update(read=True)
+    with transaction.atomic():
+        updated = InAppNotification.objects.filter(
+            user=request.user, read=False).update(read=True)
+        _apply_unread_change(request.user.id, -updated)
     return 200, {"marked": updated}
 
 
 @router.patch("/inapp/{notification_id}/", response=InAppNotificationSchema)
 def mark_inapp_read(request, notification_id: int, payload: InAppNotificationMarkReadSchema):
-    n = InAppNotification.objects.filter(
-        user=request.user, id=notification_id).first()
-    if not n:
-        raise HttpError(404, "Not found.")
-    n.read = payload.read
-    n.save(update_fields=["read"])
+    with transaction.atomic():
+        n = InAppNotification.objects.select_for_update().filter(
+            user=request.user, id=notification_id).first()
+        if not n:
+            raise HttpError(404, "Not found.")
+        was_read = n.read
+        n.read = payload.read
+        n.save(update_fields=["read"])
+        _apply_unread_change(request.user.id, int(was_read) - int(n.read))
     return serialize_inapp_notification(n)
 
 
 @router.delete("/inapp/{notification_id}/", response={204: None})
 def delete_inapp_notification(request, notification_id: int):
-    n = InAppNotification.objects.filter(
-        user=request.user, id=notification_id).first()
-    if not n:
-        raise HttpError(404, "Not found.")
-    n.delete()
+    with transaction.atomic():
+        n = InAppNotification.objects.select_for_update().filter(
+            user=request.user, id=notification_id).first()
+        if not n:
+            raise HttpError(404, "Not found.")
+        # The post_delete receiver releases an unread row's count.
+        n.delete()
     return 204, None
 
 
@@ -0,0 +1,65 @@
+"""Encode WebSocket frames once per event instead of once per socket.
+
+The relay calls ``with_frames`` before ``group_send``: the client-facing
+payload (``data`` plus ``seq``) is encoded as JSON text and as msgpack bytes
+and travels through the channel layer in place of ``data``. Consumers pick
+the frame for their negotiated subprotocol and send it unchanged.
+"""
+import msgpack
+import ujson
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Handlers that rewrite ``data`` per socket, so they still get it decoded.
+PER_SOCKET_TYPES = {"send_staff_notification"}
+
+
+def encode_json(payload) -> str:
+    return ujson.dumps(payload, escape_forward_slashes=False)
+
+
+def encode_msgpack(payload) -> bytes:
+    return msgpack.packb(payload)
+
+
+def encode(payload, codec: str):
+    return encode_msgpack(payload) if codec == MSGPACK else encode_json(payload)
+
+
+def decode(frame, codec: str):
+    if codec == MSGPACK:
+        return msgpack.unpackb(frame)
+    return ujson.loads(frame)
+
+
+def client_frame(event: dict, codec: str, user_id: int | None = None):
+    """What one client receives for a channel-layer ``event``, or ``None``."""
+    if "frames" in event:
+        return event["frames"][codec]
+    data = event["data"]
+    if event.get("type") == "send_staff_notification":
+        # One message for all staff; each client fills in its own row id.
+        notification_id = event["notification_ids"].get(str(user_id))
+        if notification_id is None:
+            return None
+        data = {**data, "notification": {**data["notification"], "id": notification_id}}
+        unread = event.get("unread_counts", {}).get(str(user_id))
+        if unread is not None:
+            data["unread_count"] = unread
+    if "seq" in event:
+        data = {**data, "seq": event["seq"]}
+    return encode(data, codec)
+
+
+def with_frames(message: dict, seq: int) -> dict:
+    """Channel-layer message for ``message`` as event ``seq``."""
+    if message.get("type") in PER_SOCKET_TYPES or "data" not in message:
+        return {**message, "seq": seq}
+    frame = {**message["data"], "seq": seq}
+    rest = {key: value for key, value in message.items() if key != "data"}
+    return {
+        **rest,
+        "seq": seq,
+        "frames": {JSON: encode_json(frame), MSGPACK: encode_msgpack(frame)},
+    }
@@ -0,0 +1,22 @@
+"""Channel group names for ticket events.
+
+Every ticket event goes to three groups: the ticket's own group (sockets
+that subscribed to ``ticket:<id>``), its owner's group (joined by the
+student's sockets on connect) and the staff firehose (``staff`` topic).
+A socket is only ever in the smallest of these that covers what it asked
+for, so it receives each event once.
+"""
+
+STAFF_TICKETS_GROUP = "tickets_staff"
+
+
+def ticket_group(ticket_id: int) -> str:
+    return f"ticket_{ticket_id}"
+
+
+def owner_group(user_id: int) -> str:
+    return f"tickets_owner_{user_id}"
+
+
+def ticket_event_groups(ticket) -> list[str]:
+    return [ticket_group(ticket.id), owner_group(ticket.student_id), STAFF_TICKETS_GROUP]
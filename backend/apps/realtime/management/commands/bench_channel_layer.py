@@ -0,0 +1,70 @@
+import asyncio
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+from apps.realtime.frames import with_frames
+
+from .bench_ws_frames import Command as FramesCommand
+
+LAYERS = {
+    'postgres': ('apps.realtime.pg_layer.PostgresChannelLayer', {}),
+    'redis': ('channels_redis.core.RedisChannelLayer', None),
+    'memory': ('channels.layers.InMemoryChannelLayer', {}),
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark group_send fan-out latency across two channel layer instances (postgres/redis/memory)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layer', choices=sorted(LAYERS), default='postgres')
+        parser.add_argument('--redis-url', default='redis://localhost:6379/0')
+        parser.add_argument('--sockets', type=int, default=100, help='Channels in the group')
+        parser.add_argument('--messages', type=int, default=200, help='Broadcasts to time')
+
+    def handle(self, *args, **options):
+        backend, config = LAYERS[options['layer']]
+        if config is None:
+            config = {'hosts': [options['redis_url']]}
+        # A sender and a receiver instance, as two daphne processes would have.
+        sender = import_string(backend)(**config)
+        receiver = sender if options['layer'] == 'memory' else import_string(backend)(**config)
+
+        message = with_frames(FramesCommand._comment_event(), 1)
+        self.stdout.write(
+            f"{options['layer']}: {options['messages']} broadcasts to {options['sockets']} channels, "
+            f"{len(message['frames']['json'])} byte frame..."
+        )
+        latencies = async_to_sync(self._run)(sender, receiver, message, options['sockets'], options['messages'])
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(f'  median fan-out : {statistics.median(latencies) * 1e3:8.2f} ms')
+        self.stdout.write(f'  p95 fan-out    : {p95 * 1e3:8.2f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Throughput: {len(latencies) / sum(latencies):.0f} broadcasts/s sequential'))
+
+    async def _run(self, sender, receiver, message, sockets, messages):
+        group = 'bench_channel_layer'
+        channels = [await receiver.new_channel() for _ in range(sockets)]
+        for channel in channels:
+            await receiver.group_add(group, channel)
+        latencies = []
+        try:
+            for _ in range(messages + 1):
+                started = time.perf_counter()
+                await sender.group_send(group, message)
+                await asyncio.gather(*(receiver.receive(channel) for channel in channels))
+                latencies.append(time.perf_counter() - started)
+        finally:
+            for channel in channels:
+                await receiver.group_discard(group, channel)
+            for layer in {sender, receiver}:
+                if hasattr(layer, 'close'):
+                    await layer.close()
+        # The first round pays for connecting.
+        return latencies[1:]
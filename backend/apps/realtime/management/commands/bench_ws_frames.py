@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.realtime import frames
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark WebSocket broadcasts: json per socket vs frames encoded once (json/msgpack)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sockets', type=int, default=200, help='Sockets in the group')
+        parser.add_argument('--repeat', type=int, default=500, help='Broadcasts per path')
+
+    def handle(self, *args, **options):
+        sockets, repeat = options['sockets'], options['repeat']
+        message = self._comment_event()
+        seq = 123456
+
+        def per_socket():
+            # Previous behaviour: every consumer in the group ran json.dumps.
+            for _ in range(sockets):
+                json.dumps({**message['data'], 'seq': seq})
+
+        def encode_once(codec):
+            def broadcast():
+                event = frames.with_frames(message, seq)
+                for _ in range(sockets):
+                    event['frames'][codec]
+            return broadcast
+
+        event = frames.with_frames(message, seq)
+        if json.loads(event['frames'][frames.JSON]) != frames.decode(event['frames'][frames.MSGPACK], frames.MSGPACK):
+            self.stderr.write(self.style.ERROR('JSON and msgpack frames differ.'))
+            return
+
+        self.stdout.write(f'Broadcasting {repeat} events to {sockets} sockets...')
+        baseline = self._time(per_socket, repeat)
+        once_json = self._time(encode_once(frames.JSON), repeat)
+        once_msgpack = self._time(encode_once(frames.MSGPACK), repeat)
+        self.stdout.write(f'  json per socket        : {baseline * 1e6:10.1f} us/broadcast')
+        self.stdout.write(f'  once, json sockets     : {once_json * 1e6:10.1f} us/broadcast')
+        self.stdout.write(f'  once, msgpack sockets  : {once_msgpack * 1e6:10.1f} us/broadcast')
+
+        json_bytes = len(event['frames'][frames.JSON].encode())
+        msgpack_bytes = len(event['frames'][frames.MSGPACK])
+        self.stdout.write(f'  frame size json        : {json_bytes:6d} bytes')
+        self.stdout.write(f'  frame size msgpack     : {msgpack_bytes:6d} bytes')
+        self.stdout.write(self.style.SUCCESS(
+            f'Speedup: {baseline / once_json:.2f}x CPU, msgpack {msgpack_bytes / json_bytes:.0%} of json bytes'))
+
+    @staticmethod
+    def _time(fn, repeat):
+        fn()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat
+
+    @staticmethod
+    def _comment_event():
+        # Shape of the comment_created message published by the tickets API.
+        return {
+            'type': 'send_comment_update',
+            'data': {
+                'type': 'comment_created',
+                'ticket_id': 4821,
+                'comment': {
+                    'id': 99120,
+                    'ticket_id': 4821,
+                    'user': {
+                        'id': 311,
+                        'email': 'student311@usls.edu.ph',
+                        'name': 'Student 311',
+                        'avatar': 'https://cdn.example.edu/avatars/311.png',
+                    },
+                    'message': 'The projector still shows a black screen after the restart. ' * 2,
+                    'attachments': [],
+                    'created_at': '2026-10-18T09:44:12.512000+08:00',
+                    'updated_at': '2026-10-18T09:44:12.512000+08:00',
+                },
+            },
+        }
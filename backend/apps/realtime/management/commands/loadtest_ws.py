@@ -0,0 +1,371 @@
+import asyncio
+import base64
+import json
+import os
+import re
+import statistics
+import struct
+import time
+from urllib.parse import urlparse
+
+from asgiref.sync import sync_to_async
+from channels.layers import channel_layers
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from apps.notifications.utils import create_staff_notifications
+from apps.realtime import frames
+from apps.realtime.groups import ticket_event_groups
+from apps.realtime.outbox import publish_to
+from apps.tickets.models import Category, Ticket, TicketPriority
+
+EMAIL_DOMAIN = 'loadtest.invalid'
+FIXTURE_NAME = 'Load test'
+MARKER = re.compile(r'\[loadtest:(\d+)\]')
+
+
+def _rss_bytes(pid='self'):
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class InProcessClient:
+    """A socket on ``config.asgi.application`` inside this process."""
+
+    def __init__(self, application, path, cookie, subprotocols):
+        self.communicator = WebsocketCommunicator(
+            application, path, headers=[(b'cookie', cookie.encode())], subprotocols=subprotocols)
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect(timeout=30)
+        return connected
+
+    async def send(self, frame):
+        if isinstance(frame, bytes):
+            await self.communicator.send_to(bytes_data=frame)
+        else:
+            await self.communicator.send_to(text_data=frame)
+
+    async def receive(self):
+        message = await self.communicator.output_queue.get()
+        if message['type'] == 'websocket.close':
+            raise ConnectionError('socket closed')
+        return message.get('text') if message.get('text') is not None else message.get('bytes')
+
+    async def close(self):
+        await self.communicator.disconnect()
+
+
+class SocketClient:
+    """A real WebSocket connection to a running server.
+
+    A minimal RFC 6455 client on asyncio streams; autobahn's asyncio client
+    cannot load next to daphne, which selects txaio's Twisted backend.
+    """
+
+    def __init__(self, url, cookie, subprotocols):
+        self.url, self.cookie, self.subprotocols = url, cookie, subprotocols
+        self.reader = self.writer = None
+
+    async def connect(self):
+        parsed = urlparse(self.url)
+        secure = parsed.scheme == 'wss'
+        self.reader, self.writer = await asyncio.open_connection(
+            parsed.hostname, parsed.port or (443 if secure else 80), ssl=True if secure else None)
+        headers = [
+            f'GET {parsed.path or "/"} HTTP/1.1',
+            f'Host: {parsed.netloc}',
+            'Upgrade: websocket',
+            'Connection: Upgrade',
+            f'Sec-WebSocket-Key: {base64.b64encode(os.urandom(16)).decode()}',
+            'Sec-WebSocket-Version: 13',
+            f'Cookie: {self.cookie}',
+        ]
+        if self.subprotocols:
+            headers.append(f'Sec-WebSocket-Protocol: {", ".join(self.subprotocols)}')
+        self.writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode())
+        response = await self.reader.readuntil(b'\r\n\r\n')
+        return response.split(b' ', 2)[1] == b'101'
+
+    async def send(self, frame, opcode=None):
+        if opcode is None:
+            opcode = 0x2 if isinstance(frame, bytes) else 0x1
+        payload = frame.encode() if isinstance(frame, str) else frame
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 1 << 16:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        self.writer.write(header + mask + masked)
+
+    async def receive(self):
+        message, kind = b'', None
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            payload = await self.reader.readexactly(length)
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                raise ConnectionError('socket closed')
+            if opcode == 0x9:
+                await self.send(payload, opcode=0xA)
+                continue
+            if opcode in (0x1, 0x2):
+                kind = opcode
+            message += payload
+            if first & 0x80:
+                return message.decode() if kind == 0x1 else message
+
+    async def close(self):
+        await self.send(struct.pack('!H', 1000), opcode=0x8)
+        self.writer.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test WebSocket fan-out: connect N staff sockets, publish ticket and staff '
+        'notification events through the outbox, report connect rate, memory and latency'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500)
+        parser.add_argument('--events', type=int, default=50, help='Events to publish (ticket/notification alternate)')
+        parser.add_argument('--interval', type=float, default=0.05, help='Seconds between events')
+        parser.add_argument('--layer', choices=['settings', 'memory', 'redis'], default='settings')
+        parser.add_argument('--redis-url', default='redis://localhost:6379/0')
+        parser.add_argument('--url', help='ws://host:port/ws/tickets/ of a running server; default is in-process')
+        parser.add_argument('--server-pid', type=int, help='With --url: report the server RSS growth')
+        parser.add_argument('--msgpack', action='store_true', help='Negotiate the msgpack subprotocol')
+        parser.add_argument('--connect-concurrency', type=int, default=50)
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for deliveries')
+        parser.add_argument('--keep-data', action='store_true', help='Keep the load-test users and ticket')
+
+    def handle(self, *args, **options):
+        self.session_keys = []
+        self._configure_layer(options)
+        self._teardown()
+        try:
+            users, ticket = self._setup(options['clients'])
+            self.staff_ids = [user.pk for user in users]
+            cookies = [self._session_cookie(user) for user in users]
+            report = asyncio.run(self._run(options, cookies, ticket))
+        finally:
+            if not options['keep_data']:
+                self._teardown()
+        self._print_report(options, report)
+
+    def _configure_layer(self, options):
+        if options['layer'] == 'memory':
+            settings.CHANNEL_LAYERS = {'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}}
+        elif options['layer'] == 'redis':
+            settings.CHANNEL_LAYERS = {'default': {
+                'BACKEND': 'channels_redis.core.RedisChannelLayer',
+                'CONFIG': {'hosts': [options['redis_url']], 'capacity': 200},
+            }}
+        if options['url'] and settings.CHANNEL_LAYERS['default']['BACKEND'].endswith('InMemoryChannelLayer'):
+            raise CommandError('The in-memory layer cannot reach a separate server process; use --layer redis.')
+        channel_layers.backends.clear()
+        # Publish from this process so the timings include the relay.
+        settings.REALTIME_RELAY_MODE = 'inline'
+
+    def _setup(self, clients):
+        User = get_user_model()
+        users = User.objects.bulk_create([
+            User(email=f'staff{i}@{EMAIL_DOMAIN}', is_staff=True, password='!') for i in range(clients)
+        ])
+        student = User.objects.create(email=f'student@{EMAIL_DOMAIN}', password='!')
+        # Seeded databases already have both; an empty one gets throwaway rows.
+        category = Category.objects.order_by('id').first() or Category.objects.create(name=FIXTURE_NAME)
+        priority = TicketPriority.objects.order_by('level').first() or TicketPriority.objects.create(
+            name=FIXTURE_NAME, level=1, color_code='#64748b')
+        ticket = Ticket.objects.create(
+            title='Load test ticket',
+            description='Created by loadtest_ws',
+            building='Main',
+            room_name='LT1',
+            category=category,
+            priority=priority,
+            student=student,
+        )
+        return list(User.objects.filter(email__in=[u.email for u in users])), ticket
+
+    def _teardown(self):
+        User = get_user_model()
+        # Tickets, notifications and unread counters cascade from the users;
+        # outbox rows are left to the relay's purge.
+        User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
+        Session.objects.filter(session_key__in=self.session_keys).delete()
+        self.session_keys = []
+        Category.objects.filter(name=FIXTURE_NAME, tickets__isnull=True).delete()
+        TicketPriority.objects.filter(name=FIXTURE_NAME, tickets__isnull=True).delete()
+
+    def _session_cookie(self, user):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        self.session_keys.append(session.session_key)
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    async def _run(self, options, cookies, ticket):
+        codec = frames.MSGPACK if options['msgpack'] else frames.JSON
+        subprotocols = [frames.MSGPACK] if options['msgpack'] else None
+        if options['url']:
+            def make_client(cookie):
+                return SocketClient(options['url'], cookie, subprotocols)
+            rss_pid = options['server_pid']
+        else:
+            from config.asgi import application
+
+            def make_client(cookie):
+                return InProcessClient(application, '/ws/tickets/', cookie, subprotocols)
+            rss_pid = 'self'
+
+        rss_before = _rss_bytes(rss_pid) if rss_pid else None
+        clients, connect_times = [], []
+        gate = asyncio.Semaphore(options['connect_concurrency'])
+
+        async def open_client(cookie):
+            async with gate:
+                client = make_client(cookie)
+                started = time.perf_counter()
+                if not await client.connect():
+                    raise CommandError('A load-test socket was rejected; check session auth.')
+                await client.send(frames.encode({'action': 'subscribe', 'topic': 'staff'}, codec))
+                connect_times.append(time.perf_counter() - started)
+                clients.append(client)
+
+        self.stdout.write(f'Connecting {len(cookies)} sockets...')
+        connect_started = time.perf_counter()
+        await asyncio.gather(*(open_client(cookie) for cookie in cookies))
+        connect_elapsed = time.perf_counter() - connect_started
+        rss_after = _rss_bytes(rss_pid) if rss_pid else None
+
+        sent_at, received = {}, {}
+        expected = len(clients) * options['events']
+        done = asyncio.Event()
+
+        async def read(client):
+            while True:
+                frame = await client.receive()
+                data = frames.decode(frame, codec)
+                if data.get('type') == 'ping':
+                    await client.send(frames.encode({'action': 'pong'}, codec))
+                    continue
+                match = MARKER.search(json.dumps(data))
+                if match:
+                    received.setdefault(int(match.group(1)), []).append(time.perf_counter())
+                    if sum(map(len, received.values())) >= expected:
+                        done.set()
+
+        readers = [asyncio.create_task(read(client)) for client in clients]
+        # Let subscribe acknowledgements drain before timing.
+        await asyncio.sleep(0.5)
+
+        self.stdout.write(f'Publishing {options["events"]} events...')
+        fire = sync_to_async(self._fire)
+        for n in range(options['events']):
+            sent_at[n] = time.perf_counter()
+            await fire(n, ticket)
+            await asyncio.sleep(options['interval'])
+        try:
+            await asyncio.wait_for(done.wait(), timeout=options['timeout'])
+        except asyncio.TimeoutError:
+            pass
+
+        for task in readers:
+            task.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+        deliveries = [t - sent_at[n] for n, times in received.items() for t in times]
+        fan_out = [max(times) - sent_at[n] for n, times in received.items() if len(times) == len(clients)]
+        memory = None
+        if rss_before is not None and rss_after is not None:
+            memory = (rss_after - rss_before) / max(len(clients), 1)
+        return {
+            'connected': len(clients),
+            'connect_elapsed': connect_elapsed,
+            'connect_times': connect_times,
+            'memory_per_connection': memory,
+            'expected': expected,
+            'deliveries': deliveries,
+            'fan_out': fan_out,
+        }
+
+    def _fire(self, n, ticket):
+        # The same publishing paths the ticket and notification views use.
+        from apps.tickets.views import _ticket_event, _with_list_relations
+
+        marker = f'[loadtest:{n}]'
+        with transaction.atomic():
+            if n % 2 == 0:
+                ticket = _with_list_relations(Ticket.objects.filter(pk=ticket.pk)).get()
+                event = _ticket_event(RequestFactory().get('/'), ticket, 'updated', marker, changed=('status',))
+                publish_to(ticket_event_groups(ticket), event)
+            else:
+                create_staff_notifications(
+                    recipient_ids=self.staff_ids,
+                    ticket_id=ticket.id,
+                    event='ticket_created',
+                    title='Load test',
+                    message=marker,
+                    action_url=f'/tickets/{ticket.ticket_number}',
+                )
+
+    def _print_report(self, options, report):
+        write = self.stdout.write
+        connected = report['connected']
+        write(f"Layer: {settings.CHANNEL_LAYERS['default']['BACKEND']}, "
+              f"{'server ' + options['url'] if options['url'] else 'in-process'}, pid {os.getpid()}")
+        write(f"  connected             : {connected} in {report['connect_elapsed']:.2f}s "
+              f"({connected / report['connect_elapsed']:.0f}/s)")
+        if report['connect_times']:
+            write(f"  connect p50 / p99     : {_percentile(report['connect_times'], 0.5) * 1e3:.1f} / "
+                  f"{_percentile(report['connect_times'], 0.99) * 1e3:.1f} ms")
+        if report['memory_per_connection'] is not None:
+            write(f"  memory per connection : {report['memory_per_connection'] / 1024:.1f} KiB (RSS growth)")
+        else:
+            write('  memory per connection : n/a (pass --server-pid with --url)')
+
+        deliveries, fan_out = report['deliveries'], report['fan_out']
+        write(f"  delivered             : {len(deliveries)} / {report['expected']} frames")
+        if deliveries:
+            write(f"  delivery p50 / p99    : {statistics.median(deliveries) * 1e3:.1f} / "
+                  f"{_percentile(deliveries, 0.99) * 1e3:.1f} ms")
+        if fan_out:
+            write(f"  fan-out p50 / p99     : {statistics.median(fan_out) * 1e3:.1f} / "
+                  f"{_percentile(fan_out, 0.99) * 1e3:.1f} ms (until the last socket has it)")
+
+        if len(deliveries) == report['expected']:
+            write(self.style.SUCCESS('All events reached every socket.'))
+        else:
+            write(self.style.WARNING(
+                f"{report['expected'] - len(deliveries)} frames missing; sockets may have been "
+                'resynced by backpressure or the timeout was too short.'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.realtime.outbox import RELAY_BATCH_SIZE, outbox_lag, purge_dispatched, relay_pending
+
+
+class Command(BaseCommand):
+    help = 'Relay committed outbox events to the channel layer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain once and exit')
+        parser.add_argument('--interval', type=float, default=0.5, help='Seconds to sleep when idle')
+        parser.add_argument('--batch-size', type=int, default=RELAY_BATCH_SIZE)
+        parser.add_argument('--stats-every', type=float, default=60.0,
+                            help='Seconds between lag reports and purges of dispatched rows')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['once']:
+            sent = relay_pending(batch_size)
+            self._report(sent)
+            return
+
+        self.stdout.write('Relaying outbox events (Ctrl+C to stop)...')
+        sent_since_report = 0
+        next_report = time.monotonic() + options['stats_every']
+        try:
+            while True:
+                sent = relay_pending(batch_size)
+                sent_since_report += sent
+                if time.monotonic() >= next_report:
+                    purge_dispatched()
+                    self._report(sent_since_report)
+                    sent_since_report = 0
+                    next_report = time.monotonic() + options['stats_every']
+                if not sent:
+                    time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def _report(self, sent):
+        lag = outbox_lag()
+        self.stdout.write(
+            f"sent={sent} pending={lag['pending']} lag_seconds={lag['lag_seconds']}")
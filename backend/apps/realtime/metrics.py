@@ -0,0 +1,23 @@
+"""Process-local WebSocket counters, reported by the readiness check.
+
+Each daphne process keeps its own; sum them across processes when
+monitoring. Consumers run on one event loop per process, so plain integer
+updates are enough.
+"""
+from collections import Counter
+
+_counters = Counter()
+
+
+def incr(name: str, amount: int = 1) -> None:
+    _counters[name] += amount
+
+
+def snapshot() -> dict:
+    return {
+        "connections": _counters["connections"],
+        "sse_connections": _counters["sse_connections"],
+        "evicted_idle": _counters["evicted_idle"],
+        "frames_dropped": _counters["frames_dropped"],
+        "overflow_resyncs": _counters["overflow_resyncs"],
+    }
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realtime', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['group', 'id'], name='outbox_replay_idx'),
+        ),
+    ]
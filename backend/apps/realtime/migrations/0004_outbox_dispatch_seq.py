@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realtime', '0003_channel_layer_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_seq', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='outboxevent',
+            name='outbox_replay_idx',
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='seq',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['group', 'seq'], name='outbox_replay_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+# TABLE FOR THE REALTIME OUTBOX
+class OutboxEvent(models.Model):
+    """A channel-layer message written in the same transaction as its change.
+
+    The relay (see ``apps.realtime.outbox.relay_batch``) sends pending rows
+    in id order and stamps ``dispatched_at`` afterwards, so delivery is
+    at-least-once. ``seq`` is assigned as the row is sent, not at insert:
+    ids follow insert order, and a transaction that commits late would land
+    behind a client's resume point and never be replayed.
+    """
+    group = models.CharField(max_length=100)
+    message = models.JSONField(encoder=DjangoJSONEncoder)
+    seq = models.BigIntegerField(null=True, blank=True, unique=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['id'],
+                name='outbox_pending_idx',
+                condition=Q(dispatched_at__isnull=True),
+            ),
+            models.Index(fields=['dispatched_at']),
+            models.Index(fields=['group', 'seq'], name='outbox_replay_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.group} #{self.id}"
+
+
+class OutboxSequence(models.Model):
+    """The last ``seq`` handed out, in a single row.
+
+    A relay locks the row for its whole batch, so only one relay sends at a
+    time and ``seq`` follows dispatch order.
+    """
+    last_seq = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"outbox seq {self.last_seq}"
+
+
+class ChannelLayerMessage(models.Model):
+    """A channel-layer payload too large for a Postgres ``NOTIFY``.
+
+    ``PostgresChannelLayer`` stores it here and notifies the row id; rows
+    are purged with the outbox once every listener has had time to read them.
+    """
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"channel layer message #{self.id}"
@@ -0,0 +1,227 @@
+"""Transactional outbox for channel-layer messages.
+
+Request code calls ``publish`` instead of ``group_send``: the message is a
+row in the caller's transaction, so a rollback takes it away and a slow
+channel layer never sits on the request path. After commit the relay sends
+pending rows in id order and only then marks them dispatched (at-least-once).
+
+``REALTIME_RELAY_MODE`` picks who drains the table:
+
+- ``thread``: commit wakes a relay thread in the web process (no broker).
+- ``celery``: commit kicks the ``relay_outbox`` task; beat re-runs it too.
+- ``worker``: nothing is kicked; ``manage.py relay_outbox`` polls.
+- ``inline``: the committing request drains it synchronously. Tests only:
+  it puts the channel layer back on the request path.
+
+Each sent message carries ``seq`` and is encoded once for all sockets (see
+``frames.with_frames``). ``seq`` is stamped in dispatch order by the one relay
+holding the ``OutboxSequence`` row, not taken from the id: ids are assigned
+at insert, so a transaction committing late would otherwise slip in behind a
+client's resume point. Dispatched rows are kept for ``DISPATCHED_RETENTION``,
+which makes the table the replay buffer sockets resume from (see
+``replay_events``).
+
+Sends go through ``publisher.group_send``, so a slow layer costs at most the
+publish timeout and a failing one trips the circuit breaker.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from . import publisher
+from .frames import with_frames
+from .models import ChannelLayerMessage, OutboxEvent, OutboxSequence
+
+logger = logging.getLogger(__name__)
+
+RELAY_BATCH_SIZE = 200
+DISPATCHED_RETENTION = timedelta(hours=1)
+# Listeners read an oversized layer payload as soon as they are notified.
+LAYER_MESSAGE_RETENTION = timedelta(minutes=5)
+# A client further behind than this reloads instead of replaying.
+REPLAY_LIMIT = 500
+
+
+def publish(group: str, message: dict) -> OutboxEvent:
+    """Queue ``message`` for ``group`` as part of the current transaction."""
+    event = OutboxEvent.objects.create(group=group, message=message)
+    transaction.on_commit(_kick_relay)
+    return event
+
+
+def publish_to(groups: list[str], message: dict) -> list[OutboxEvent]:
+    """Queue the same ``message`` for several groups with one insert."""
+    events = OutboxEvent.objects.bulk_create(
+        [OutboxEvent(group=group, message=message) for group in groups])
+    transaction.on_commit(_kick_relay)
+    return events
+
+
+def _kick_relay() -> None:
+    mode = settings.REALTIME_RELAY_MODE
+    try:
+        if mode == "thread":
+            _wake_relay_thread()
+        elif mode == "inline":
+            _relay_now()
+        elif mode == "celery":
+            from .tasks import relay_outbox
+
+            relay_outbox.delay()
+    except Exception:
+        # The rows are committed; the next relay run picks them up.
+        logger.exception("Outbox relay kick failed", extra={"mode": mode})
+
+
+def _relay_now() -> None:
+    if publisher.breaker.is_closed:
+        relay_pending()
+    if not publisher.breaker.is_closed:
+        # The layer is failing: stop hammering it and let the probe thread
+        # drain the outbox once it recovers.
+        publisher.relay_in_background(relay_pending)
+
+
+_relay_wakeup = threading.Event()
+_relay_thread_lock = threading.Lock()
+_relay_thread = None
+
+
+def _wake_relay_thread() -> None:
+    """Start (once) the process's relay thread and have it drain the outbox."""
+    global _relay_thread
+    with _relay_thread_lock:
+        if _relay_thread is None or not _relay_thread.is_alive():
+            _relay_thread = threading.Thread(
+                target=_relay_forever, name="realtime-outbox-relay", daemon=True)
+            _relay_thread.start()
+    _relay_wakeup.set()
+
+
+def _relay_forever() -> None:
+    while True:
+        _relay_wakeup.wait()
+        # Cleared before draining, so a commit during the drain runs another.
+        _relay_wakeup.clear()
+        try:
+            _relay_now()
+        except Exception:
+            logger.exception("Outbox relay thread failed")
+        finally:
+            connections.close_all()
+
+
+async def _send_in_order(layer, events: list[OutboxEvent]) -> tuple[int, Exception | None]:
+    for sent, event in enumerate(events):
+        try:
+            await publisher.group_send(layer, event.group, with_frames(event.message, event.seq))
+        except Exception as exc:
+            return sent, exc
+    return len(events), None
+
+
+def relay_batch(batch_size: int = RELAY_BATCH_SIZE) -> int:
+    """Send up to ``batch_size`` pending events. Returns how many were sent.
+
+    The ``OutboxSequence`` row is locked for the whole batch, so concurrent
+    relays take turns and ``seq`` increases in the order clients receive
+    events. A failure stops the batch to keep that order; the failed row is
+    retried on the next run and gets a fresh ``seq`` then.
+    """
+    layer = get_channel_layer()
+    if layer is None:
+        return 0
+
+    with transaction.atomic():
+        counter, _ = OutboxSequence.objects.select_for_update().get_or_create(pk=1)
+        events = list(
+            OutboxEvent.objects.filter(dispatched_at__isnull=True)
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        for offset, event in enumerate(events, start=1):
+            event.seq = counter.last_seq + offset
+        sent, error = async_to_sync(_send_in_order)(layer, events)
+        if sent:
+            now = timezone.now()
+            for event in events[:sent]:
+                event.dispatched_at = now
+                event.attempts += 1
+            OutboxEvent.objects.bulk_update(events[:sent], ["seq", "dispatched_at", "attempts"])
+            counter.last_seq += sent
+            counter.save(update_fields=["last_seq"])
+        # With the circuit open nothing was attempted; the row just waits.
+        if error is not None and not isinstance(error, publisher.CircuitOpen):
+            failed = events[sent]
+            OutboxEvent.objects.filter(pk=failed.pk).update(
+                attempts=F("attempts") + 1, last_error=str(error)[:1000])
+            logger.warning("Outbox relay failed on event %s: %s", failed.pk, error)
+    return sent
+
+
+def relay_pending(batch_size: int = RELAY_BATCH_SIZE) -> int:
+    """Drain the outbox until it is empty or a send fails."""
+    total = 0
+    while True:
+        sent = relay_batch(batch_size)
+        total += sent
+        if sent < batch_size:
+            return total
+
+
+def replay_events(groups: list[str], since: int, limit: int = REPLAY_LIMIT) -> list[dict] | None:
+    """Dispatched messages for ``groups`` after ``since``, oldest first.
+
+    Returns ``None`` when the gap cannot be replayed: the ``since`` event has
+    been purged (or never existed) or more than ``limit`` events were missed.
+    Events still pending are left to the relay.
+    """
+    if not OutboxEvent.objects.filter(seq=since).exists():
+        return None
+    rows = list(
+        OutboxEvent.objects.filter(group__in=groups, seq__gt=since)
+        .order_by("seq")
+        .values_list("seq", "message")[:limit + 1]
+    )
+    if len(rows) > limit:
+        return None
+    return [with_frames(message, seq) for seq, message in rows]
+
+
+def outbox_lag() -> dict:
+    """How far the relay is behind: pending rows and age of the oldest."""
+    stats = OutboxEvent.objects.filter(dispatched_at__isnull=True).aggregate(
+        pending=Count("id"), oldest=Min("created_at"))
+    oldest = stats["oldest"]
+    return {
+        "pending": stats["pending"],
+        "lag_seconds": round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0,
+    }
+
+
+def purge_dispatched(older_than: timedelta = DISPATCHED_RETENTION, batch_size: int = 1000) -> int:
+    cutoff = timezone.now() - older_than
+    deleted = 0
+    while True:
+        ids = list(
+            OutboxEvent.objects.filter(dispatched_at__lt=cutoff)
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += OutboxEvent.objects.filter(pk__in=ids).delete()[0]
+
+
+def purge_layer_messages(older_than: timedelta = LAYER_MESSAGE_RETENTION) -> int:
+    """Delete oversized ``PostgresChannelLayer`` payloads listeners have read."""
+    cutoff = timezone.now() - older_than
+    return ChannelLayerMessage.objects.filter(created_at__lt=cutoff).delete()[0]
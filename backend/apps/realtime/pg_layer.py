@@ -0,0 +1,293 @@
+"""Channel layer on PostgreSQL ``LISTEN``/``NOTIFY``.
+
+For deployments that have Postgres but no Redis and run several daphne
+processes. Every process ``LISTEN``s on one notify channel; ``group_send``
+is a single ``NOTIFY`` that each process delivers to its own members of the
+group, and ``send`` to a process-specific channel is delivered by the
+process that owns it. Group memberships and queues are process-local, so a
+process that dies takes its memberships with it and nothing expires.
+
+``NOTIFY`` is issued on Django's connection, so a send made inside a
+transaction (the outbox relay's) is delivered when that transaction commits.
+Payloads over ``MAX_NOTIFY_BYTES`` are stored in ``ChannelLayerMessage`` and
+the notification carries only the row id.
+
+The listening connection is a plain psycopg2 connection polled from the
+event loop with ``add_reader``, so receiving needs no thread. Stored
+payloads are fetched in a worker thread, in arrival order. A lost listener
+reconnects in the background with backoff. Notifications sent while it was
+down are gone, so every local group member is then sent ``RESYNC_MESSAGE``
+and its client reloads.
+"""
+import asyncio
+import base64
+import logging
+import random
+import string
+import time
+from collections import deque
+
+import msgpack
+import psycopg2
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from django.db import connections
+
+from .models import ChannelLayerMessage
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_BYTES = 7500
+_REF_PREFIX = "r:"
+RECONNECT_DELAY = 0.5
+RECONNECT_DELAY_MAX = 30.0
+RESYNC_MESSAGE = {"type": "send_resync", "data": {"type": "resync_required", "reason": "layer_reconnect"}}
+
+
+def encode_payload(envelope: dict) -> str:
+    return base64.b64encode(msgpack.packb(envelope)).decode("ascii")
+
+
+def decode_payload(payload) -> dict:
+    if isinstance(payload, memoryview):
+        payload = bytes(payload)
+    return msgpack.unpackb(base64.b64decode(payload))
+
+
+class PostgresChannelLayer(BaseChannelLayer):
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        expiry=60,
+        capacity=100,
+        channel_capacity=None,
+        notify_channel="realtime_layer",
+        database="default",
+        **kwargs,
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity, **kwargs)
+        self.notify_channel = notify_channel
+        self.database = database
+        self.process_id = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        self.channels = {}
+        self.groups = {}
+        self._listen_conn = None
+        self._listen_fd = None
+        self._listen_loop = None
+        self._listening = None
+        self._inbox = deque()
+        self._fetching = None
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        if self._is_local(channel):
+            self._deliver(channel, message, raise_when_full=True)
+            return
+        await self._notify({"c": channel, "m": message})
+
+    async def receive(self, channel):
+        self.require_valid_channel_name(channel)
+        await self._ensure_listening()
+        queue = self._queue(channel)
+        try:
+            while True:
+                expires_at, message = await queue.get()
+                if expires_at >= time.time():
+                    return message
+        finally:
+            if queue.empty():
+                self.channels.pop(channel, None)
+
+    async def new_channel(self, prefix="specific."):
+        await self._ensure_listening()
+        suffix = "".join(random.choice(string.ascii_letters) for _ in range(12))
+        return f"{prefix}.{self.process_id}!{suffix}"
+
+    async def flush(self):
+        self.channels = {}
+        self.groups = {}
+
+    async def close(self):
+        for task in (self._listening, self._fetching):
+            if task is not None and not task.done():
+                task.cancel()
+        self._close_listener()
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        await self._ensure_listening()
+        self.groups.setdefault(group, set()).add(channel)
+
+    async def group_discard(self, group, channel):
+        self.require_valid_group_name(group)
+        self.require_valid_channel_name(channel)
+        members = self.groups.get(group)
+        if members:
+            members.discard(channel)
+            if not members:
+                self.groups.pop(group, None)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_group_name(group)
+        await self._notify({"g": group, "m": message})
+
+    # Local delivery
+
+    def _is_local(self, channel: str) -> bool:
+        return "!" in channel and channel.split("!", 1)[0].endswith(f".{self.process_id}")
+
+    def _queue(self, channel: str) -> asyncio.Queue:
+        queue = self.channels.get(channel)
+        if queue is None:
+            queue = self.channels[channel] = asyncio.Queue(maxsize=self.get_capacity(channel))
+        return queue
+
+    def _deliver(self, channel: str, message: dict, raise_when_full=False) -> None:
+        try:
+            self._queue(channel).put_nowait((time.time() + self.expiry, message))
+        except asyncio.QueueFull:
+            if raise_when_full:
+                raise ChannelFull(channel)
+
+    def _dispatch(self, envelope: dict) -> None:
+        message = envelope["m"]
+        if "g" in envelope:
+            for channel in list(self.groups.get(envelope["g"], ())):
+                self._deliver(channel, dict(message))
+        elif self._is_local(envelope["c"]) or envelope["c"] in self.channels:
+            self._deliver(envelope["c"], message)
+
+    # Postgres
+
+    async def _notify(self, envelope: dict) -> None:
+        # Thread-sensitive so the NOTIFY joins the caller's transaction.
+        await sync_to_async(self._notify_sync)(encode_payload(envelope))
+
+    def _notify_sync(self, payload: str) -> None:
+        if len(payload) > MAX_NOTIFY_BYTES:
+            stored = ChannelLayerMessage.objects.using(self.database).create(payload=payload.encode("ascii"))
+            payload = f"{_REF_PREFIX}{stored.pk}"
+        with connections[self.database].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.notify_channel, payload])
+
+    def _connect_listener(self):
+        params = connections[self.database].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.set_session(autocommit=True)
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{self.notify_channel}"')
+        return conn
+
+    async def _ensure_listening(self):
+        loop = asyncio.get_running_loop()
+        if self._listen_loop is not loop or (self._listening.done() and self._listen_conn is None):
+            self._close_listener()
+            if self._listen_loop is not loop:
+                self._inbox.clear()
+                self._fetching = None
+            self._listen_loop = loop
+            self._listening = loop.create_task(self._start_listener(loop))
+        await asyncio.shield(self._listening)
+
+    async def _start_listener(self, loop):
+        conn = await loop.run_in_executor(None, self._connect_listener)
+        self._listen_conn, self._listen_fd = conn, conn.fileno()
+        loop.add_reader(self._listen_fd, self._on_readable)
+
+    async def _reconnect(self, loop):
+        # Consumers blocked in receive() never call _ensure_listening, so
+        # the listener has to come back on its own.
+        delay = RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._start_listener(loop)
+            except Exception as exc:
+                delay = min(delay * 2, RECONNECT_DELAY_MAX)
+                logger.warning("Channel layer LISTEN reconnect failed, retrying in %.1fs: %s", delay, exc)
+                continue
+            logger.info("Channel layer LISTEN connection restored")
+            self._announce_resync()
+            return
+
+    def _announce_resync(self):
+        members = set()
+        for channels in self.groups.values():
+            members.update(channels)
+        for channel in members:
+            queue = self._queue(channel)
+            if queue.full():
+                # The client reloads anyway; the backlog is superseded.
+                while not queue.empty():
+                    queue.get_nowait()
+            queue.put_nowait((time.time() + self.expiry, dict(RESYNC_MESSAGE)))
+
+    def _on_readable(self):
+        conn = self._listen_conn
+        try:
+            conn.poll()
+        except psycopg2.Error:
+            logger.exception("Channel layer LISTEN connection lost")
+            self._close_listener()
+            self._listening = self._listen_loop.create_task(self._reconnect(self._listen_loop))
+            return
+        self._inbox.extend(notify.payload for notify in conn.notifies)
+        conn.notifies[:] = []
+        self._drain_inbox()
+
+    def _drain_inbox(self):
+        while self._inbox:
+            payload = self._inbox[0]
+            if payload.startswith(_REF_PREFIX):
+                # Later messages wait behind the fetch to keep their order.
+                if self._fetching is None:
+                    self._fetching = self._listen_loop.create_task(self._fetch_stored(payload))
+                return
+            self._inbox.popleft()
+            self._dispatch_payload(payload)
+
+    async def _fetch_stored(self, ref: str):
+        try:
+            payload = await database_sync_to_async(self._load_stored, thread_sensitive=False)(
+                int(ref[len(_REF_PREFIX):]))
+        except Exception:
+            logger.exception("Could not load stored channel layer message %s", ref)
+            payload = None
+        self._inbox.popleft()
+        self._fetching = None
+        if payload is not None:
+            self._dispatch_payload(payload)
+        self._drain_inbox()
+
+    def _load_stored(self, pk: int):
+        return (
+            ChannelLayerMessage.objects.using(self.database)
+            .filter(pk=pk).values_list("payload", flat=True).first()
+        )
+
+    def _dispatch_payload(self, payload) -> None:
+        try:
+            self._dispatch(decode_payload(payload))
+        except Exception:
+            logger.exception("Dropping undecodable channel layer message")
+
+    def _close_listener(self):
+        conn, self._listen_conn = self._listen_conn, None
+        if conn is None:
+            return
+        loop = self._listen_loop
+        if loop is not None and not loop.is_closed():
+            # A broken connection no longer reports its fileno.
+            loop.remove_reader(self._listen_fd)
+        conn.close()
@@ -0,0 +1,160 @@
+"""Channel-layer sends with a timeout and a circuit breaker.
+
+A slow or unreachable Redis must not hold API requests: every send is cut
+off after ``REALTIME_PUBLISH_TIMEOUT`` seconds, and after
+``REALTIME_BREAKER_THRESHOLD`` failures in a row the breaker opens and sends
+fail at once with ``CircuitOpen``. Events stay in the outbox meanwhile. A
+background thread waits ``REALTIME_BREAKER_RESET`` seconds, probes the
+layer, and drains the outbox once a probe succeeds.
+
+State is per process and reported by the readiness check.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+PROBE_GROUP = "realtime_probe"
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.last_error = ""
+            self.counters = Counter()
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        """Whether a send may go ahead; while open, one trial per reset period."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and self.retry_in() == 0:
+                self.state = HALF_OPEN
+                return True
+            self.counters["short_circuited"] += 1
+            return False
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + settings.REALTIME_BREAKER_RESET - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counters["sent"] += 1
+            self.failures = 0
+            if self.state != CLOSED:
+                logger.info("Realtime publisher recovered; circuit closed")
+                self.state = CLOSED
+                self.opened_at = None
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self.counters["failed"] += 1
+            if isinstance(exc, TimeoutError):
+                self.counters["timeouts"] += 1
+            self.failures += 1
+            self.last_error = (str(exc) or type(exc).__name__)[:200]
+            if self.state == HALF_OPEN or self.failures >= settings.REALTIME_BREAKER_THRESHOLD:
+                if self.state != OPEN:
+                    self.counters["opened"] += 1
+                    logger.warning("Realtime publisher circuit opened: %s", exc)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "retry_in_seconds": round(self.retry_in(), 1) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+                "sent": self.counters["sent"],
+                "failed": self.counters["failed"],
+                "timeouts": self.counters["timeouts"],
+                "short_circuited": self.counters["short_circuited"],
+                "opened": self.counters["opened"],
+            }
+
+
+breaker = CircuitBreaker()
+
+
+async def group_send(layer, group: str, message: dict) -> None:
+    """``layer.group_send`` bounded by the publish timeout, through the breaker."""
+    if not breaker.allow():
+        raise CircuitOpen("channel layer circuit is open")
+    timeout = settings.REALTIME_PUBLISH_TIMEOUT
+    error = None
+    try:
+        await asyncio.wait_for(layer.group_send(group, message), timeout=timeout)
+    except asyncio.TimeoutError:
+        error = TimeoutError(f"group_send timed out after {timeout}s")
+        raise error from None
+    except BaseException as exc:
+        error = exc
+        raise
+    finally:
+        # Always settle the send, cancellation included: a half-open trial
+        # that never reports back would hold the circuit open for good.
+        if error is None:
+            breaker.record_success()
+        else:
+            breaker.record_failure(error)
+
+
+_probe_lock = threading.Lock()
+_probe_thread = None
+
+
+def relay_in_background(relay) -> None:
+    """Start (once) a thread that probes until the circuit closes, then runs ``relay``."""
+    global _probe_thread
+    with _probe_lock:
+        if _probe_thread is not None and _probe_thread.is_alive():
+            return
+        _probe_thread = threading.Thread(
+            target=_probe_until_closed, args=(relay,), name="realtime-publisher-probe", daemon=True)
+        _probe_thread.start()
+
+
+def _probe_until_closed(relay) -> None:
+    try:
+        while not breaker.is_closed:
+            time.sleep(breaker.retry_in() or settings.REALTIME_BREAKER_RESET)
+            try:
+                async_to_sync(group_send)(get_channel_layer(), PROBE_GROUP, {"type": "probe"})
+            except Exception as exc:
+                logger.info("Realtime publisher probe failed: %s", exc)
+        relay()
+    except Exception:
+        logger.exception("Background outbox relay failed")
+    finally:
+        connections.close_all()
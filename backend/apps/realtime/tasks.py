@@ -0,0 +1,22 @@
+import logging
+
+from celery import shared_task
+
+from .outbox import outbox_lag, purge_dispatched, purge_layer_messages, relay_pending
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="apps.realtime.tasks.relay_outbox")
+def relay_outbox():
+    sent = relay_pending()
+    lag = outbox_lag()
+    if lag["pending"]:
+        logger.info("relay_outbox: sent %s, %s pending, lag %.1fs",
+                    sent, lag["pending"], lag["lag_seconds"])
+    return {"sent": sent, **lag}
+
+
+@shared_task(name="apps.realtime.tasks.purge_outbox")
+def purge_outbox():
+    return {"deleted": purge_dispatched(), "layer_messages_deleted": purge_layer_messages()}
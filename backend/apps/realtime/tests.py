@@ -0,0 +1,355 @@
+import asyncio
+import socket
+import threading
+import time
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+import psycopg2
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from apps.realtime import frames, pg_layer, publisher
+from apps.realtime.frames import with_frames
+from apps.realtime.models import ChannelLayerMessage, OutboxEvent
+from apps.realtime.outbox import (
+    outbox_lag, publish, purge_dispatched, purge_layer_messages, relay_batch, replay_events)
+from apps.realtime.pg_layer import MAX_NOTIFY_BYTES, PostgresChannelLayer, decode_payload, encode_payload
+
+
+class RecordingLayer:
+    def __init__(self, fail_on=None):
+        self.sent = []
+        self.fail_on = fail_on
+
+    async def group_send(self, group, message):
+        if message.get("n") == self.fail_on:
+            raise ConnectionError("redis unavailable")
+        self.sent.append((group, message))
+
+
+class SlowLayer:
+    async def group_send(self, group, message):
+        await asyncio.sleep(5)
+
+
+class FakeListenConnection:
+    """Stands in for the psycopg2 LISTEN connection; a socketpair makes it pollable."""
+
+    def __init__(self):
+        self.sock, self.peer = socket.socketpair()
+        self.notifies = []
+        self.broken = False
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def poll(self):
+        self.sock.recv(1024)
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+    def deliver(self, payload):
+        self.notifies.append(SimpleNamespace(payload=payload))
+        self.peer.send(b"!")
+
+    def drop(self):
+        self.broken = True
+        self.peer.send(b"!")
+
+    def close(self):
+        self.sock.close()
+        self.peer.close()
+
+
+class OutboxTests(TestCase):
+    def setUp(self) -> None:
+        publisher.breaker.reset()
+        self.addCleanup(publisher.breaker.reset)
+
+    def _relay(self, layer):
+        with mock.patch("apps.realtime.outbox.get_channel_layer", return_value=layer):
+            return relay_batch()
+
+    def test_rolled_back_transaction_publishes_nothing(self) -> None:
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            publish("ticket_1", {"type": "send_ticket_update", "data": {}})
+            raise RuntimeError("boom")
+
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(REALTIME_RELAY_MODE="worker")
+    def test_relay_sends_in_order_and_marks_dispatched(self) -> None:
+        with self.captureOnCommitCallbacks(execute=True):
+            for n in range(3):
+                publish("ticket_1", {"type": "send_ticket_update", "n": n})
+
+        layer = RecordingLayer()
+        self.assertEqual(self._relay(layer), 3)
+        self.assertEqual([message["n"] for _, message in layer.sent], [0, 1, 2])
+        self.assertFalse(OutboxEvent.objects.filter(dispatched_at__isnull=True).exists())
+        self.assertEqual(self._relay(layer), 0)
+
+    def test_failed_send_is_retried_on_next_run(self) -> None:
+        for n in range(3):
+            publish("ticket_1", {"type": "send_ticket_update", "n": n})
+
+        self.assertEqual(self._relay(RecordingLayer(fail_on=1)), 1)
+        failed = OutboxEvent.objects.get(message__n=1)
+        self.assertIsNone(failed.dispatched_at)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("redis unavailable", failed.last_error)
+
+        layer = RecordingLayer()
+        self.assertEqual(self._relay(layer), 2)
+        self.assertEqual([message["n"] for _, message in layer.sent], [1, 2])
+
+    def test_thread_mode_relays_off_the_request_path(self) -> None:
+        relayed = threading.Event()
+        with override_settings(REALTIME_RELAY_MODE="thread"), \
+                mock.patch("apps.realtime.outbox._relay_now", side_effect=relayed.set) as relay_now:
+            with self.captureOnCommitCallbacks(execute=True):
+                publish("user_1", {"type": "send_notification"})
+                relay_now.assert_not_called()
+            self.assertTrue(relayed.wait(timeout=5))
+
+    def test_late_commit_is_replayed_after_the_resume_point(self) -> None:
+        # Ids follow insert order: a transaction that inserted first but
+        # committed last has the lower id and is relayed after its neighbour.
+        early = OutboxEvent.objects.create(pk=20, group="ticket_1", message={"type": "send_ticket_update", "n": 0})
+        self._relay(RecordingLayer())
+        late = OutboxEvent.objects.create(pk=10, group="ticket_1", message={"type": "send_ticket_update", "n": 1})
+        self._relay(RecordingLayer())
+
+        early.refresh_from_db()
+        late.refresh_from_db()
+        self.assertGreater(late.seq, early.seq)
+        replayed = replay_events(["ticket_1"], early.seq)
+        self.assertEqual([(e["n"], e["seq"]) for e in replayed], [(1, late.seq)])
+
+    def test_inline_mode_relays_on_commit(self) -> None:
+        layer = RecordingLayer()
+        with override_settings(REALTIME_RELAY_MODE="inline"), \
+                mock.patch("apps.realtime.outbox.get_channel_layer", return_value=layer), \
+                self.captureOnCommitCallbacks(execute=True):
+            event = publish("user_1", {"type": "send_notification", "n": 7})
+
+        event.refresh_from_db()
+        self.assertEqual(layer.sent, [("user_1", {"type": "send_notification", "n": 7, "seq": event.seq})])
+
+    def test_lag_and_purge(self) -> None:
+        old = publish("ticket_1", {"type": "send_ticket_update"})
+        OutboxEvent.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(seconds=30))
+        lag = outbox_lag()
+        self.assertEqual(lag["pending"], 1)
+        self.assertGreaterEqual(lag["lag_seconds"], 30)
+
+        OutboxEvent.objects.filter(pk=old.pk).update(dispatched_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(outbox_lag(), {"pending": 0, "lag_seconds": 0.0})
+        self.assertEqual(purge_dispatched(), 1)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+@override_settings(REALTIME_PUBLISH_TIMEOUT=0.05, REALTIME_BREAKER_THRESHOLD=2, REALTIME_BREAKER_RESET=60)
+class PublisherTests(TestCase):
+    def setUp(self) -> None:
+        publisher.breaker.reset()
+        self.addCleanup(publisher.breaker.reset)
+
+    def _relay(self, layer):
+        with mock.patch("apps.realtime.outbox.get_channel_layer", return_value=layer):
+            return relay_batch()
+
+    def test_slow_layer_is_cut_off_and_opens_the_circuit(self) -> None:
+        publish("ticket_1", {"type": "send_ticket_update"})
+
+        started = time.monotonic()
+        self.assertEqual(self._relay(SlowLayer()), 0)
+        self.assertEqual(self._relay(SlowLayer()), 0)
+        self.assertLess(time.monotonic() - started, 1)
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 2)
+        self.assertIn("timed out", event.last_error)
+        state = publisher.breaker.snapshot()
+        self.assertEqual(state["state"], publisher.OPEN)
+        self.assertEqual(state["timeouts"], 2)
+
+        # Open: fails fast without touching the layer or the row.
+        layer = RecordingLayer()
+        self.assertEqual(self._relay(layer), 0)
+        self.assertEqual(layer.sent, [])
+        self.assertEqual(OutboxEvent.objects.get().attempts, 2)
+        self.assertEqual(publisher.breaker.snapshot()["short_circuited"], 1)
+
+    def test_half_open_trial_closes_the_circuit(self) -> None:
+        for _ in range(2):
+            publisher.breaker.record_failure(ConnectionError("redis unavailable"))
+        publish("ticket_1", {"type": "send_ticket_update", "n": 1})
+
+        with override_settings(REALTIME_BREAKER_RESET=0):
+            self.assertEqual(self._relay(RecordingLayer()), 1)
+        self.assertTrue(publisher.breaker.is_closed)
+
+    def test_cancelled_trial_reopens_instead_of_sticking_half_open(self) -> None:
+        for _ in range(2):
+            publisher.breaker.record_failure(ConnectionError("redis unavailable"))
+
+        async def cancelled_trial():
+            send = asyncio.ensure_future(publisher.group_send(SlowLayer(), "ticket_1", {"type": "probe"}))
+            await asyncio.sleep(0)
+            send.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await send
+
+        with override_settings(REALTIME_BREAKER_RESET=0, REALTIME_PUBLISH_TIMEOUT=5):
+            async_to_sync(cancelled_trial)()
+            self.assertEqual(publisher.breaker.snapshot()["state"], publisher.OPEN)
+            self.assertEqual(publisher.breaker.snapshot()["last_error"], "CancelledError")
+            # The next trial is allowed and closes the circuit.
+            async_to_sync(publisher.group_send)(RecordingLayer(), "ticket_1", {"type": "probe", "n": 1})
+        self.assertTrue(publisher.breaker.is_closed)
+
+    def test_inline_relay_moves_to_background_while_open(self) -> None:
+        for _ in range(2):
+            publisher.breaker.record_failure(ConnectionError("redis unavailable"))
+
+        with override_settings(REALTIME_RELAY_MODE="inline"), \
+                mock.patch("apps.realtime.outbox.relay_pending") as relay_pending, \
+                mock.patch("apps.realtime.publisher.relay_in_background") as background, \
+                self.captureOnCommitCallbacks(execute=True):
+            publish("user_1", {"type": "send_notification"})
+
+        relay_pending.assert_not_called()
+        background.assert_called_once_with(relay_pending)
+
+
+class PostgresChannelLayerDispatchTests(SimpleTestCase):
+    def test_payload_round_trips_encoded_frames(self) -> None:
+        message = with_frames({"type": "send_ticket_update", "data": {"ticket_id": 1}}, 9)
+        envelope = {"g": "ticket_1", "m": message}
+        self.assertEqual(decode_payload(encode_payload(envelope)), envelope)
+
+    def test_group_messages_reach_only_local_members(self) -> None:
+        layer = PostgresChannelLayer(capacity=1)
+        member = f"specific..{layer.process_id}!abc"
+        layer.groups["ticket_1"] = {member}
+
+        layer._dispatch({"g": "ticket_1", "m": {"type": "send_ticket_update", "n": 1}})
+        layer._dispatch({"g": "ticket_2", "m": {"type": "send_ticket_update", "n": 2}})
+        # A full channel drops group messages instead of blocking the listener.
+        layer._dispatch({"g": "ticket_1", "m": {"type": "send_ticket_update", "n": 3}})
+        layer._dispatch({"c": "specific..other!xyz", "m": {"type": "send_ticket_update"}})
+
+        self.assertEqual(list(layer.channels), [member])
+        self.assertEqual(layer.channels[member].qsize(), 1)
+        self.assertEqual(layer.channels[member].get_nowait()[1]["n"], 1)
+
+    def test_resync_reaches_clients_as_resync_required(self) -> None:
+        frame = frames.client_frame(pg_layer.RESYNC_MESSAGE, frames.JSON, user_id=1)
+        self.assertEqual(frames.decode(frame, frames.JSON), {"type": "resync_required", "reason": "layer_reconnect"})
+
+    def test_lost_listener_reconnects_while_consumers_wait(self) -> None:
+        first, second = FakeListenConnection(), FakeListenConnection()
+        layer = PostgresChannelLayer()
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add("ticket_1", channel)
+            waiting = asyncio.ensure_future(layer.receive(channel))
+            await asyncio.sleep(0)
+            first.drop()
+            while layer._listen_conn is not second:
+                await asyncio.sleep(0.01)
+            second.deliver(encode_payload({"g": "ticket_1", "m": {"type": "send_ticket_update", "n": 1}}))
+            try:
+                return [await asyncio.wait_for(waiting, timeout=5),
+                        await asyncio.wait_for(layer.receive(channel), timeout=5)]
+            finally:
+                await layer.close()
+
+        with mock.patch.object(pg_layer, "RECONNECT_DELAY", 0.01), \
+                mock.patch.object(layer, "_connect_listener", side_effect=[first, second]), \
+                self.assertLogs("apps.realtime.pg_layer", "ERROR"):
+            messages = async_to_sync(scenario)()
+
+        # Whatever was notified while the listener was down is lost.
+        self.assertEqual(messages, [pg_layer.RESYNC_MESSAGE, {"type": "send_ticket_update", "n": 1}])
+
+    def test_stored_payload_is_fetched_off_the_loop_in_order(self) -> None:
+        conn = FakeListenConnection()
+        layer = PostgresChannelLayer()
+        stored = encode_payload({"g": "ticket_1", "m": {"type": "send_ticket_update", "n": 1}})
+        fetched_on = []
+
+        def load_stored(pk):
+            fetched_on.append(threading.get_ident())
+            return stored.encode("ascii")
+
+        async def scenario():
+            channel = await layer.new_channel()
+            await layer.group_add("ticket_1", channel)
+            conn.deliver("r:7")
+            conn.deliver(encode_payload({"g": "ticket_1", "m": {"type": "send_ticket_update", "n": 2}}))
+            try:
+                received = [await asyncio.wait_for(layer.receive(channel), timeout=5) for _ in range(2)]
+            finally:
+                await layer.close()
+            return threading.get_ident(), received
+
+        with mock.patch.object(layer, "_connect_listener", return_value=conn), \
+                mock.patch.object(layer, "_load_stored", side_effect=load_stored) as load:
+            loop_thread, received = async_to_sync(scenario)()
+
+        load.assert_called_once_with(7)
+        self.assertNotEqual(fetched_on, [loop_thread])
+        self.assertEqual([message["n"] for message in received], [1, 2])
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "LISTEN/NOTIFY is Postgres-only")
+class PostgresChannelLayerTests(TransactionTestCase):
+    def _run(self, coro_fn):
+        # Two layers stand in for two daphne processes.
+        async def run():
+            sender, receiver = PostgresChannelLayer(), PostgresChannelLayer()
+            try:
+                return await coro_fn(sender, receiver)
+            finally:
+                await sender.close()
+                await receiver.close()
+        return async_to_sync(run)()
+
+    def test_group_send_reaches_members_in_other_processes(self) -> None:
+        async def scenario(sender, receiver):
+            channel = await receiver.new_channel()
+            await receiver.group_add("ticket_1", channel)
+            await sender.group_send("ticket_1", {"type": "send_ticket_update", "n": 1})
+            return await asyncio.wait_for(receiver.receive(channel), timeout=5)
+
+        self.assertEqual(self._run(scenario), {"type": "send_ticket_update", "n": 1})
+
+    def test_send_reaches_channel_owned_by_other_process(self) -> None:
+        async def scenario(sender, receiver):
+            channel = await receiver.new_channel()
+            await sender.send(channel, {"type": "send_notification", "n": 2})
+            return await asyncio.wait_for(receiver.receive(channel), timeout=5)
+
+        self.assertEqual(self._run(scenario), {"type": "send_notification", "n": 2})
+
+    def test_large_payload_goes_through_table(self) -> None:
+        body = "x" * (MAX_NOTIFY_BYTES * 2)
+
+        async def scenario(sender, receiver):
+            channel = await receiver.new_channel()
+            await receiver.group_add("staff_notifications", channel)
+            await sender.group_send("staff_notifications", {"type": "send_notification", "body": body})
+            return await asyncio.wait_for(receiver.receive(channel), timeout=5)
+
+        self.assertEqual(self._run(scenario)["body"], body)
+        self.assertEqual(ChannelLayerMessage.objects.count(), 1)
+        ChannelLayerMessage.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(purge_layer_messages(), 1)
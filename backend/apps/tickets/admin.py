@@ -1,5 +1,9 @@
 from django.contrib import admin
+from django.db import transaction
+
+from .audit import record_ticket_changes
 from .models import Ticket, Category, TicketPriority
+from .rollup import record_ticket_changed, record_ticket_created, rollup_key
 
 
 @admin.register(Category)
@@ -36,4 +40,21 @@ class TicketAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if not change:
+                super().save_model(request, obj, form, change)
+                record_ticket_created(obj)
+                return
+            # The form has already applied its edits; the bucket the ticket
+            # was in comes from the values it was loaded with.
+            dirty = obj.get_dirty_fields()
+            old_rollup_key = rollup_key(obj)._replace(**{
+                field: dirty[field] for field in ("status", "category_id", "priority_id") if field in dirty
+            })
+            record_ticket_changes(obj, actor=request.user)
+            super().save_model(request, obj, form, change)
+            if obj.archived_at is None:
+                record_ticket_changed(obj, old_rollup_key)
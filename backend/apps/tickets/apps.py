@@ -7,4 +7,6 @@ class TicketsConfig(AppConfig):
 
     def ready(self):
         import apps.tickets.infra.signals  
+        # Celery autodiscovery looks for apps.tickets.tasks; register ours explicitly.
+        import apps.tickets.infra.tasks
 
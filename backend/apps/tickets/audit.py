@@ -0,0 +1,78 @@
+"""Audit trail for ticket status and priority changes.
+
+``record_ticket_changes`` is the only writer of ``TicketStatusHistory`` and
+of the matching ``ActivityLog`` rows. Call it with the ticket's pending edits
+still unsaved (it reads ``get_dirty_fields()``), inside the same transaction
+as ``ticket.save()``, so a transition is logged exactly once or not at all.
+"""
+from datetime import datetime
+
+from django.utils import timezone
+
+from .models import ActivityLog, Ticket, TicketPriority, TicketStatusHistory
+
+
+STATUS_LABELS = dict(Ticket.STATUS_CHOICES)
+
+
+def _priority_name(priority_id) -> str:
+    if priority_id is None:
+        return "None"
+    name = TicketPriority.objects.filter(pk=priority_id).values_list("name", flat=True).first()
+    return name or "None"
+
+
+def record_ticket_changes(ticket: Ticket, *, actor, at: datetime | None = None) -> None:
+    dirty = ticket.get_dirty_fields()
+    at = at or timezone.now()
+    history = []
+    activity = []
+
+    if "status" in dirty:
+        old_status, new_status = dirty["status"], ticket.status
+        history.append(TicketStatusHistory(
+            ticket=ticket,
+            old_status=old_status,
+            new_status=new_status,
+            changed_by=actor,
+            changed_at=at,
+        ))
+        activity.append(ActivityLog(
+            action="status_changed",
+            ticket=ticket,
+            performed_by=actor,
+            description=(
+                f"Status changed from {STATUS_LABELS.get(old_status, old_status)} "
+                f"to {STATUS_LABELS.get(new_status, new_status)}"
+            ),
+            old_value=old_status,
+            new_value=new_status,
+            created_at=at,
+        ))
+        if new_status == "resolved":
+            activity.append(ActivityLog(
+                action="resolved",
+                ticket=ticket,
+                performed_by=actor,
+                description="Ticket marked as resolved",
+                new_value=new_status,
+                created_at=at,
+            ))
+
+    if "priority_id" in dirty:
+        old_name = _priority_name(dirty["priority_id"])
+        new_name = ticket.priority.name if ticket.priority_id else "None"
+        activity.append(ActivityLog(
+            action="priority_changed",
+            ticket=ticket,
+            performed_by=actor,
+            description=f"Priority changed from {old_name} to {new_name}",
+            old_value=old_name,
+            new_value=new_name,
+            created_at=at,
+        ))
+
+    if history:
+        TicketStatusHistory.objects.bulk_create(history)
+    if activity:
+        ActivityLog.objects.bulk_create(activity)
@@ -0,0 +1,231 @@
+import csv
+import json
+import logging
+import tempfile
+import threading
+import zlib
+from datetime import date
+from typing import Callable, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import ExportJob, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (CSV header, queryset path) pairs, in column order.
+EXPORT_COLUMNS = (
+    ("ticket_number", "ticket_number"),
+    ("title", "title"),
+    ("status", "status"),
+    ("priority", "priority__name"),
+    ("category", "category__name"),
+    ("student_email", "student__email"),
+    ("building", "building"),
+    ("room_name", "room_name"),
+    ("created_at", "created_at"),
+    ("updated_at", "updated_at"),
+)
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line straight back."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def tickets_for_window(start: date, end: date) -> QuerySet:
+    return (
+        Ticket.objects.filter(archived_at__isnull=True)
+        .filter(created_at__date__gte=start, created_at__date__lte=end)
+        .order_by("-created_at")
+    )
+
+
+def _iter_row_chunks(tickets: QuerySet, chunk_size: int) -> Iterator[list[tuple]]:
+    rows = tickets.values_list(*(path for _, path in EXPORT_COLUMNS))
+    chunk = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _export_values(row: tuple) -> list:
+    *values, created_at, updated_at = row
+    return [value or "" for value in values] + [created_at.isoformat(), updated_at.isoformat()]
+
+
+def iter_ticket_csv(
+    tickets: QuerySet,
+    *,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    on_progress: Callable[[int], None] | None = None,
+) -> Iterator[bytes]:
+    """Yield the CSV export of ``tickets`` as UTF-8 byte chunks.
+
+    Rows are read through a server-side cursor ``chunk_size`` at a time and
+    only one chunk of CSV text is held in memory, whatever the window size.
+    ``on_progress`` receives the running row count after each chunk.
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow([header for header, _ in EXPORT_COLUMNS]).encode()
+
+    done = 0
+    for chunk in _iter_row_chunks(tickets, chunk_size):
+        yield "".join(writer.writerow(_export_values(row)) for row in chunk).encode()
+        done += len(chunk)
+        if on_progress:
+            on_progress(done)
+
+
+def iter_ticket_ndjson(
+    tickets: QuerySet,
+    *,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    on_progress: Callable[[int], None] | None = None,
+) -> Iterator[bytes]:
+    """Like ``iter_ticket_csv``, one JSON object per line."""
+    headers = [header for header, _ in EXPORT_COLUMNS]
+    done = 0
+    for chunk in _iter_row_chunks(tickets, chunk_size):
+        yield "".join(
+            json.dumps(dict(zip(headers, _export_values(row)))) + "\n" for row in chunk
+        ).encode()
+        done += len(chunk)
+        if on_progress:
+            on_progress(done)
+
+
+EXPORT_FORMATS = {
+    "csv": iter_ticket_csv,
+    "ndjson": iter_ticket_ndjson,
+}
+
+
+def accepts_gzip(request) -> bool:
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        # Sync-flush each chunk so the client sees bytes as soon as rows do.
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+async def _aiter_sync(chunks: Iterable[bytes]):
+    iterator = iter(chunks)
+    done = object()
+    while True:
+        # Stay on the request's DB thread so the server-side cursor survives.
+        chunk = await sync_to_async(next, thread_sensitive=True)(iterator, done)
+        if chunk is done:
+            break
+        yield chunk
+
+
+def response_stream(request, chunks: Iterable[bytes]):
+    """Adapt ``chunks`` for ``StreamingHttpResponse`` under WSGI or ASGI.
+
+    Under ASGI Django drains a synchronous iterator into a list before
+    sending anything, so hand it an async iterator that pulls one chunk at a
+    time instead.
+    """
+    if isinstance(request, ASGIRequest):
+        return _aiter_sync(chunks)
+    return chunks
+
+
+def export_filename(job: ExportJob) -> str:
+    return (
+        f"tickets-export-{job.start_date.isoformat()}-to-{job.end_date.isoformat()}"
+        f".{job.format}.gz"
+    )
+
+
+def run_export_job(job_id: int) -> None:
+    """Build the gzipped artifact for a queued ``ExportJob``.
+
+    Safe to call more than once for the same job: only the call that moves
+    it out of ``queued`` does any work.
+    """
+    claimed = ExportJob.objects.filter(pk=job_id, status="queued").update(
+        status="running", started_at=timezone.now())
+    if not claimed:
+        return
+    job = ExportJob.objects.get(pk=job_id)
+    jobs = ExportJob.objects.filter(pk=job_id)
+
+    tickets = tickets_for_window(job.start_date, job.end_date)
+    jobs.update(total_rows=tickets.count())
+
+    def report(done: int) -> None:
+        jobs.update(rows_processed=done)
+
+    try:
+        with tempfile.TemporaryFile() as artifact:
+            for chunk in gzip_chunks(EXPORT_FORMATS[job.format](tickets, on_progress=report)):
+                artifact.write(chunk)
+            artifact.seek(0)
+            job.file.save(export_filename(job), File(artifact), save=False)
+    except Exception as exc:
+        logger.exception("Export job %s failed", job_id)
+        jobs.update(status="failed", error=str(exc), finished_at=timezone.now())
+        return
+
+    jobs.update(status="succeeded", file=job.file.name, finished_at=timezone.now())
+
+
+def _run_export_job_in_thread(job_id: int) -> None:
+    try:
+        run_export_job(job_id)
+    finally:
+        connection.close()
+
+
+def enqueue_export_job(job: ExportJob) -> None:
+    """Start ``job`` once the current transaction commits.
+
+    Runs on Celery when a broker is configured, otherwise on a daemon
+    thread in this process (see ``EXPORT_JOBS_IN_PROCESS``).
+    """
+    def dispatch():
+        if settings.EXPORT_JOBS_IN_PROCESS:
+            threading.Thread(
+                target=_run_export_job_in_thread,
+                args=(job.pk,),
+                name=f"export-job-{job.pk}",
+                daemon=True,
+            ).start()
+        else:
+            from .infra.tasks import run_export_job_task
+
+            run_export_job_task.delay(job.pk)
+
+    transaction.on_commit(dispatch)
@@ -0,0 +1,219 @@
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import CharField, F, PositiveSmallIntegerField, TextField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .models import Ticket, TicketComment, TicketFeedback, TicketStatusHistory
+from .pagination import decode_payload, encode_payload
+from .utils import (
+    format_date,
+    format_timestamp,
+    history_action_for_status_change,
+    map_priority_for_history,
+    map_status_for_history,
+)
+
+
+# Event kinds double as the secondary sort key, so keep them stable.
+KIND_COMMENT = "comment"
+KIND_CREATED = "created"
+KIND_FEEDBACK = "feedback"
+KIND_STATUS = "status"
+
+# Every branch of the UNION ALL annotates exactly these columns, in this order.
+COLUMNS = (
+    "h_kind",
+    "h_id",
+    "h_at",
+    "h_ticket",
+    "h_number",
+    "h_title",
+    "h_ticket_status",
+    "h_priority",
+    "h_category",
+    "h_old",
+    "h_new",
+    "h_text",
+    "h_rating",
+    "h_actor",
+)
+STATUS_CHANGE_ACTIONS = ("updated", "resolved", "closed", "reopened")
+
+
+def encode_history_cursor(at: datetime, kind: str, event_id: int) -> str:
+    return encode_payload({"t": at.isoformat(), "k": kind, "id": event_id})
+
+
+def decode_history_cursor(cursor: str) -> tuple[datetime, str, int]:
+    data = decode_payload(cursor)
+    try:
+        return datetime.fromisoformat(data["t"]), str(data["k"]), int(data["id"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def _null(output_field):
+    # A bare NULL is untyped in Postgres and resolves to text in the first
+    # branch, which then fails to UNION with e.g. the smallint rating.
+    return Cast(Value(None), output_field=output_field)
+
+
+def _branch(qs, kind: str, *, ticket_prefix: str, at: str, cursor, limit: int, **columns):
+    """Annotate one event source with the shared column set.
+
+    ``ticket_prefix`` is the lookup path from the source model to its
+    ticket ("" for Ticket itself, "ticket__" for children).
+    """
+    qs = qs.filter(**{f"{ticket_prefix}archived_at__isnull": True})
+    if cursor is not None:
+        cursor_at, cursor_kind, cursor_id = cursor
+        # Rows sort by (at, kind, id) descending; kind is constant per branch,
+        # so the tuple comparison collapses to a plain range on ``at``.
+        if kind < cursor_kind:
+            qs = qs.filter(**{f"{at}__lte": cursor_at})
+        elif kind > cursor_kind:
+            qs = qs.filter(**{f"{at}__lt": cursor_at})
+        else:
+            qs = qs.filter(**{f"{at}__lte": cursor_at}).exclude(
+                **{at: cursor_at, "id__gte": cursor_id})
+
+    values = {
+        "h_kind": Value(kind, output_field=CharField()),
+        "h_id": F("id"),
+        "h_at": F(at),
+        "h_ticket": F(f"{ticket_prefix}id"),
+        "h_number": F(f"{ticket_prefix}ticket_number"),
+        "h_title": F(f"{ticket_prefix}title"),
+        "h_ticket_status": F(f"{ticket_prefix}status"),
+        "h_priority": F(f"{ticket_prefix}priority__name"),
+        "h_category": F(f"{ticket_prefix}category__name"),
+        "h_old": _null(CharField()),
+        "h_new": _null(CharField()),
+        "h_text": _null(TextField()),
+        "h_rating": _null(PositiveSmallIntegerField()),
+        "h_actor": _null(CharField()),
+    }
+    values.update(columns)
+    qs = qs.annotate(**{name: values[name] for name in COLUMNS}).values(*COLUMNS)
+    if connection.features.supports_slicing_ordering_in_compound:
+        # Let each branch stop after ``limit`` rows from its own index.
+        return qs.order_by(f"-{at}", "-id")[:limit]
+    return qs.order_by()
+
+
+def history_page(user, *, limit: int, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    """Return one page of the merged ticket timeline, newest first.
+
+    Status changes, comments, feedback and ticket creations are merged by a
+    single ``UNION ALL`` ordered in the database, so memory and latency depend
+    on ``limit`` rather than on how much history exists.
+    Raises ``ValueError`` for a malformed cursor.
+    """
+    decoded = decode_history_cursor(cursor) if cursor else None
+    fetch = limit + 1
+
+    tickets = Ticket.objects.all()
+    status_history = TicketStatusHistory.objects.all()
+    comments = TicketComment.objects.all()
+    if not user.is_staff:
+        tickets = tickets.filter(student=user)
+        status_history = status_history.filter(ticket__student=user)
+        comments = comments.filter(ticket__student=user)
+
+    branches = [
+        _branch(tickets, KIND_CREATED, ticket_prefix="", at="created_at",
+                cursor=decoded, limit=fetch),
+        _branch(
+            status_history, KIND_STATUS, ticket_prefix="ticket__", at="changed_at",
+            cursor=decoded, limit=fetch,
+            h_old=F("old_status"),
+            h_new=F("new_status"),
+            h_actor=F("changed_by__full_name"),
+        ),
+        _branch(
+            comments, KIND_COMMENT, ticket_prefix="ticket__", at="created_at",
+            cursor=decoded, limit=fetch,
+            h_text=F("message"),
+            h_actor=F("user__full_name"),
+        ),
+    ]
+    if user.is_staff:
+        branches.append(_branch(
+            TicketFeedback.objects.all(), KIND_FEEDBACK, ticket_prefix="ticket__",
+            at="created_at", cursor=decoded, limit=fetch,
+            h_text=F("comments"),
+            h_rating=F("rating"),
+            # Feedback always has an author; fall back to the email as before.
+            h_actor=Coalesce(
+                NullIf(F("student__full_name"), Value("")), F("student__email"),
+                output_field=CharField()),
+        ))
+
+    first, *rest = branches
+    rows = list(
+        first.union(*rest, all=True).order_by(
+            "-h_at", "-h_kind", "-h_id")[:fetch]
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_history_cursor(
+            last["h_at"], last["h_kind"], last["h_id"])
+    return [format_history_row(row) for row in rows], next_cursor
+
+
+def _describe(row: dict) -> tuple[str, str]:
+    kind = row["h_kind"]
+    if kind == KIND_CREATED:
+        return "created", "Ticket created"
+    if kind == KIND_STATUS:
+        return (
+            history_action_for_status_change(row["h_old"], row["h_new"]),
+            f"Status changed from {map_status_for_history(row['h_old'])} "
+            f"to {map_status_for_history(row['h_new'])}",
+        )
+    if kind == KIND_COMMENT:
+        message = row["h_text"] or ""
+        return "commented", f"Comment: {message[:100]}{'…' if len(message) > 100 else ''}"
+
+    stars = "⭐" * row["h_rating"]
+    description = f"Feedback submitted: {stars} ({row['h_rating']}/5)"
+    if row["h_text"]:
+        comments = row["h_text"]
+        description += f" - {comments[:80]}{'…' if len(comments) > 80 else ''}"
+    return "feedback", description
+
+
+def format_history_row(row: dict) -> dict:
+    action, description = _describe(row)
+    if action in STATUS_CHANGE_ACTIONS:
+        final_status = map_status_for_history(row["h_new"])
+    elif action == "created":
+        final_status = map_status_for_history("pending")
+    else:
+        final_status = map_status_for_history(row["h_ticket_status"])
+
+    at = row["h_at"]
+    kind = row["h_kind"]
+    if kind == KIND_CREATED:
+        event_id = f"created-{row['h_ticket']}-{at.isoformat()}"
+    else:
+        event_id = f"{kind}-{row['h_id']}"
+
+    return {
+        "id": event_id,
+        "ticketPk": row["h_ticket"],
+        "ticketId": row["h_number"],
+        "title": row["h_title"],
+        "action": action,
+        "description": description,
+        "timestamp": format_timestamp(at),
+        "date": format_date(at),
+        "status": final_status,
+        "priority": map_priority_for_history(row["h_priority"] or ""),
+        "category": row["h_category"],
+        "performedBy": row["h_actor"],
+    }
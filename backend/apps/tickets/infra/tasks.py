@@ -3,11 +3,12 @@ from datetime import timedelta
 
 from celery import shared_task
 from django.utils import timezone
-from django.contrib.auth import get_user_model
 
+from ..export import run_export_job
 from ..models import Ticket
-from apps.notifications.utils import create_in_app_notification
-from django.db.models import Count
+from ..numbering import ensure_sequence
+from ..rollup import entered_count, ticket_counts_by
+from apps.notifications.utils import create_staff_notifications
 
 logger = logging.getLogger(__name__)
 
@@ -30,31 +31,23 @@ def auto_escalate_tickets():
 @shared_task(name="apps.tickets.tasks.send_daily_summary")
 def send_daily_summary():
 
-    User = get_user_model()
-    today = timezone.now().date()
-    active = Ticket.objects.filter(archived_at__isnull=True)
-    created_today = active.filter(created_at__date=today).count()
-    resolved_today = active.filter(
-        status="resolved", updated_at__date=today).count()
-    pending = active.filter(status="pending").count()
+    today = timezone.localdate()
+    created_today = sum(ticket_counts_by("status", day=today).values())
+    resolved_today = entered_count("resolved", day=today)
+    pending = ticket_counts_by("status").get("pending", 0)
 
     message = (
         f"Daily summary: {created_today} created, {resolved_today} resolved, {pending} pending."
     )
-    for admin in User.objects.filter(is_staff=True):
-        try:
-            create_in_app_notification(
-                user=admin,
-                ticket_id=None,
-                event="daily_summary",
-                title="Daily ticket summary",
-                message=message,
-                notification_type="info",
-                action_url="",
-            )
-        except Exception as e:
-            logger.warning(
-                "send_daily_summary notification failed for user %s: %s", admin.id, e)
+    try:
+        create_staff_notifications(
+            event="daily_summary",
+            title="Daily ticket summary",
+            message=message,
+            notification_type="info",
+        )
+    except Exception as e:
+        logger.warning("send_daily_summary notifications failed: %s", e)
 
     logger.info("send_daily_summary: %s", message)
     return {"created_today": created_today, "resolved_today": resolved_today, "pending": pending}
@@ -62,36 +55,38 @@ def send_daily_summary():
 
 @shared_task(name="apps.tickets.tasks.send_weekly_report")
 def send_weekly_report():
-    User = get_user_model()
-    week_start = timezone.now() - timedelta(days=7)
-    active = Ticket.objects.filter(archived_at__isnull=True)
-    created = active.filter(created_at__gte=week_start).count()
-    resolved = active.filter(
-        status="resolved", updated_at__gte=week_start).count()
-    by_status = dict(
-        active.filter(created_at__gte=week_start)
-        .values("status")
-        .annotate(count=Count("id"))
-        .values_list("status", "count")
-    )
+    week_start = timezone.localdate() - timedelta(days=7)
+    by_status = ticket_counts_by("status", day__gte=week_start)
+    created = sum(by_status.values())
+    resolved = entered_count("resolved", day__gte=week_start)
 
     message = (
         f"Weekly report: {created} created, {resolved} resolved. By status: {by_status}"
     )
-    for admin in User.objects.filter(is_staff=True):
-        try:
-            create_in_app_notification(
-                user=admin,
-                ticket_id=None,
-                event="weekly_report",
-                title="Weekly ticket report",
-                message=message,
-                notification_type="info",
-                action_url="",
-            )
-        except Exception as e:
-            logger.warning(
-                "send_weekly_report notification failed for user %s: %s", admin.id, e)
+    try:
+        create_staff_notifications(
+            event="weekly_report",
+            title="Weekly ticket report",
+            message=message,
+            notification_type="info",
+        )
+    except Exception as e:
+        logger.warning("send_weekly_report notifications failed: %s", e)
 
     logger.info("send_weekly_report: %s", message)
     return {"created": created, "resolved": resolved, "by_status": by_status}
+
+
+@shared_task(name="apps.tickets.tasks.run_export_job")
+def run_export_job_task(job_id: int):
+    run_export_job(job_id)
+
+
+@shared_task(name="apps.tickets.tasks.ensure_ticket_number_sequences")
+def ensure_ticket_number_sequences():
+    # Create this year's and next year's sequences before the first ticket
+    # needs them, so allocation never has to run DDL.
+    year = timezone.localdate().year
+    for y in (year, year + 1):
+        ensure_sequence(y)
+    return {"years": [year, year + 1]}
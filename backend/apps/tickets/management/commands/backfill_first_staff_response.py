@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Min
+
+from apps.tickets.models import Ticket, TicketComment, TicketStatusHistory
+
+
+class Command(BaseCommand):
+    help = 'Fill Ticket.first_staff_response_at from staff comments and status changes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = Ticket.objects.filter(first_staff_response_at__isnull=True).order_by('id')
+        last_id = 0
+        updated = 0
+
+        while True:
+            ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            first_seen = {}
+            sources = (
+                TicketComment.objects.filter(ticket_id__in=ids, user__is_staff=True)
+                .values('ticket_id').annotate(at=Min('created_at')),
+                TicketStatusHistory.objects.filter(ticket_id__in=ids, changed_by__is_staff=True)
+                .values('ticket_id').annotate(at=Min('changed_at')),
+            )
+            for source in sources:
+                for row in source.order_by():
+                    current = first_seen.get(row['ticket_id'])
+                    if current is None or row['at'] < current:
+                        first_seen[row['ticket_id']] = row['at']
+
+            with transaction.atomic():
+                for ticket_id, at in first_seen.items():
+                    # Skip tickets that got a live response since the batch was read.
+                    updated += Ticket.objects.filter(
+                        id=ticket_id, first_staff_response_at__isnull=True,
+                    ).update(first_staff_response_at=at)
+
+        self.stdout.write(self.style.SUCCESS(f'✓ Backfilled {updated} ticket(s)'))
@@ -0,0 +1,82 @@
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ninja.responses import NinjaJSONEncoder
+
+from apps.tickets.models import Category, Ticket, TicketPriority
+from apps.tickets.schemas import TicketSchema
+from config.renderers import UJSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark ticket list serialization: validated + json vs trusted dicts + ujson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Tickets per simulated page')
+        parser.add_argument('--repeat', type=int, default=200, help='Pages rendered per path')
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        tickets = self._build_tickets(rows)
+        renderer = UJSONRenderer()
+
+        def current_path():
+            items = [TicketSchema.from_orm(t) for t in tickets]
+            data = {"items": [item.model_dump() for item in items], "limit": rows}
+            return json.dumps(data, cls=NinjaJSONEncoder)
+
+        def fast_path():
+            data = {"items": TicketSchema.dump_list(tickets), "limit": rows}
+            return renderer.render(None, data, response_status=200)
+
+        if json.loads(current_path()) != json.loads(fast_path()):
+            self.stderr.write(self.style.ERROR('Paths produced different JSON.'))
+            return
+
+        self.stdout.write(f'Rendering {repeat} pages of {rows} tickets...')
+        baseline = self._time(current_path, repeat)
+        fast = self._time(fast_path, repeat)
+        self.stdout.write(f'  validated + json : {baseline * 1000:8.3f} ms/page')
+        self.stdout.write(f'  trusted + ujson  : {fast * 1000:8.3f} ms/page')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {baseline / fast:.2f}x'))
+
+    @staticmethod
+    def _time(fn, repeat):
+        fn()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - started) / repeat
+
+    @staticmethod
+    def _build_tickets(rows):
+        # Unsaved instances so the benchmark measures serialization, not the database.
+        User = get_user_model()
+        now = timezone.now()
+        category = Category(id=1, name='Lighting & Electrical')
+        priority = TicketPriority(id=2, name='Medium', level=2, color_code='#3b82f6')
+        tickets = []
+        for i in range(1, rows + 1):
+            student = User(id=i, email=f'student{i}@usls.edu.ph', full_name=f'Student {i}')
+            ticket = Ticket(
+                id=i,
+                ticket_number=f'TKT-{i:05d}',
+                title=f'Flickering lights in room {i}',
+                description='The lights keep flickering during class hours.' * 3,
+                student=student,
+                category=category,
+                priority=priority,
+                building='Main',
+                room_name=f'M{i:03d}',
+                status='pending',
+                created_at=now,
+                updated_at=now,
+            )
+            ticket._prefetched_objects_cache = {'attachments_tickets': []}
+            ticket.comments_count = i % 7
+            ticket.feedback_rating = None if i % 3 else 4
+            tickets.append(ticket)
+        return tickets
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from apps.tickets.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard rollup table from tickets and status history'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write('Rebuilding ticket rollup...')
+        buckets = rebuild_rollup()
+        self.stdout.write(self.style.SUCCESS(f'✓ Rebuilt {buckets} rollup bucket(s)'))
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_alter_activitylog_created_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-created_at', '-id'], name='tickets_tic_created_821228_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_ticket_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticketcomment',
+            index=models.Index(fields=['-created_at', '-id'], name='tickets_tic_created_aa3494_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketfeedback',
+            index=models.Index(fields=['-created_at', '-id'], name='tickets_tic_created_58671e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketstatushistory',
+            index=models.Index(fields=['-changed_at', '-id'], name='tickets_tic_changed_448fe6_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_history_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('ticket_count', models.IntegerField(default=0)),
+                ('entered_count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.category')),
+                ('priority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tickets.ticketpriority')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'day'], name='tickets_tic_status_df86cc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status', 'category', 'priority'), name='unique_ticket_rollup_bucket')],
+            },
+        ),
+    ]
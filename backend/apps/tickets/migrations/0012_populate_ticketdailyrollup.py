@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def populate_rollup(apps, schema_editor):
+    Ticket = apps.get_model("tickets", "Ticket")
+    TicketStatusHistory = apps.get_model("tickets", "TicketStatusHistory")
+    TicketDailyRollup = apps.get_model("tickets", "TicketDailyRollup")
+
+    buckets = defaultdict(lambda: {"ticket_count": 0, "entered_count": 0})
+    tickets = Ticket.objects.filter(archived_at__isnull=True).order_by()
+    for row in (
+        tickets.annotate(day=TruncDate("created_at"))
+        .values("day", "status", "category_id", "priority_id")
+        .annotate(n=Count("id"))
+    ):
+        buckets[(row["day"], row["status"], row["category_id"], row["priority_id"])]["ticket_count"] += row["n"]
+        buckets[(row["day"], "pending", row["category_id"], row["priority_id"])]["entered_count"] += row["n"]
+
+    for row in (
+        TicketStatusHistory.objects.filter(ticket__archived_at__isnull=True)
+        .order_by()
+        .annotate(day=TruncDate("changed_at"))
+        .values("day", "new_status", "ticket__category_id", "ticket__priority_id")
+        .annotate(n=Count("id"))
+    ):
+        key = (row["day"], row["new_status"], row["ticket__category_id"], row["ticket__priority_id"])
+        buckets[key]["entered_count"] += row["n"]
+
+    TicketDailyRollup.objects.bulk_create(
+        [
+            TicketDailyRollup(
+                day=day, status=status, category_id=category_id, priority_id=priority_id, **counts)
+            for (day, status, category_id, priority_id), counts in buckets.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tickets", "0011_ticketdailyrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
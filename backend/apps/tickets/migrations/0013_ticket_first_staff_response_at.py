@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_populate_ticketdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='first_staff_response_at',
+            field=models.DateTimeField(blank=True, help_text='Set once, on the first staff comment or status change.', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('first_staff_response_at__isnull', False)), fields=['created_at', 'first_staff_response_at'], name='ticket_first_response_idx'),
+        ),
+    ]
@@ -2,7 +2,6 @@ from django.conf import settings
 from django.forms import ValidationError
 from django.utils import timezone
 from django.db import models
-from django.db import transaction
 
 
 # TABLE FOR CATEGORIES
@@ -58,19 +57,71 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
     archived_at = models.DateTimeField(null=True, blank=True, help_text="Set when ticket is soft-deleted (archived).")
+    first_staff_response_at = models.DateTimeField(
+        null=True, blank=True, help_text="Set once, on the first staff comment or status change.")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.mark_clean()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self.mark_clean(None if fields is None else self._attnames(fields))
+
+    def _attnames(self, names):
+        fields = (self._meta.get_field(name) for name in names)
+        return [f.attname for f in fields if f.concrete]
+
+    def mark_clean(self, attnames=None):
+        """Record current values of ``attnames`` (default: all) as persisted.
+
+        Deferred fields are absent from ``__dict__`` and stay untracked.
+        """
+        if attnames is None or not hasattr(self, "_loaded_values"):
+            self._loaded_values = {}
+        if attnames is None:
+            attnames = [f.attname for f in self._meta.concrete_fields]
+        for attname in attnames:
+            if attname in self.__dict__:
+                self._loaded_values[attname] = self.__dict__[attname]
+
+    def get_dirty_fields(self) -> dict:
+        """Map each field changed since the last load or save to its old value."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return {}
+        return {
+            attname: old
+            for attname, old in loaded.items()
+            if self.__dict__.get(attname, old) != old
+        }
 
     def save(self, *args, **kwargs):
         if not self.ticket_number:
-            with transaction.atomic():
-                last_ticket = Ticket.objects.select_for_update().order_by('id').last()
-                if last_ticket and last_ticket.id:
-                    new_id = last_ticket.id + 1
-                else:
-                    new_id = 1
-                self.ticket_number = f"TKT-{new_id:05d}"
+            from .numbering import allocate_ticket_number
+
+            self.ticket_number = allocate_ticket_number(self.created_at)
+
+        tracked = (
+            hasattr(self, "_loaded_values")
+            and not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        )
+        if tracked:
+            dirty = self.get_dirty_fields()
+            if not dirty:
+                return
+            kwargs["update_fields"] = list(dirty)
 
         super().save(*args, **kwargs)
 
+        update_fields = kwargs.get("update_fields")
+        self.mark_clean(None if update_fields is None else self._attnames(update_fields))
+
     def __str__(self):
         return f"{self.ticket_number} - {self.title}"
 
@@ -79,9 +130,45 @@ class Ticket(models.Model):
         indexes = [
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['student', 'status']),
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(
+                fields=['created_at', 'first_staff_response_at'],
+                name='ticket_first_response_idx',
+                condition=models.Q(first_staff_response_at__isnull=False),
+            ),
         ]
 
 
+# TABLE FOR DASHBOARD ROLLUPS
+class TicketDailyRollup(models.Model):
+    """Pre-aggregated ticket counts for the admin dashboard and reports.
+
+    ``ticket_count`` is the number of active tickets created on ``day`` that
+    currently sit in ``status``; ``entered_count`` is the number of tickets
+    that moved into ``status`` on ``day``. Maintained by ``apps.tickets.rollup``.
+    """
+    day = models.DateField()
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    priority = models.ForeignKey(TicketPriority, on_delete=models.CASCADE, related_name='+')
+    ticket_count = models.IntegerField(default=0)
+    entered_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'status', 'category', 'priority'],
+                name='unique_ticket_rollup_bucket',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.status} ({self.ticket_count})"
+
+
 #TABLE FOR TICKET COMMENTS
 class TicketComment(models.Model):
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='comments')
@@ -89,6 +176,11 @@ class TicketComment(models.Model):
     message = models.TextField(max_length=2000)
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
 
 #TABLE FOR TICKET STATUS HISTORY
 class TicketStatusHistory(models.Model):
@@ -98,6 +190,11 @@ class TicketStatusHistory(models.Model):
     changed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True)
     changed_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-changed_at', '-id']),
+        ]
+
 
 # TABLE FOR TICKET FEEDBACK
 class TicketFeedback(models.Model):
@@ -108,6 +205,11 @@ class TicketFeedback(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
     def save(self, *args, **kwargs):
         self.updated_at = timezone.now()
         super().save(*args, **kwargs)
@@ -175,10 +277,51 @@ class ActivityLog(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
+            # Keyset pagination order; see pagination.keyset_page.
+            models.Index(fields=['-created_at', '-id']),
             models.Index(fields=['ticket', '-created_at']),
             models.Index(fields=['action', '-created_at']),
             models.Index(fields=['performed_by', '-created_at']),
         ]
     
     def __str__(self):
-        return f"{self.get_action_display()} on {self.ticket.ticket_number} by {self.performed_by}"
\ No newline at end of file
+        return f"{self.get_action_display()} on {self.ticket.ticket_number} by {self.performed_by}"
+
+# TABLE FOR BACKGROUND EXPORTS
+class ExportJob(models.Model):
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='export_jobs')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+
+    # Ticket creation window, inclusive on both ends
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    rows_processed = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    file = models.FileField(upload_to='exports/', null=True, blank=True, help_text="Gzipped export, set when the job succeeds.")
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Export {self.id} ({self.format}, {self.status})"
@@ -0,0 +1,58 @@
+"""Ticket number allocation.
+
+Numbers look like ``TKT-2026-00042`` and restart every year. Each year draws
+from its own Postgres sequence, so concurrent ticket creations never wait on
+each other: ``nextval`` is non-transactional and takes no row locks.
+
+The sequences are created ahead of time by a beat task. A missing one is
+created on first use over a separate autocommit connection, never inside the
+caller's transaction: the DDL would otherwise hold its catalog lock until the
+request commits and queue every other creator behind it.
+"""
+from datetime import datetime
+
+from django.db import ProgrammingError, connection, transaction
+from django.utils import timezone
+
+
+def format_ticket_number(year: int, value: int) -> str:
+    # Zero-padded for sorting up to 99,999 a year; wider numbers still fit.
+    return f"TKT-{year}-{value:05d}"
+
+
+def sequence_name(year: int) -> str:
+    return f"tickets_ticket_number_{year}_seq"
+
+
+def ensure_sequence(year: int) -> None:
+    database = connection.Database
+    conn = database.connect(**connection.get_connection_params())
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS "{sequence_name(year)}"')
+    except database.IntegrityError:
+        # Another connection created it concurrently.
+        pass
+    finally:
+        conn.close()
+
+
+def _next_from_sequence(year: int) -> int:
+    name = sequence_name(year)
+    with connection.cursor() as cursor:
+        try:
+            with transaction.atomic():
+                cursor.execute("SELECT nextval(%s)", [name])
+                return cursor.fetchone()[0]
+        except ProgrammingError:
+            pass
+
+        ensure_sequence(year)
+        cursor.execute("SELECT nextval(%s)", [name])
+        return cursor.fetchone()[0]
+
+
+def allocate_ticket_number(at: datetime | None = None) -> str:
+    year = timezone.localdate(at).year if at else timezone.localdate().year
+    return format_ticket_number(year, _next_from_sequence(year))
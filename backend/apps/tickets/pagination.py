@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import QuerySet
+
+
+CURSOR_NEXT = "n"
+CURSOR_PREV = "p"
+
+
+def encode_payload(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_payload(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if not isinstance(data, dict):
+        raise ValueError("Invalid cursor.")
+    return data
+
+
+def encode_cursor(created_at: datetime, pk: int, direction: str = CURSOR_NEXT) -> str:
+    return encode_payload({"t": created_at.isoformat(), "id": pk, "d": direction})
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, str]:
+    data = decode_payload(cursor)
+    try:
+        created_at = datetime.fromisoformat(data["t"])
+        pk = int(data["id"])
+        direction = data.get("d", CURSOR_NEXT)
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        raise ValueError("Invalid cursor.")
+    return created_at, pk, direction
+
+
+def keyset_page(qs: QuerySet, *, limit: int, cursor: str | None) -> tuple[list, str | None, str | None]:
+    """Return one page of ``qs`` ordered newest first on ``(created_at, id)``.
+
+    Pages are located with a ``WHERE`` on the last seen key instead of
+    ``OFFSET``, so no ``COUNT(*)`` is needed and deep pages cost the same as
+    the first one. Raises ``ValueError`` for a malformed cursor.
+    """
+    direction = CURSOR_NEXT
+    if cursor:
+        created_at, pk, direction = decode_cursor(cursor)
+        if direction == CURSOR_NEXT:
+            qs = qs.filter(created_at__lte=created_at).exclude(
+                created_at=created_at, id__gte=pk)
+        else:
+            qs = qs.filter(created_at__gte=created_at).exclude(
+                created_at=created_at, id__lte=pk)
+
+    if direction == CURSOR_NEXT:
+        rows = list(qs.order_by("-created_at", "-id")[: limit + 1])
+    else:
+        rows = list(qs.order_by("created_at", "id")[: limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == CURSOR_PREV:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    first, last = rows[0], rows[-1]
+    if direction == CURSOR_NEXT:
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        has_next, has_prev = True, has_more
+
+    next_cursor = encode_cursor(
+        last.created_at, last.id, CURSOR_NEXT) if has_next else None
+    prev_cursor = encode_cursor(
+        first.created_at, first.id, CURSOR_PREV) if has_prev else None
+    return rows, next_cursor, prev_cursor
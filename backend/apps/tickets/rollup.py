@@ -0,0 +1,139 @@
+"""Incremental maintenance of ``TicketDailyRollup``.
+
+Callers run these inside the same transaction as the ticket write, so the
+rollup never disagrees with the tickets it summarizes. ``rebuild_rollup`` (and
+the ``rebuild_ticket_rollup`` command) recomputes everything from scratch for
+rows written outside the API and the Django admin, e.g. by raw SQL.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import NamedTuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Ticket, TicketDailyRollup, TicketStatusHistory
+
+
+class RollupKey(NamedTuple):
+    day: date
+    status: str
+    category_id: int
+    priority_id: int
+
+
+def rollup_key(ticket: Ticket) -> RollupKey:
+    return RollupKey(
+        day=timezone.localdate(ticket.created_at),
+        status=ticket.status,
+        category_id=ticket.category_id,
+        priority_id=ticket.priority_id,
+    )
+
+
+def _bump(key: RollupKey, *, ticket_delta: int = 0, entered_delta: int = 0) -> None:
+    lookup = key._asdict()
+    updates = {
+        "ticket_count": F("ticket_count") + ticket_delta,
+        "entered_count": F("entered_count") + entered_delta,
+    }
+    if TicketDailyRollup.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            TicketDailyRollup.objects.create(
+                **lookup, ticket_count=ticket_delta, entered_count=entered_delta)
+    except IntegrityError:
+        # Another writer created the bucket first; it exists now.
+        TicketDailyRollup.objects.filter(**lookup).update(**updates)
+
+
+def record_ticket_created(ticket: Ticket) -> None:
+    _bump(rollup_key(ticket), ticket_delta=1, entered_delta=1)
+
+
+def record_ticket_changed(ticket: Ticket, old_key: RollupKey) -> None:
+    """Move ``ticket`` from the bucket it was in before the write."""
+    new_key = rollup_key(ticket)
+    if new_key == old_key:
+        return
+    _bump(old_key, ticket_delta=-1)
+    _bump(new_key, ticket_delta=1)
+    if new_key.status != old_key.status:
+        _bump(new_key._replace(day=timezone.localdate()), entered_delta=1)
+
+
+def record_ticket_archived(ticket: Ticket) -> None:
+    """Take ``ticket`` out of the rollup the way ``rebuild_rollup`` leaves it out.
+
+    Besides its current bucket, that means every status it entered: pending on
+    the creation day, then one entry per status history row.
+    """
+    key = rollup_key(ticket)
+    deltas = defaultdict(lambda: {"ticket_delta": 0, "entered_delta": 0})
+    deltas[key]["ticket_delta"] -= 1
+    deltas[key._replace(status="pending")]["entered_delta"] -= 1
+    for row in (
+        TicketStatusHistory.objects.filter(ticket=ticket)
+        .order_by()
+        .annotate(day=TruncDate("changed_at"))
+        .values("day", "new_status")
+        .annotate(n=Count("id"))
+    ):
+        deltas[key._replace(day=row["day"], status=row["new_status"])]["entered_delta"] -= row["n"]
+    for bucket, delta in deltas.items():
+        _bump(bucket, **delta)
+
+
+def rebuild_rollup() -> int:
+    """Recompute the whole rollup table. Returns the number of buckets."""
+    buckets = defaultdict(lambda: {"ticket_count": 0, "entered_count": 0})
+    tickets = Ticket.objects.filter(archived_at__isnull=True).order_by()
+
+    for row in (
+        tickets.annotate(day=TruncDate("created_at"))
+        .values("day", "status", "category_id", "priority_id")
+        .annotate(n=Count("id"))
+    ):
+        key = RollupKey(row["day"], row["status"], row["category_id"], row["priority_id"])
+        buckets[key]["ticket_count"] += row["n"]
+        # Tickets are always created as pending.
+        buckets[key._replace(status="pending")]["entered_count"] += row["n"]
+
+    for row in (
+        TicketStatusHistory.objects.filter(ticket__archived_at__isnull=True)
+        .order_by()
+        .annotate(day=TruncDate("changed_at"))
+        .values("day", "new_status", "ticket__category_id", "ticket__priority_id")
+        .annotate(n=Count("id"))
+    ):
+        key = RollupKey(
+            row["day"], row["new_status"], row["ticket__category_id"], row["ticket__priority_id"])
+        buckets[key]["entered_count"] += row["n"]
+
+    with transaction.atomic():
+        TicketDailyRollup.objects.all().delete()
+        TicketDailyRollup.objects.bulk_create(
+            [TicketDailyRollup(**key._asdict(), **counts) for key, counts in buckets.items()],
+            batch_size=1000,
+        )
+    return len(buckets)
+
+
+def ticket_counts_by(field: str, **filters) -> dict:
+    """Active ticket counts grouped by a rollup column, e.g. ``"status"``."""
+    rows = (
+        TicketDailyRollup.objects.filter(**filters)
+        .values(field)
+        .annotate(n=Sum("ticket_count"))
+        .values_list(field, "n")
+    )
+    return {key: n for key, n in rows if n}
+
+
+def entered_count(status: str, **filters) -> int:
+    total = TicketDailyRollup.objects.filter(status=status, **filters).aggregate(
+        n=Sum("entered_count"))["n"]
+    return total or 0
@@ -1,7 +1,17 @@
 from typing import List, Optional, Literal
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
+from django.urls import reverse
 from ninja import Schema
+from ninja.responses import NinjaJSONEncoder
+
+_json_encoder = NinjaJSONEncoder()
+
+
+def format_json_datetime(value: datetime) -> str:
+    # Same string ninja's default renderer would produce for this datetime.
+    return _json_encoder.default(value)
+
 
 class UserSchema(BaseModel):
     id: int
@@ -11,6 +21,15 @@ class UserSchema(BaseModel):
     class Config:
         from_attributes = True
 
+    @staticmethod
+    def dump_trusted(user) -> dict:
+        return {
+            "id": user.id,
+            "email": user.email,
+            "name": getattr(user, "name", None),
+            "avatar": getattr(user, "avatar", None),
+        }
+
 class CategorySchema(BaseModel):
     id: int
     name: str
@@ -48,29 +67,35 @@ class TicketSchema(BaseModel):
     class Config:
         from_attributes = True
 
-    @classmethod
-    def from_orm(cls, ticket, request=None):
-        attachment_url = None
-        first = getattr(ticket, 'attachments_tickets', None)
-        if first and hasattr(first, 'first'):
-            first_attachment = first.first()
-            if first_attachment:
-                relative = first_attachment.file_path.url
-                if request is not None:
-                    attachment_url = request.build_absolute_uri(relative)
-                else:
-                    attachment_url = relative
-                    
-        has_feedback = False
-        feedback_rating = None
+    @staticmethod
+    def _attachment_url(ticket, request=None):
+        cache = getattr(ticket, "_prefetched_objects_cache", {})
+        if "attachments_tickets" in cache:
+            attachments = list(cache["attachments_tickets"])
+            first_attachment = attachments[0] if attachments else None
+        else:
+            first_attachment = ticket.attachments_tickets.first()
+        if not first_attachment:
+            return None
+        relative = first_attachment.file_path.url
+        if request is not None:
+            return request.build_absolute_uri(relative)
+        return relative
+
+    @staticmethod
+    def _feedback_rating(ticket):
+        # Prefer the ``feedback_rating`` annotation so list pages never touch
+        # the reverse one-to-one lazily.
+        if hasattr(ticket, "feedback_rating"):
+            return ticket.feedback_rating
         try:
-            has_feedback = bool(ticket.feedback)
-            if has_feedback:
-                feedback_rating = ticket.feedback.rating
+            return ticket.feedback.rating
         except AttributeError:
-            has_feedback = False
-            feedback_rating = None
-        
+            return None
+
+    @classmethod
+    def from_orm(cls, ticket, request=None):
+        feedback_rating = cls._feedback_rating(ticket)
         data = {
             "id":            ticket.id,
             "title":         ticket.title,
@@ -84,13 +109,57 @@ class TicketSchema(BaseModel):
             "created_at":    ticket.created_at,
             "updated_at":    ticket.updated_at,
             "ticket_number": ticket.ticket_number,
-            "attachment":    attachment_url,
+            "attachment":    cls._attachment_url(ticket, request),
             "comments_count": getattr(ticket, 'comments_count', 0),
-            "has_feedback":  has_feedback,
+            "has_feedback":  feedback_rating is not None,
             "feedback_rating": feedback_rating,
         }
         return cls.model_validate(data)
 
+    @classmethod
+    def dump_trusted(cls, ticket, request=None) -> dict:
+        """JSON-ready dict for a ticket read from our own database.
+
+        Skips pydantic validation entirely and pre-formats datetimes, so the
+        renderer never has to fall back to Python for this payload.
+        """
+        feedback_rating = cls._feedback_rating(ticket)
+        category = ticket.category
+        priority = ticket.priority
+        return {
+            "id":            ticket.id,
+            "title":         ticket.title,
+            "description":   ticket.description,
+            "student":       UserSchema.dump_trusted(ticket.student),
+            "category":      {"id": category.id, "name": category.name},
+            "priority":      {
+                "id": priority.id,
+                "name": priority.name,
+                "level": priority.level,
+                "color_code": priority.color_code,
+            },
+            "building":      ticket.building,
+            "room_name":     ticket.room_name,
+            "status":        ticket.status,
+            "created_at":    format_json_datetime(ticket.created_at),
+            "updated_at":    format_json_datetime(ticket.updated_at),
+            "ticket_number": ticket.ticket_number,
+            "attachment":    cls._attachment_url(ticket, request),
+            "comments_count": getattr(ticket, 'comments_count', 0),
+            "has_feedback":  feedback_rating is not None,
+            "feedback_rating": feedback_rating,
+        }
+
+    @classmethod
+    def dump_list(cls, tickets, request=None) -> list[dict]:
+        """Serialize a page of tickets loaded with ``_with_list_relations``.
+
+        Attachments and feedback are read from the prefetch cache and the
+        ``feedback_rating`` annotation only, so the page costs a fixed number
+        of queries regardless of its size.
+        """
+        return [cls.dump_trusted(ticket, request) for ticket in tickets]
+
 
 class TicketCreateSchema(Schema):
     title: str
@@ -190,6 +259,46 @@ class TicketHistoryItemSchema(Schema):
     category: str | None = None
     performedBy: str | None = None
 
+class ExportJobCreateSchema(Schema):
+    format: Literal["csv", "ndjson"] = "csv"
+    start_date: str | None = None
+    end_date: str | None = None
+
+class ExportJobSchema(Schema):
+    id: int
+    format: Literal["csv", "ndjson"]
+    status: Literal["queued", "running", "succeeded", "failed"]
+    start_date: date
+    end_date: date
+    rows_processed: int
+    total_rows: int | None = None
+    error: str | None = None
+    download_url: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @classmethod
+    def from_orm(cls, job, request):
+        download_url = None
+        if job.status == "succeeded" and job.file:
+            download_url = request.build_absolute_uri(
+                reverse("api-1.0.0:download_export_job", kwargs={"id": job.id}))
+        return cls(
+            id=job.id,
+            format=job.format,
+            status=job.status,
+            start_date=job.start_date,
+            end_date=job.end_date,
+            rows_processed=job.rows_processed,
+            total_rows=job.total_rows,
+            error=job.error or None,
+            download_url=download_url,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
 class DashboardMetricsSchema(Schema):
     title: str
     value: str
@@ -246,9 +355,26 @@ class ActivityLogSchema(Schema):
         }
         return cls.model_validate(data)
 
+    @staticmethod
+    def dump_trusted(activity_log) -> dict:
+        performed_by = activity_log.performed_by
+        return {
+            'id': activity_log.id,
+            'action': activity_log.action,
+            'ticket_number': activity_log.ticket.ticket_number,
+            'ticket_title': activity_log.ticket.title,
+            'performed_by': UserSchema.dump_trusted(performed_by) if performed_by else None,
+            'description': activity_log.description,
+            'old_value': activity_log.old_value,
+            'new_value': activity_log.new_value,
+            'created_at': format_json_datetime(activity_log.created_at),
+        }
+
 
 class ActivityLogListSchema(Schema):
     items: list[ActivityLogSchema]
-    total: int
+    total: int | None = None
     limit: int
-    offset: int
+    offset: int | None = None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
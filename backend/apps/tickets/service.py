@@ -5,6 +5,7 @@ from typing import Iterable
 from django.db import transaction
 
 from .models import Ticket, TicketAttachment, TicketComment, TicketFeedback
+from .rollup import record_ticket_created
 from .validation import validate_file
 
 
@@ -25,6 +26,7 @@ def create_ticket_with_attachments(*, ticket_data, student, category, priority,
             room_name=ticket_data.room_name,
             status="pending",
         )
+        record_ticket_created(ticket)
         for uploaded in attachments or []:
             TicketAttachment.objects.create(
                 ticket=ticket,
@@ -56,6 +58,8 @@ def create_comment_with_attachments(*, ticket: Ticket, user, message: str, attac
             user=user,
             message=message,
         )
+        if user.is_staff:
+            record_first_staff_response(ticket, at=comment.created_at)
         for uploaded in attachments or []:
             TicketAttachment.objects.create(
                 comment=comment,
@@ -66,6 +70,21 @@ def create_comment_with_attachments(*, ticket: Ticket, user, message: str, attac
     return comment
 
 
+def record_first_staff_response(ticket: Ticket, *, at) -> None:
+    """Stamp ``ticket.first_staff_response_at`` unless it is already set."""
+    if ticket.first_staff_response_at is not None:
+        return
+    # The filtered UPDATE keeps the earliest response when staff race.
+    updated = Ticket.objects.filter(
+        pk=ticket.pk, first_staff_response_at__isnull=True,
+    ).update(first_staff_response_at=at)
+    if updated:
+        ticket.first_staff_response_at = at
+        ticket.mark_clean(["first_staff_response_at"])
+    else:
+        ticket.refresh_from_db(fields=["first_staff_response_at"])
+
+
 def create_feedback_with_attachments(*, ticket: Ticket, student, rating: int, comments: str | None, attachments) -> TicketFeedback:
     with transaction.atomic():
         feedback = TicketFeedback.objects.create(
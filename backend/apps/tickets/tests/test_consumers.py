@@ -0,0 +1,247 @@
+import asyncio
+import json
+
+import msgpack
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+
+from apps.realtime.groups import STAFF_TICKETS_GROUP, owner_group, ticket_event_groups
+from apps.realtime.models import OutboxEvent
+from apps.realtime import metrics
+from apps.realtime.outbox import publish_to
+from apps.tickets.models import Category, Ticket, TicketPriority
+from apps.tickets.ws.consumers import IDLE_CLOSE_CODE, TicketNotificationConsumer
+
+
+User = get_user_model()
+
+
+@override_settings(REALTIME_RELAY_MODE="inline")
+class TicketConsumerRoutingTests(TransactionTestCase):
+    # The consumer reads through database_sync_to_async, which closes the
+    # connection a TestCase transaction would be held on.
+    def setUp(self) -> None:
+        self.student = User.objects.create_user(email="student@usls.edu.ph", password="x")
+        self.other_student = User.objects.create_user(email="other@usls.edu.ph", password="x")
+        self.staff = User.objects.create_user(email="admin@usls.edu.ph", password="x", is_staff=True)
+        self.ticket = Ticket.objects.create(
+            title="Flickering lights",
+            description="Room lights flicker",
+            building="Main",
+            room_name="101",
+            category=Category.objects.create(name="Electrical"),
+            priority=TicketPriority.objects.create(name="Medium", level=2, color_code="#f59e0b"),
+            student=self.student,
+        )
+
+    def _socket(self, user, path="/ws/tickets/", subprotocols=None) -> WebsocketCommunicator:
+        communicator = WebsocketCommunicator(
+            TicketNotificationConsumer.as_asgi(), path, subprotocols=subprotocols)
+        communicator.scope["user"] = user
+        return communicator
+
+    def test_ticket_event_reaches_only_interested_sockets_once(self) -> None:
+        async def scenario():
+            owner = self._socket(self.student)
+            other = self._socket(self.other_student)
+            staff = self._socket(self.staff)
+            for socket in (owner, other, staff):
+                connected, _ = await socket.connect()
+                self.assertTrue(connected)
+
+            # Redundant subscriptions must not cause duplicate deliveries.
+            for socket, topic in ((owner, "ticket:%d" % self.ticket.id),
+                                  (staff, "staff"),
+                                  (staff, "ticket:%d" % self.ticket.id)):
+                await socket.send_to(text_data=json.dumps({"action": "subscribe", "topic": topic}))
+                self.assertEqual((await socket.receive_json_from())["type"], "subscribed")
+
+            layer = get_channel_layer()
+            message = {"type": "send_ticket_update",
+                       "data": {"action": "updated", "ticket_id": self.ticket.id}}
+            for group in ticket_event_groups(self.ticket):
+                await layer.group_send(group, message)
+
+            for socket in (owner, staff):
+                self.assertEqual((await socket.receive_json_from())["ticket_id"], self.ticket.id)
+                self.assertTrue(await socket.receive_nothing())
+            self.assertTrue(await other.receive_nothing())
+
+            for socket in (owner, other, staff):
+                await socket.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_staff_firehose_delivers_own_ticket_events_once(self) -> None:
+        own_ticket = Ticket.objects.create(
+            title="Broken chair", description="Leg snapped", building="Main", room_name="102",
+            category=self.ticket.category, priority=self.ticket.priority, student=self.staff,
+        )
+
+        async def scenario():
+            staff = self._socket(self.staff)
+            await staff.connect()
+            layer = get_channel_layer()
+            message = {"type": "send_ticket_update",
+                       "data": {"action": "updated", "ticket_id": own_ticket.id}}
+
+            for action in ("subscribe", "unsubscribe"):
+                await staff.send_to(text_data=json.dumps({"action": action, "topic": "staff"}))
+                self.assertEqual((await staff.receive_json_from())["type"], f"{action}d")
+                for group in ticket_event_groups(own_ticket):
+                    await layer.group_send(group, message)
+                self.assertEqual((await staff.receive_json_from())["ticket_id"], own_ticket.id)
+                self.assertTrue(await staff.receive_nothing())
+            await staff.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_subscriptions_are_authorized(self) -> None:
+        async def scenario():
+            other = self._socket(self.other_student)
+            await other.connect()
+            for topic in ("staff", "ticket:%d" % self.ticket.id, "everything"):
+                await other.send_to(text_data=json.dumps({"action": "subscribe", "topic": topic}))
+                reply = await other.receive_json_from()
+                self.assertEqual(reply["type"], "subscription_error")
+                self.assertEqual(reply["topic"], topic)
+            await other.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_ticket_views_publish_to_targeted_groups(self) -> None:
+        self.client.force_login(self.student)
+        response = self.client.post(
+            f"/api/tickets/{self.ticket.id}/comments",
+            data={"message": "Still flickering"},
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+
+        groups = set(
+            OutboxEvent.objects.filter(message__type="send_comment_update")
+            .values_list("group", flat=True)
+        )
+        self.assertEqual(groups, set(ticket_event_groups(self.ticket)))
+        self.assertFalse(OutboxEvent.objects.filter(group="ticket_updates").exists())
+
+    def _publish_updates(self, count: int) -> list[dict[str, int]]:
+        """Publish ``count`` ticket events; returns each one's seq per group."""
+        # Relayed inline on commit, so these are dispatched when this returns.
+        batches = [
+            publish_to(ticket_event_groups(self.ticket),
+                       {"type": "send_ticket_update", "data": {"action": "updated", "n": n}})
+            for n in range(count)
+        ]
+        seqs = dict(OutboxEvent.objects.values_list("pk", "seq"))
+        return [{event.group: seqs[event.pk] for event in batch} for batch in batches]
+
+    def test_reconnect_with_since_replays_missed_events(self) -> None:
+        seqs = self._publish_updates(3)
+        group = owner_group(self.student.id)
+
+        async def scenario():
+            owner = self._socket(self.student, f"/ws/tickets/?since={seqs[0][group]}")
+            await owner.connect()
+            replayed = [await owner.receive_json_from() for _ in range(2)]
+            self.assertEqual([e["n"] for e in replayed], [1, 2])
+            self.assertEqual([e["seq"] for e in replayed], [s[group] for s in seqs[1:]])
+            done = await owner.receive_json_from()
+            self.assertEqual((done["type"], done["count"]), ("replay_complete", 2))
+
+            # A staff socket picks up the same gap when it subscribes.
+            staff = self._socket(self.staff)
+            await staff.connect()
+            await staff.send_to(text_data=json.dumps(
+                {"action": "subscribe", "topic": "staff", "since": seqs[1][STAFF_TICKETS_GROUP]}))
+            self.assertEqual((await staff.receive_json_from())["type"], "subscribed")
+            self.assertEqual((await staff.receive_json_from())["seq"], seqs[2][STAFF_TICKETS_GROUP])
+            self.assertEqual((await staff.receive_json_from())["type"], "replay_complete")
+
+            for socket in (owner, staff):
+                await socket.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_purged_gap_requires_resync(self) -> None:
+        since = self._publish_updates(2)[0][owner_group(self.student.id)]
+        OutboxEvent.objects.filter(seq=since).delete()
+
+        async def scenario():
+            owner = self._socket(self.student, f"/ws/tickets/?since={since}")
+            await owner.connect()
+            self.assertEqual((await owner.receive_json_from())["type"], "resync_required")
+            self.assertTrue(await owner.receive_nothing())
+            await owner.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_msgpack_subprotocol_gets_the_same_frame_as_json(self) -> None:
+        async def scenario():
+            json_socket = self._socket(self.student)
+            packed_socket = self._socket(self.student, subprotocols=["msgpack"])
+            await json_socket.connect()
+            connected, subprotocol = await packed_socket.connect()
+            self.assertEqual((connected, subprotocol), (True, "msgpack"))
+
+            await packed_socket.send_to(bytes_data=msgpack.packb(
+                {"action": "subscribe", "topic": "ticket:%d" % self.ticket.id}))
+            ack = msgpack.unpackb(await packed_socket.receive_from())
+            self.assertEqual(ack, {"type": "subscribed", "topic": "ticket:%d" % self.ticket.id})
+
+            seq = (await database_sync_to_async(self._publish_updates)(1))[0][owner_group(self.student.id)]
+            sent_json = json.loads(await json_socket.receive_from())
+            sent_packed = msgpack.unpackb(await packed_socket.receive_from())
+            self.assertEqual(sent_json, {"action": "updated", "n": 0, "seq": seq})
+            self.assertEqual(sent_packed, sent_json)
+
+            for socket in (json_socket, packed_socket):
+                await socket.disconnect()
+
+        async_to_sync(scenario)()
+
+    @override_settings(REALTIME_HEARTBEAT_INTERVAL=0.05, REALTIME_IDLE_TIMEOUT=0.2)
+    def test_heartbeat_keeps_live_sockets_and_evicts_silent_ones(self) -> None:
+        async def scenario():
+            evicted = metrics.snapshot()["evicted_idle"]
+            live = self._socket(self.student)
+            silent = self._socket(self.other_student)
+            await live.connect()
+            await silent.connect()
+
+            for _ in range(8):
+                self.assertEqual((await live.receive_json_from())["type"], "ping")
+                await live.send_json_to({"action": "pong"})
+
+            output = await silent.receive_output(timeout=1)
+            while output["type"] != "websocket.close":
+                output = await silent.receive_output(timeout=1)
+            self.assertEqual(output["code"], IDLE_CLOSE_CODE)
+            self.assertEqual(metrics.snapshot()["evicted_idle"], evicted + 1)
+            self.assertEqual(
+                get_channel_layer().groups.get(owner_group(self.other_student.id), {}), {})
+
+            await live.disconnect()
+            await silent.disconnect()
+
+        async_to_sync(scenario)()
+
+    def test_full_send_queue_is_replaced_by_one_resync(self) -> None:
+        consumer = TicketNotificationConsumer()
+        consumer.send_queue = asyncio.Queue(maxsize=2)
+        before = metrics.snapshot()
+        message = {"type": "send_ticket_update", "data": {"action": "updated"}}
+
+        async def overflow():
+            for seq in range(1, 4):
+                await consumer.send_ticket_update(dict(message, seq=seq))
+
+        async_to_sync(overflow)()
+        self.assertEqual(consumer.send_queue.qsize(), 1)
+        self.assertEqual(json.loads(consumer.send_queue.get_nowait())["type"], "resync_required")
+        after = metrics.snapshot()
+        self.assertEqual(after["frames_dropped"] - before["frames_dropped"], 3)
+        self.assertEqual(after["overflow_resyncs"] - before["overflow_resyncs"], 1)
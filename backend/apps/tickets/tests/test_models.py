@@ -1,8 +1,15 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
 
 from apps.tickets.models import Category, Ticket, TicketAttachment, TicketComment, TicketFeedback, TicketPriority
+from apps.tickets.numbering import allocate_ticket_number, sequence_name
 
 
 User = get_user_model()
@@ -34,6 +41,49 @@ class TicketModelTests(TestCase):
 
         self.assertTrue(ticket.ticket_number.startswith("TKT-"))
 
+    def test_ticket_numbers_are_sequential_within_a_year(self) -> None:
+        def create(created_at):
+            return Ticket.objects.create(
+                title="Projector issue",
+                description="Projector not turning on",
+                student=self.user,
+                category=self.category,
+                priority=self.priority,
+                building="Main",
+                room_name="M101",
+                created_at=created_at,
+            )
+
+        first = create(datetime(2031, 3, 1, tzinfo=dt_timezone.utc))
+        second = create(datetime(2031, 3, 2, tzinfo=dt_timezone.utc))
+        other_year = create(datetime(2032, 1, 1, tzinfo=dt_timezone.utc))
+
+        prefix, year, first_value = first.ticket_number.split("-")
+        self.assertEqual((prefix, year), ("TKT", "2031"))
+        self.assertEqual(second.ticket_number, f"TKT-2031-{int(first_value) + 1:05d}")
+        self.assertTrue(other_year.ticket_number.startswith("TKT-2032-"))
+
+    def test_ticket_tracks_dirty_fields_from_load_snapshot(self) -> None:
+        Ticket.objects.create(
+            title="Projector issue",
+            description="Projector not turning on",
+            student=self.user,
+            category=self.category,
+            priority=self.priority,
+            building="Main",
+            room_name="M101",
+        )
+        ticket = Ticket.objects.get()
+        self.assertEqual(ticket.get_dirty_fields(), {})
+
+        ticket.status = "in_progress"
+        ticket.room_name = "M101"
+        self.assertEqual(ticket.get_dirty_fields(), {"status": "pending"})
+
+        ticket.save()
+        self.assertEqual(ticket.get_dirty_fields(), {})
+        self.assertEqual(Ticket.objects.get().status, "in_progress")
+
     def test_attachment_requires_exactly_one_parent(self) -> None:
         ticket = Ticket.objects.create(
             title="AC issue",
@@ -83,3 +133,80 @@ class TicketModelTests(TestCase):
         feedback.save()
 
         self.assertGreaterEqual(feedback.updated_at, first_updated_at)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "ticket number sequences are Postgres-only")
+class TicketNumberConcurrencyTests(TransactionTestCase):
+    # A year no other test allocates in, so every test starts without its
+    # sequence and exercises first-use creation regardless of test order.
+    YEAR_AT = datetime(2099, 6, 1, tzinfo=dt_timezone.utc)
+
+    def _drop_sequence(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SEQUENCE IF EXISTS "{sequence_name(2099)}"')
+
+    def setUp(self) -> None:
+        self._drop_sequence()
+        self.addCleanup(self._drop_sequence)
+        self.user = User.objects.create_user(
+            email="student@usls.edu.ph",
+            password="StrongPassword123!",
+        )
+        self.category = Category.objects.create(name="Electrical")
+        self.priority = TicketPriority.objects.create(
+            name="Medium",
+            level=2,
+            color_code="#f59e0b",
+        )
+
+    def _create_tickets(self, count: int) -> list[str]:
+        try:
+            return [
+                Ticket.objects.create(
+                    title="Projector issue",
+                    description="Projector not turning on",
+                    student=self.user,
+                    category=self.category,
+                    priority=self.priority,
+                    building="Main",
+                    room_name="M101",
+                    created_at=self.YEAR_AT,
+                ).ticket_number
+                for _ in range(count)
+            ]
+        finally:
+            connection.close()
+
+    def test_concurrent_creations_get_unique_numbers(self) -> None:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            batches = list(pool.map(self._create_tickets, [10] * 8))
+
+        numbers = [number for batch in batches for number in batch]
+        self.assertEqual(len(numbers), 80)
+        self.assertEqual(len(set(numbers)), 80)
+
+    def test_open_transaction_does_not_block_allocation(self) -> None:
+        allocated = threading.Event()
+        release = threading.Event()
+
+        def hold_open_transaction():
+            try:
+                with transaction.atomic():
+                    allocate_ticket_number(self.YEAR_AT)
+                    allocated.set()
+                    release.wait(timeout=10)
+            finally:
+                connection.close()
+
+        holder = threading.Thread(target=hold_open_transaction)
+        holder.start()
+        try:
+            self.assertTrue(allocated.wait(timeout=10))
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL lock_timeout = '2s'")
+                # Would raise OperationalError if it queued behind the holder.
+                self.assertTrue(allocate_ticket_number(self.YEAR_AT).startswith("TKT-2099-"))
+        finally:
+            release.set()
+            holder.join()
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+
+from apps.realtime.groups import owner_group, ticket_event_groups
+from apps.realtime.outbox import publish_to
+from apps.tickets.models import Category, Ticket, TicketPriority
+from apps.tickets.ws.sse import event_stream
+
+
+User = get_user_model()
+
+
+def _parse_sse(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().splitlines())
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+@override_settings(REALTIME_RELAY_MODE="inline")
+class TicketEventStreamTests(TransactionTestCase):
+    # Replay reads through database_sync_to_async, which closes the
+    # connection a TestCase transaction would be held on.
+    def setUp(self) -> None:
+        self.student = User.objects.create_user(email="student@usls.edu.ph", password="x")
+        self.ticket = Ticket.objects.create(
+            title="Flickering lights",
+            description="Room lights flicker",
+            building="Main",
+            room_name="101",
+            category=Category.objects.create(name="Electrical"),
+            priority=TicketPriority.objects.create(name="Medium", level=2, color_code="#f59e0b"),
+            student=self.student,
+        )
+
+    def _publish(self, n: int) -> int:
+        # Relayed inline on commit; returns the owner group's seq.
+        events = publish_to(ticket_event_groups(self.ticket),
+                            {"type": "send_ticket_update", "data": {"action": "updated", "n": n}})
+        event = next(e for e in events if e.group == owner_group(self.student.id))
+        event.refresh_from_db()
+        return event.seq
+
+    def test_stream_resumes_from_last_event_id(self) -> None:
+        first = self._publish(0)
+        second = self._publish(1)
+        self.client.force_login(self.student)
+
+        response = self.client.get("/api/realtime/events", HTTP_LAST_EVENT_ID=str(first))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        async def read_two():
+            chunks = response.streaming_content
+            try:
+                return [await anext(chunks), await anext(chunks)]
+            finally:
+                await chunks.aclose()
+
+        retry, replayed = async_to_sync(read_two)()
+        self.assertTrue(retry.startswith(b"retry: "))
+        event = _parse_sse(replayed)
+        self.assertEqual(event["id"], str(second))
+        self.assertEqual(event["data"], {"action": "updated", "n": 1, "seq": second})
+
+    def test_rejects_topics_the_user_cannot_see(self) -> None:
+        self.client.force_login(self.student)
+        response = self.client.get("/api/realtime/events", {"topics": "staff"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_one_process_holds_thousands_of_streams(self) -> None:
+        streams = 2000
+        group = owner_group(self.student.id)
+
+        async def scenario():
+            layer = get_channel_layer()
+            generators = [event_stream({group}, user_id=self.student.id) for _ in range(streams)]
+            # The first chunk is yielded once the stream has joined its group.
+            await asyncio.gather(*(anext(g) for g in generators))
+            self.assertEqual(len(layer.groups[group]), streams)
+
+            await layer.group_send(group, {
+                "type": "send_ticket_update", "seq": 7,
+                "frames": {"json": '{"action":"updated","seq":7}'},
+            })
+            chunks = await asyncio.wait_for(
+                asyncio.gather(*(anext(g) for g in generators)), timeout=30)
+            self.assertEqual(set(chunks), {b'id: 7\ndata: {"action":"updated","seq":7}\n\n'})
+
+            await asyncio.gather(*(g.aclose() for g in generators))
+            self.assertFalse(layer.groups.get(group))
+
+        async_to_sync(scenario)()
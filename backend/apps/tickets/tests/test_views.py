@@ -1,11 +1,39 @@
+import gzip
 import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
 
+from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from ninja.responses import NinjaJSONEncoder
 from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
 
-from apps.tickets.models import Category, Ticket, TicketAttachment, TicketPriority
+from apps.realtime.models import OutboxEvent
+from apps.tickets.admin import TicketAdmin
+from apps.tickets.export import run_export_job
+from apps.tickets.models import (
+    ActivityLog,
+    Category,
+    Ticket,
+    TicketAttachment,
+    TicketComment,
+    TicketDailyRollup,
+    TicketFeedback,
+    TicketPriority,
+    TicketStatusHistory,
+)
+from apps.tickets.rollup import entered_count, rebuild_rollup, ticket_counts_by
+from apps.tickets.schemas import ActivityLogListSchema, TicketSchema
+from config.urls import api
 
 
 User = get_user_model()
@@ -304,3 +332,488 @@ class TicketViewsApiTests(TestCase):
 
         ticket = Ticket.objects.get(id=ticket_id)
         self.assertEqual(ticket.status, "closed")
+
+    def test_ticket_list_cursor_pagination_walks_all_pages(self) -> None:
+        created = [self._create_ticket() for _ in range(5)]
+        self._login(self.student)
+
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            url = "/api/tickets/?pagination=cursor&limit=2"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            self.assertNotIn("total", payload)
+            seen.extend(item["id"] for item in payload["items"])
+            pages += 1
+            cursor = payload["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(sorted(seen), sorted(t.id for t in created))
+        self.assertEqual(len(seen), len(set(seen)))
+
+        back = self.client.get(
+            f"/api/tickets/?cursor={payload['prev_cursor']}&limit=2").json()
+        self.assertEqual([item["id"] for item in back["items"]], seen[2:4])
+
+    def test_ticket_list_rejects_invalid_cursor(self) -> None:
+        self._login(self.student)
+
+        response = self.client.get("/api/tickets/?cursor=not-a-cursor")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_ticket_list_offset_pagination_still_returns_total(self) -> None:
+        self._create_ticket()
+        self._create_ticket()
+        self._login(self.student)
+
+        response = self.client.get("/api/tickets/?limit=1&offset=1")
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["total"], 2)
+        self.assertEqual(len(payload["items"]), 1)
+
+    def test_ticket_list_query_count_does_not_grow_with_page_size(self) -> None:
+        png_bytes = (
+            b"\x89PNG\r\n\x1a\n"
+            b"\x00\x00\x00\rIHDR"
+            b"\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00"
+            b"\x90wS\xde\x00\x00\x00\nIDATx\x9cc\x00\x01\x00\x00\x05\x00\x01"
+            b"\x0d\n-\xb4\x00\x00\x00\x00IEND\xaeB`\x82"
+        )
+        for index in range(10):
+            ticket = self._create_ticket(status="closed")
+            TicketAttachment.objects.create(
+                ticket=ticket,
+                uploaded_by=self.student,
+                file_path=SimpleUploadedFile(
+                    f"t{index}.png", png_bytes, content_type="image/png"),
+                file_type="image/png",
+            )
+            if index % 2:
+                TicketFeedback.objects.create(
+                    ticket=ticket, student=self.student, rating=4)
+        self._login(self.admin)
+
+        counts = {}
+        for limit in (2, 10):
+            for url in (f"/api/tickets/?limit={limit}", f"/api/tickets/community?limit={limit}"):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()["items"]), limit)
+                counts[(url.split("?")[0], limit)] = len(ctx.captured_queries)
+
+        self.assertEqual(counts[("/api/tickets/", 2)],
+                         counts[("/api/tickets/", 10)])
+        self.assertEqual(counts[("/api/tickets/community", 2)],
+                         counts[("/api/tickets/community", 10)])
+
+        items = self.client.get("/api/tickets/?limit=10").json()["items"]
+        self.assertTrue(all(item["attachment"] for item in items))
+        self.assertEqual(sum(item["has_feedback"] for item in items), 5)
+
+    def test_ticket_list_fast_path_matches_validated_schema(self) -> None:
+        ticket = self._create_ticket()
+        self._login(self.student)
+
+        response = self.client.get("/api/tickets/")
+
+        self.assertEqual(response.status_code, 200)
+        expected = json.loads(json.dumps(
+            TicketSchema.from_orm(ticket, response.wsgi_request).model_dump(),
+            cls=NinjaJSONEncoder,
+        ))
+        self.assertEqual(response.json()["items"][0], expected)
+
+    def test_activity_list_fast_path_keeps_its_response_schema(self) -> None:
+        ticket = self._create_ticket()
+        self._login(self.admin)
+        self.client.patch(
+            f"/api/tickets/{ticket.id}/admin",
+            data=json.dumps({"status": "in_progress"}),
+            content_type="application/json",
+        )
+
+        response = self.client.get("/api/tickets/activity/")
+
+        self.assertEqual(response.status_code, 200)
+        page = ActivityLogListSchema.model_validate(response.json())
+        self.assertEqual([item.action for item in page.items], ["status_changed", "created"])
+        operation = api.get_openapi_schema()["paths"]["/api/tickets/activity/"]["get"]
+        self.assertEqual(
+            operation["responses"][200]["content"]["application/json"]["schema"],
+            {"$ref": "#/components/schemas/ActivityLogListSchema"},
+        )
+
+    def test_history_pages_merged_timeline_with_cursor_header(self) -> None:
+        self._login(self.student)
+        create_response = self.client.post(
+            "/api/tickets/",
+            data={
+                "title": "Broken window",
+                "description": "Window latch is broken",
+                "category": str(self.category.id),
+                "building": "Main",
+                "room_name": "M120",
+            },
+        )
+        ticket_id = create_response.json()["id"]
+        self.client.post(
+            f"/api/tickets/{ticket_id}/comments", data={"message": "Please hurry"})
+
+        self._login(self.admin)
+        self.client.patch(
+            f"/api/tickets/{ticket_id}/admin",
+            data=json.dumps({"status": "resolved"}),
+            content_type="application/json",
+        )
+        self._login(self.student)
+        self.client.post(
+            f"/api/tickets/{ticket_id}/feedback/", data={"rating": "5"})
+
+        response = self.client.get("/api/tickets/history?limit=2")
+        self.assertEqual(response.status_code, 200)
+        first_page = response.json()
+        self.assertEqual(len(first_page), 2)
+        cursor = response["X-Next-Cursor"]
+
+        rest = self.client.get(f"/api/tickets/history?limit=10&cursor={cursor}")
+        self.assertEqual(rest.status_code, 200)
+        self.assertNotIn("X-Next-Cursor", rest)
+
+        events = first_page + rest.json()
+        self.assertEqual(
+            sorted(e["action"] for e in events),
+            ["closed", "commented", "created", "resolved"],
+        )
+        self.assertEqual(len({e["id"] for e in events}), len(events))
+        timestamps = [e["timestamp"] for e in events]
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+
+        self._login(self.admin)
+        staff_events = self.client.get("/api/tickets/history").json()
+        feedback = next(e for e in staff_events if e["action"] == "feedback")
+        # No full name on the account, so the author shows as their email.
+        self.assertEqual(feedback["performedBy"], self.student.email)
+
+    def test_history_rejects_invalid_cursor(self) -> None:
+        self._login(self.student)
+
+        response = self.client.get("/api/tickets/history?cursor=bogus")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_dashboard_rollup_tracks_writes_and_matches_rebuild(self) -> None:
+        self._login(self.student)
+        ticket_ids = []
+        for room in ("M301", "M302", "M303"):
+            response = self.client.post(
+                "/api/tickets/",
+                data={
+                    "title": "Broken fan",
+                    "description": "Ceiling fan does not spin",
+                    "category": str(self.category.id),
+                    "building": "Main",
+                    "room_name": room,
+                },
+            )
+            ticket_ids.append(response.json()["id"])
+        self.client.delete(f"/api/tickets/{ticket_ids[2]}")
+
+        self._login(self.admin)
+        self.client.patch(
+            f"/api/tickets/{ticket_ids[0]}/admin",
+            data=json.dumps({"status": "in_progress", "priority": self.priority_low.id}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(ticket_counts_by("status"), {"pending": 1, "in_progress": 1})
+        incremental = ticket_counts_by("priority_id")
+
+        response = self.client.get("/api/tickets/stats/dashboard")
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["status_breakdown"], {"pending": 1, "in_progress": 1})
+        self.assertEqual(payload["category_breakdown"], {"Electrical": 2})
+        self.assertEqual(payload["volume"][-1]["value"], 2)
+
+        rebuild_rollup()
+        self.assertEqual(ticket_counts_by("status"), {"pending": 1, "in_progress": 1})
+        self.assertEqual(ticket_counts_by("priority_id"), incremental)
+
+    def _rollup_rows(self) -> set[tuple]:
+        return set(
+            TicketDailyRollup.objects.exclude(ticket_count=0, entered_count=0).values_list(
+                "day", "status", "category_id", "priority_id", "ticket_count", "entered_count")
+        )
+
+    def test_archiving_a_ticket_leaves_the_rollup_as_rebuilt(self) -> None:
+        kept = self._create_ticket()
+        archived = self._create_ticket()
+        rebuild_rollup()
+
+        self._login(self.admin)
+        for ticket in (kept, archived):
+            self.client.patch(
+                f"/api/tickets/{ticket.id}/admin",
+                data=json.dumps({"status": "in_progress"}),
+                content_type="application/json",
+            )
+        self.assertEqual(self.client.delete(f"/api/tickets/{archived.id}").status_code, 204)
+
+        incremental = self._rollup_rows()
+        rebuild_rollup()
+        self.assertEqual(incremental, self._rollup_rows())
+
+    def test_admin_site_edits_keep_the_rollup_current(self) -> None:
+        ticket = self._create_ticket()
+        rebuild_rollup()
+
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.status = "in_progress"
+        ticket.priority = self.priority_low
+        TicketAdmin(Ticket, admin.site).save_model(
+            SimpleNamespace(user=self.admin), ticket, form=None, change=True)
+
+        self.assertEqual(ticket_counts_by("status"), {"in_progress": 1})
+        self.assertEqual(ticket_counts_by("priority_id"), {self.priority_low.id: 1})
+        self.assertEqual(entered_count("in_progress"), 1)
+
+    def test_first_staff_response_is_stamped_once_and_drives_dashboard(self) -> None:
+        commented = self._create_ticket()
+        patched = self._create_ticket()
+
+        self._login(self.student)
+        self.client.post(f"/api/tickets/{commented.id}/comments", data={"message": "Any update?"})
+        commented.refresh_from_db()
+        self.assertIsNone(commented.first_staff_response_at)
+
+        self._login(self.admin)
+        self.client.post(f"/api/tickets/{commented.id}/comments", data={"message": "On it."})
+        commented.refresh_from_db()
+        first_response = commented.first_staff_response_at
+        self.assertIsNotNone(first_response)
+
+        self.client.post(f"/api/tickets/{commented.id}/comments", data={"message": "Still on it."})
+        self.client.patch(
+            f"/api/tickets/{commented.id}/admin",
+            data=json.dumps({"status": "in_progress"}),
+            content_type="application/json",
+        )
+        commented.refresh_from_db()
+        self.assertEqual(commented.first_staff_response_at, first_response)
+
+        self.client.patch(
+            f"/api/tickets/{patched.id}/admin",
+            data=json.dumps({"status": "in_progress"}),
+            content_type="application/json",
+        )
+        patched.refresh_from_db()
+        self.assertIsNotNone(patched.first_staff_response_at)
+
+        response = self.client.get("/api/tickets/stats/dashboard")
+        self.assertEqual(response.status_code, 200)
+        metric = next(m for m in response.json()["metrics"] if m["title"] == "Response Time")
+        self.assertTrue(metric["value"].endswith(" hrs"))
+
+    def test_backfill_first_staff_response_uses_earliest_staff_event(self) -> None:
+        ticket = self._create_ticket()
+        untouched = self._create_ticket()
+        base = timezone.now()
+        TicketComment.objects.create(ticket=ticket, user=self.student, message="Hello")
+        TicketComment.objects.filter(ticket=ticket).update(created_at=base - timedelta(hours=3))
+        staff_comment = TicketComment.objects.create(ticket=ticket, user=self.admin, message="Checking")
+        TicketComment.objects.filter(pk=staff_comment.pk).update(created_at=base - timedelta(hours=1))
+        TicketStatusHistory.objects.create(
+            ticket=ticket, old_status="pending", new_status="in_progress",
+            changed_by=self.admin, changed_at=base - timedelta(hours=2),
+        )
+
+        call_command("backfill_first_staff_response", batch_size=1, stdout=StringIO())
+
+        ticket.refresh_from_db()
+        untouched.refresh_from_db()
+        self.assertEqual(ticket.first_staff_response_at, base - timedelta(hours=2))
+        self.assertIsNone(untouched.first_staff_response_at)
+
+    def test_dashboard_csv_export_streams_and_negotiates_gzip(self) -> None:
+        for _ in range(3):
+            self._create_ticket()
+        self._login(self.admin)
+
+        response = self.client.get("/api/tickets/stats/dashboard/export-csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertNotIn("Content-Encoding", response)
+        plain = b"".join(response.streaming_content).decode()
+        lines = plain.strip().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "ticket_number")
+        self.assertEqual(len(lines), 4)
+        self.assertIn("student@usls.edu.ph", lines[1])
+
+        response = self.client.get(
+            "/api/tickets/stats/dashboard/export-csv",
+            HTTP_ACCEPT_ENCODING="br;q=1.0, gzip;q=0.8",
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)).decode(), plain)
+
+    def test_export_job_runs_in_background_and_serves_artifact(self) -> None:
+        for _ in range(3):
+            self._create_ticket()
+        self._login(self.admin)
+
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.post(
+                    "/api/tickets/exports",
+                    data=json.dumps({"format": "ndjson"}),
+                    content_type="application/json",
+                )
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()["status"], "queued")
+            self.assertIsNone(response.json()["download_url"])
+            self.assertEqual(len(callbacks), 1)
+            job_id = response.json()["id"]
+
+            not_ready = self.client.get(f"/api/tickets/exports/{job_id}/download")
+            self.assertEqual(not_ready.status_code, 409)
+
+            run_export_job(job_id)
+            run_export_job(job_id)  # redelivery is a no-op
+
+            job = self.client.get(f"/api/tickets/exports/{job_id}").json()
+            self.assertEqual(job["status"], "succeeded")
+            self.assertEqual(job["rows_processed"], 3)
+            self.assertEqual(job["total_rows"], 3)
+            self.assertTrue(job["download_url"].endswith(f"/api/tickets/exports/{job_id}/download"))
+
+            download = self.client.get(f"/api/tickets/exports/{job_id}/download")
+            self.assertEqual(download.status_code, 200)
+            rows = [
+                json.loads(line)
+                for line in gzip.decompress(b"".join(download.streaming_content)).splitlines()
+            ]
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(rows[0]["student_email"], "student@usls.edu.ph")
+
+        with self.captureOnCommitCallbacks():
+            response = self.client.get("/api/tickets/stats/dashboard/export-csv?mode=async")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["format"], "csv")
+
+        self._login(self.student)
+        response = self.client.post(
+            "/api/tickets/exports", data=json.dumps({}), content_type="application/json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_admin_patch_writes_only_dirty_columns_and_unchanged_patch_is_noop(self) -> None:
+        ticket = self._create_ticket()
+        self._login(self.admin)
+
+        def patch(body):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.patch(
+                    f"/api/tickets/{ticket.id}/admin",
+                    data=json.dumps(body),
+                    content_type="application/json",
+                )
+            self.assertEqual(response.status_code, 200)
+            sql = [q["sql"] for q in ctx.captured_queries]
+            updates = [q for q in sql if q.startswith('UPDATE "tickets_ticket"')]
+            ticket_selects = [q for q in sql if q.startswith("SELECT") and 'FROM "tickets_ticket"' in q]
+            return response, updates, ticket_selects
+
+        response, updates, ticket_selects = patch({"status": "in_progress"})
+        self.assertEqual(response.json()["status"], "in_progress")
+        self.assertEqual(len(ticket_selects), 1)
+        full_update = [q for q in updates if '"updated_at"' in q]
+        self.assertEqual(len(full_update), 1)
+        self.assertIn('"status"', full_update[0])
+        self.assertNotIn('"title"', full_update[0])
+        self.assertNotIn('"description"', full_update[0])
+
+        updated_at = Ticket.objects.get(pk=ticket.pk).updated_at
+        response, updates, _ = patch({"status": "in_progress", "priority": self.priority_medium.id})
+        self.assertEqual(updates, [])
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).updated_at, updated_at)
+
+    def test_status_change_is_audited_once_with_batched_inserts(self) -> None:
+        ticket = self._create_ticket()
+        self._login(self.admin)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.patch(
+                f"/api/tickets/{ticket.id}/admin",
+                data=json.dumps({"status": "resolved", "priority": self.priority_low.id}),
+                content_type="application/json",
+            )
+        audit_writes = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith(('INSERT INTO "tickets_ticketstatushistory"', 'INSERT INTO "tickets_activitylog"'))
+        ]
+        self.assertEqual(len(audit_writes), 2)
+        self.assertFalse(any(
+            'FROM "tickets_activitylog"' in q["sql"] for q in ctx.captured_queries))
+
+        history = list(TicketStatusHistory.objects.filter(ticket=ticket))
+        self.assertEqual([(h.old_status, h.new_status, h.changed_by_id) for h in history],
+                         [("pending", "resolved", self.admin.id)])
+        logs = ActivityLog.objects.filter(ticket=ticket).exclude(action="created")
+        self.assertEqual(
+            sorted((log.action, log.old_value, log.new_value, log.performed_by_id) for log in logs),
+            [
+                ("priority_changed", "Medium", "Low", self.admin.id),
+                ("resolved", None, "resolved", self.admin.id),
+                ("status_changed", "pending", "resolved", self.admin.id),
+            ],
+        )
+
+    def test_ticket_events_carry_the_changed_ticket(self) -> None:
+        ticket = self._create_ticket()
+        self._login(self.admin)
+
+        response = self.client.patch(
+            f"/api/tickets/{ticket.id}/admin",
+            data=json.dumps({"status": "in_progress", "priority": self.priority_low.id}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        event = OutboxEvent.objects.filter(group=f"ticket_{ticket.id}").latest("id").message["data"]
+        self.assertEqual(event["action"], "updated")
+        self.assertEqual(event["changed"], ["priority", "status"])
+        body = response.json()
+        self.assertEqual(event["updated_at"], body["updated_at"])
+        # Everything the REST response says, except the list-only comment count.
+        body.pop("comments_count")
+        self.assertEqual(event["ticket"], body)
+
+    def test_failed_publish_rolls_back_the_write(self) -> None:
+        ticket = self._create_ticket()
+        comment = TicketComment.objects.create(ticket=ticket, user=self.student, message="Still broken")
+        self._login(self.student)
+
+        with mock.patch("apps.tickets.views.publish_to", side_effect=RuntimeError("outbox down")):
+            with self.assertRaises(RuntimeError):
+                self.client.post(f"/api/tickets/{ticket.id}/comments", data={"message": "Any update?"})
+            with self.assertRaises(RuntimeError):
+                self.client.delete(f"/api/tickets/{ticket.id}/comments/{comment.id}")
+
+        self.assertEqual(list(TicketComment.objects.filter(ticket=ticket)), [comment])
+
+        response = self.client.delete(f"/api/tickets/{ticket.id}/comments/{comment.id}")
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(TicketComment.objects.filter(pk=comment.pk).exists())
+        event = OutboxEvent.objects.filter(group=f"ticket_{ticket.id}").latest("id").message["data"]
+        self.assertEqual((event["type"], event["comment"]["id"]), ("comment_deleted", comment.id))
@@ -1,36 +1,29 @@
-import csv
 from datetime import date, timedelta
-from io import StringIO
-from typing import List
+from typing import List, Literal
 
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Count, Min, Prefetch, Q
-from django.http import HttpResponse
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Prefetch, Q, prefetch_related_objects
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
 
 from ninja import File, Form, Router, UploadedFile
 from ninja.security import SessionAuth
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
 from asyncio.log import logger
-from .utils import (
-    format_date,
-    format_timestamp,
-    history_action_for_status_change,
-    map_priority_for_history,
-    map_status_for_history,
-)
 from .service import (
     create_comment_with_attachments,
     create_feedback_with_attachments,
     create_ticket_with_attachments,
+    record_first_staff_response,
     replace_ticket_attachments,
     validate_attachments,
 )
-from apps.notifications.utils import notify_feedback_submitted, notify_ticket_created, notify_ticket_status_change, notify_ticket_comment
+from apps.realtime.groups import ticket_event_groups
+from apps.realtime.outbox import publish_to
+from apps.notifications.utils import notify_feedback_submitted, notify_staff_ticket_comment, notify_ticket_created, notify_ticket_status_change, notify_ticket_comment
 
 from .schemas import (
     ActivityLogListSchema,
@@ -38,6 +31,8 @@ from .schemas import (
     CategorySchema,
     DashboardMetricsSchema,
     DashboardStatsSchema,
+    ExportJobCreateSchema,
+    ExportJobSchema,
     TicketAdminUpdateSchema,
     TicketCommentCreateSchema,
     TicketCommentSchema,
@@ -52,20 +47,28 @@ from .schemas import (
     TicketFeedbackUpdateSchema,
     TicketVolumeDataPointSchema,
 )
-from .models import ActivityLog, Category, Ticket, TicketAttachment, TicketComment, TicketPriority, TicketFeedback, TicketStatusHistory
+from .export import (
+    accepts_gzip,
+    enqueue_export_job,
+    export_filename,
+    gzip_chunks,
+    iter_ticket_csv,
+    response_stream,
+    tickets_for_window,
+)
+from .audit import record_ticket_changes
+from .history import history_page
+from .pagination import keyset_page
+from .rollup import (
+    record_ticket_archived,
+    record_ticket_changed,
+    rollup_key,
+    ticket_counts_by,
+)
+from .models import ActivityLog, Category, ExportJob, Ticket, TicketAttachment, TicketComment, TicketPriority, TicketFeedback
 
 router = Router(auth=SessionAuth())
 User = get_user_model()
-channel_layer = get_channel_layer()
-
-
-def _safe_group_send(group: str, payload: dict) -> None:
-    if not channel_layer:
-        return
-    try:
-        async_to_sync(channel_layer.group_send)(group, payload)
-    except Exception:
-        logger.exception("WebSocket group_send failed", extra={"group": group})
 
 
 @router.get("/expensive-data", response=dict)
@@ -120,12 +123,100 @@ def _resolve_export_window(start_date: str | None, end_date: str | None) -> tupl
     return parsed_start, parsed_end
 
 
-def _get_tickets_for_window(start: date, end: date):
-    return (
-        _active_tickets()
-        .filter(created_at__date__gte=start, created_at__date__lte=end)
-        .select_related("student", "category", "priority")
-        .order_by("-created_at")
+def _with_detail_relations(qs):
+    # Everything TicketSchema.from_orm reads except attachments, which may
+    # change during the request; see _prefetch_attachments.
+    return qs.select_related("category", "priority", "student").annotate(
+        feedback_rating=F("feedback__rating"))
+
+
+def _locked_for_update(qs):
+    # Lock only the ticket row; the joined relations are read-only here.
+    return _with_detail_relations(qs).select_for_update(of=("self",))
+
+
+def _prefetch_attachments(ticket: Ticket) -> None:
+    prefetch_related_objects(
+        [ticket],
+        Prefetch("attachments_tickets", queryset=TicketAttachment.objects.order_by("id")),
+    )
+
+
+def _changed_field_names(ticket: Ticket) -> list[str]:
+    dirty = ticket.get_dirty_fields()
+    return sorted(
+        field.name for field in ticket._meta.concrete_fields
+        if field.attname in dirty and field.name != "updated_at"
+    )
+
+
+def _ticket_event(request, ticket: Ticket, action: str, message: str, changed=()) -> dict:
+    """Realtime ``created``/``updated`` event carrying the ticket itself.
+
+    Clients apply ``ticket`` when its ``updated_at`` is not older than their
+    copy, so they never need to refetch the list after an event.
+    """
+    ticket_data = TicketSchema.dump_trusted(ticket, request)
+    if action != "created":
+        # Only list queries annotate it; comment events keep clients' counts.
+        ticket_data.pop("comments_count")
+    return {
+        "type": "send_ticket_update",
+        "data": {
+            "action": action,
+            "ticket_id": ticket.id,
+            "name": getattr(ticket.student, "name", None),
+            "avatar": getattr(ticket.student, "avatar", None),
+            "message": message,
+            "updated_at": ticket_data["updated_at"],
+            "changed": list(changed),
+            "ticket": ticket_data,
+        },
+    }
+
+
+def _comment_event(ticket: Ticket, comment: TicketComment, kind: str) -> dict:
+    return {
+        "type": "send_comment_update",
+        "data": {
+            "type": kind,
+            "ticket_id": ticket.id,
+            "comment": {
+                "id": comment.id,
+                "ticket_id": ticket.id,
+                "user": {
+                    "id": comment.user.id,
+                    "email": comment.user.email,
+                    "name": getattr(comment.user, "name", None),
+                    "avatar": getattr(comment.user, "avatar", None),
+                },
+                "message": comment.message,
+                "created_at": comment.created_at.isoformat(),
+            }
+        }
+    }
+
+
+def _feedback_event(ticket: Ticket, feedback_id: int, kind: str) -> dict:
+    return {
+        "type": "send_feedback_update",
+        "data": {
+            "type": kind,
+            "ticket_id": ticket.id,
+            "feedback_id": feedback_id,
+        }
+    }
+
+
+def _with_list_relations(qs):
+    return qs.select_related("category", "priority", "student").prefetch_related(
+        Prefetch(
+            "attachments_tickets",
+            queryset=TicketAttachment.objects.order_by("id"),
+        )
+    ).annotate(
+        comments_count=Count("comments"),
+        feedback_rating=F("feedback__rating"),
     )
 
 
@@ -138,16 +229,9 @@ def _calculate_dashboard_stats() -> DashboardStatsSchema:
 
     base = _active_tickets()
 
-    status_counts = dict(
-        base.values("status").annotate(
-            count=Count("id")).values_list("status", "count")
-    )
-    last_month_status_counts = dict(
-        base.filter(created_at__date__lt=last_month_start)
-        .values("status")
-        .annotate(count=Count("id"))
-        .values_list("status", "count")
-    )
+    status_counts = ticket_counts_by("status")
+    last_month_status_counts = ticket_counts_by(
+        "status", day__lt=last_month_start)
 
     pending_tickets = status_counts.get("pending", 0)
     resolved_tickets = status_counts.get("resolved", 0)
@@ -166,51 +250,26 @@ def _calculate_dashboard_stats() -> DashboardStatsSchema:
         else 0
     )
 
-    tickets_this_week = (
-        base.filter(comments__user__is_staff=True,
-                    created_at__gte=this_week_start)
-        .distinct()
-        .annotate(
-            first_response_time=Min(
-                "comments__created_at",
-                filter=Q(comments__user__is_staff=True),
-            )
-        )
+    response_time = ExpressionWrapper(
+        F("first_staff_response_at") - F("created_at"), output_field=DurationField())
+    response_averages = base.filter(first_staff_response_at__isnull=False).aggregate(
+        this_week=Avg(response_time, filter=Q(created_at__gte=this_week_start)),
+        last_month=Avg(
+            response_time,
+            filter=Q(
+                created_at__date__gte=previous_month_start,
+                created_at__date__lt=last_month_start,
+            ),
+        ),
     )
-    response_times = []
-    for ticket in tickets_this_week:
-        if ticket.first_response_time:
-            response_times.append(
-                (ticket.first_response_time -
-                 ticket.created_at).total_seconds() / 3600
-            )
-    avg_response_time = sum(response_times) / \
-        len(response_times) if response_times else 0
-
-    tickets_last_month = (
-        base.filter(
-            comments__user__is_staff=True,
-            created_at__date__gte=previous_month_start,
-            created_at__date__lt=last_month_start,
-        )
-        .distinct()
-        .annotate(
-            first_response_time=Min(
-                "comments__created_at",
-                filter=Q(comments__user__is_staff=True),
-            )
-        )
+    avg_response_time = (
+        response_averages["this_week"].total_seconds() / 3600
+        if response_averages["this_week"]
+        else 0
     )
-    last_response_times = []
-    for ticket in tickets_last_month:
-        if ticket.first_response_time:
-            last_response_times.append(
-                (ticket.first_response_time -
-                 ticket.created_at).total_seconds() / 3600
-            )
     last_month_avg_response = (
-        sum(last_response_times) / len(last_response_times)
-        if last_response_times
+        response_averages["last_month"].total_seconds() / 3600
+        if response_averages["last_month"]
         else avg_response_time
     )
 
@@ -263,14 +322,7 @@ def _calculate_dashboard_stats() -> DashboardStatsSchema:
     ]
 
     days = ["S", "M", "T", "W", "T", "F", "S"]
-    volume_counts = (
-        base.filter(created_at__date__gte=today - timedelta(days=6))
-        .extra(select={"created_date": "DATE(created_at)"})
-        .values("created_date")
-        .annotate(count=Count("id"))
-        .values_list("created_date", "count")
-    )
-    volume_dict = dict(volume_counts)
+    volume_dict = ticket_counts_by("day", day__gte=today - timedelta(days=6))
     volume_data = []
     for i in range(7):
         day_date = today - timedelta(days=6 - i)
@@ -281,11 +333,7 @@ def _calculate_dashboard_stats() -> DashboardStatsSchema:
             )
         )
 
-    category_breakdown = dict(
-        base.values("category__name")
-        .annotate(count=Count("id"))
-        .values_list("category__name", "count")
-    )
+    category_breakdown = ticket_counts_by("category__name")
 
     return DashboardStatsSchema(
         metrics=metrics,
@@ -300,18 +348,37 @@ PAGE_SIZE_DEFAULT = 50
 PAGE_SIZE_MAX = 100
 
 
-@router.get("/community", response=dict)
-def community_tickets(request, limit: int = PAGE_SIZE_DEFAULT, offset: int = 0):
+def _is_cursor_mode(pagination: str, cursor: str | None) -> bool:
+    return pagination == "cursor" or bool(cursor)
+
+
+@router.get("/community", response={200: dict, 400: dict})
+def community_tickets(
+    request,
+    limit: int = PAGE_SIZE_DEFAULT,
+    offset: int = 0,
+    cursor: str | None = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+):
     limit = min(max(1, limit), PAGE_SIZE_MAX)
     offset = max(0, offset)
-    qs = _active_tickets().select_related("category", "priority", "student") \
-        .prefetch_related('attachments_tickets') \
-        .annotate(comments_count=Count('comments')) \
-        .order_by('-created_at')
+    qs = _with_list_relations(_active_tickets()).order_by('-created_at')
+    if _is_cursor_mode(pagination, cursor):
+        try:
+            page, next_cursor, prev_cursor = keyset_page(
+                qs, limit=limit, cursor=cursor)
+        except ValueError as exc:
+            return 400, {"detail": str(exc)}
+        return 200, {
+            "items": TicketSchema.dump_list(page),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
     total = qs.count()
     page = list(qs[offset: offset + limit])
-    return {
-        "items": [TicketSchema.from_orm(t) for t in page],
+    return 200, {
+        "items": TicketSchema.dump_list(page),
         "total": total,
         "limit": limit,
         "offset": offset,
@@ -319,122 +386,114 @@ def community_tickets(request, limit: int = PAGE_SIZE_DEFAULT, offset: int = 0):
 
 
 # Ticket Views
-@router.get("/", response=dict)
-def ticket_list(request, limit: int = PAGE_SIZE_DEFAULT, offset: int = 0):
+@router.get("/", response={200: dict, 400: dict})
+def ticket_list(
+    request,
+    limit: int = PAGE_SIZE_DEFAULT,
+    offset: int = 0,
+    cursor: str | None = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+):
     limit = min(max(1, limit), PAGE_SIZE_MAX)
     offset = max(0, offset)
-    qs = _active_tickets().select_related(
-        'category', 'priority', 'student'
-    ).prefetch_related('attachments_tickets').annotate(comments_count=Count('comments'))
+    qs = _with_list_relations(_active_tickets())
     if not request.user.is_staff:
         qs = qs.filter(student=request.user)
+    if _is_cursor_mode(pagination, cursor):
+        try:
+            page, next_cursor, prev_cursor = keyset_page(
+                qs, limit=limit, cursor=cursor)
+        except ValueError as exc:
+            return 400, {"detail": str(exc)}
+        return 200, {
+            "items": TicketSchema.dump_list(page, request),
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
     total = qs.count()
     page = list(qs[offset: offset + limit])
-    return {
-        "items": [TicketSchema.from_orm(ticket, request) for ticket in page],
+    return 200, {
+        "items": TicketSchema.dump_list(page, request),
         "total": total,
         "limit": limit,
         "offset": offset,
     }
 
 
-@router.get("/history", response=list[TicketHistoryItemSchema])
-def ticket_history(request):
-    status_history_qs = TicketStatusHistory.objects.select_related(
-        "changed_by").order_by("changed_at")
-    comments_qs = TicketComment.objects.select_related(
-        "user").order_by("created_at")
+HISTORY_PAGE_SIZE_DEFAULT = 100
+HISTORY_PAGE_SIZE_MAX = 500
+
+
+@router.get("/history", response={200: list[TicketHistoryItemSchema], 400: dict})
+def ticket_history(
+    request,
+    response: HttpResponse,
+    limit: int = HISTORY_PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+):
+    limit = min(max(1, limit), HISTORY_PAGE_SIZE_MAX)
+    try:
+        items, next_cursor = history_page(
+            request.user, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        return 400, {"detail": str(exc)}
+    # The body stays a plain list for existing clients; the cursor for the
+    # next (older) page travels in a header.
+    if next_cursor:
+        response["X-Next-Cursor"] = next_cursor
+    return 200, items
+
+
+def _submit_export_job(request, *, export_format: str, start: date, end: date) -> ExportJob:
+    with transaction.atomic():
+        job = ExportJob.objects.create(
+            requested_by=request.user,
+            format=export_format,
+            start_date=start,
+            end_date=end,
+        )
+        enqueue_export_job(job)
+    return job
 
-    prefetch = [
-        Prefetch("status_history", queryset=status_history_qs),
-        Prefetch("comments", queryset=comments_qs),
-    ]
-    if request.user.is_staff:
-        prefetch.append("feedback")
-
-    base = _active_tickets().select_related("category", "priority",
-                                            "student").prefetch_related(*prefetch)
-    tickets = base.all() if request.user.is_staff else base.filter(student=request.user)
-
-    events = []
-    for ticket in tickets:
-        events.append({
-            "at": ticket.created_at,
-            "id": f"created-{ticket.id}-{ticket.created_at.isoformat()}",
-            "ticket": ticket,
-            "action": "created",
-            "description": "Ticket created",
-            "performed_by": None,
-        })
-        for h in ticket.status_history.all():
-            action = history_action_for_status_change(
-                h.old_status, h.new_status)
-            events.append({
-                "at": h.changed_at,
-                "id": f"status-{h.id}",
-                "ticket": ticket,
-                "action": action,
-                "new_status": h.new_status,
-                "description": (
-                    f"Status changed from {map_status_for_history(h.old_status)} "
-                    f"to {map_status_for_history(h.new_status)}"
-                ),
-                "performed_by": h.changed_by.full_name if h.changed_by else None,
-            })
-        for c in ticket.comments.all():
-            events.append({
-                "at": c.created_at,
-                "id": f"comment-{c.id}",
-                "ticket": ticket,
-                "action": "commented",
-                "description": f"Comment: {c.message[:100]}{'…' if len(c.message) > 100 else ''}",
-                "performed_by": c.user.full_name if c.user else None,
-            })
-        if request.user.is_staff and hasattr(ticket, 'feedback') and ticket.feedback:
-            feedback = ticket.feedback
-            stars = "⭐" * feedback.rating
-            feedback_desc = f"Feedback submitted: {stars} ({feedback.rating}/5)"
-            if feedback.comments:
-                feedback_desc += f" - {feedback.comments[:80]}{'…' if len(feedback.comments) > 80 else ''}"
-            events.append({
-                "at": feedback.created_at,
-                "id": f"feedback-{feedback.id}",
-                "ticket": ticket,
-                "action": "feedback",
-                "description": feedback_desc,
-                "performed_by": getattr(feedback.student, 'full_name', feedback.student.email),
-            })
-
-    events.sort(key=lambda e: e["at"], reverse=True)
-    status_change_actions = ("updated", "resolved", "closed", "reopened")
-    out = []
-    for e in events:
-        t = e["ticket"]
-        priority_name = t.priority.name if t.priority else ""
-        category_name = t.category.name if t.category else None
-
-        if e["action"] in status_change_actions:
-            final_status = map_status_for_history(e["new_status"])
-        elif e["action"] == "created":
-            final_status = map_status_for_history("pending")
-        else:
-            final_status = map_status_for_history(t.status)
-
-        out.append(TicketHistoryItemSchema(
-            id=e["id"],
-            ticketPk=t.id,
-            ticketId=t.ticket_number,
-            title=t.title,
-            action=e["action"],
-            description=e["description"],
-            timestamp=format_timestamp(e["at"]),
-            date=format_date(e["at"]),
-            status=final_status,
-            priority=map_priority_for_history(priority_name),
-            category=category_name,
-            performedBy=e.get("performed_by"),
-        ))
-    return out
+
+# Registered ahead of "/{id}", which would otherwise capture "/exports".
+@router.post("/exports", response={202: ExportJobSchema, 400: dict, 403: dict})
+def create_export_job(request, payload: ExportJobCreateSchema):
+    if not request.user.is_staff:
+        return 403, {"detail": "You do not have permission to view this data."}
+
+    try:
+        start, end = _resolve_export_window(payload.start_date, payload.end_date)
+    except ValueError as exc:
+        return 400, {"detail": str(exc)}
+
+    job = _submit_export_job(request, export_format=payload.format, start=start, end=end)
+    return 202, ExportJobSchema.from_orm(job, request)
+
+
+@router.get("/exports/{id}", response={200: ExportJobSchema, 403: dict, 404: dict})
+def get_export_job(request, id: int):
+    if not request.user.is_staff:
+        return 403, {"detail": "You do not have permission to view this data."}
+    job = get_object_or_404(ExportJob, id=id, requested_by=request.user)
+    return 200, ExportJobSchema.from_orm(job, request)
+
+
+@router.get("/exports/{id}/download", url_name="download_export_job")
+def download_export_job(request, id: int):
+    if not request.user.is_staff:
+        return HttpResponse('{"detail": "You do not have permission to view this data."}', status=403, content_type="application/json")
+    job = get_object_or_404(ExportJob, id=id, requested_by=request.user)
+    if job.status != "succeeded" or not job.file:
+        return HttpResponse('{"detail": "Export is not ready yet."}', status=409, content_type="application/json")
+
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=export_filename(job),
+        content_type="application/gzip",
+    )
 
 
 @router.get("/{id}", response={200: TicketSchema, 404: dict})
@@ -472,13 +531,21 @@ def create_ticket(request, ticket: TicketCreateSchema = Form(...), attachment: L
         priority = TicketPriority.objects.get(name="Medium")
     except TicketPriority.DoesNotExist:
         return 404, {"detail": "Default priority 'Medium' not found."}
-    ticket_obj = create_ticket_with_attachments(
-        ticket_data=ticket,
-        student=request.user,
-        category=category,
-        priority=priority,
-        attachments=attachment,
-    )
+    with transaction.atomic():
+        ticket_obj = create_ticket_with_attachments(
+            ticket_data=ticket,
+            student=request.user,
+            category=category,
+            priority=priority,
+            attachments=attachment,
+        )
+        ticket_obj = _with_detail_relations(Ticket.objects).prefetch_related(
+            'attachments_tickets').get(pk=ticket_obj.id)
+        publish_to(
+            ticket_event_groups(ticket_obj),
+            _ticket_event(request, ticket_obj, "created", "A ticket was created"),
+        )
+
     # Notify admin users about the new ticket
     try:
         notify_ticket_created(
@@ -492,103 +559,88 @@ def create_ticket(request, ticket: TicketCreateSchema = Form(...), attachment: L
         logger.exception("notify_ticket_created failed",
                          extra={"ticket_id": ticket_obj.id})
 
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_ticket_update",
-            "data": {
-                "action": "created",
-                "ticket_id": ticket_obj.id,
-                "name": getattr(ticket_obj.student, "name", None),
-                "avatar": getattr(ticket_obj.student, "avatar", None),
-                "message": "A ticket was created",
-            }
-        }
-    )
-
-    ticket_obj.refresh_from_db()
-    ticket_obj = Ticket.objects.prefetch_related(
-        'attachments_tickets').get(pk=ticket_obj.id)
     return 200, TicketSchema.from_orm(ticket_obj, request)
 
 
 @router.put("/{id}", response={200: TicketSchema, 400: dict, 403: dict, 404: dict})
 def update_ticket(request, id: int, payload: TicketUpdateSchema = Form(...), attachment: List[UploadedFile] = File(None)):
-    ticket = get_object_or_404(_active_tickets(), id=id)
-
-    # Permission check
-    if ticket.student != request.user and not request.user.is_staff:
-        return 403, {"detail": "You do not have permission to edit this ticket."}
-
-    # Students can only edit tickets with "pending" status
-    if not request.user.is_staff and ticket.status != 'pending':
-        return 400, {"detail": "You cannot edit tickets that are being processed by admin."}
-
-    # Validate attachments before applying updates to avoid leaving ticket in inconsistent state
-    if attachment:
-        try:
-            validate_attachments(attachment)
-        except ValueError as e:
-            return 400, {"detail": str(e)}
-
-    if payload.title is not None:
-        ticket.title = payload.title
-    if payload.description is not None:
-        ticket.description = payload.description
-    if payload.category is not None:
-        try:
-            ticket.category = Category.objects.get(id=payload.category)
-        except Category.DoesNotExist:
-            return 404, {"detail": "Category not found."}
-    if payload.priority is not None:
-        try:
-            ticket.priority = TicketPriority.objects.get(id=payload.priority)
-        except TicketPriority.DoesNotExist:
-            return 404, {"detail": "Priority not found."}
-    if payload.building is not None:
-        ticket.building = payload.building
-    if payload.room_name is not None:
-        ticket.room_name = payload.room_name
-    if payload.status is not None:
-        old_status = ticket.status
-        if old_status != payload.status:
-            TicketStatusHistory.objects.create(
+    old_status = None
+    with transaction.atomic():
+        # The row lock makes the audited old -> new transition exact under
+        # concurrent edits.
+        ticket = get_object_or_404(_locked_for_update(_active_tickets()), id=id)
+
+        # Permission check
+        if ticket.student != request.user and not request.user.is_staff:
+            return 403, {"detail": "You do not have permission to edit this ticket."}
+
+        # Students can only edit tickets with "pending" status
+        if not request.user.is_staff and ticket.status != 'pending':
+            return 400, {"detail": "You cannot edit tickets that are being processed by admin."}
+
+        # Validate attachments before applying updates to avoid leaving ticket in inconsistent state
+        if attachment:
+            try:
+                validate_attachments(attachment)
+            except ValueError as e:
+                return 400, {"detail": str(e)}
+
+        old_rollup_key = rollup_key(ticket)
+        if payload.title is not None:
+            ticket.title = payload.title
+        if payload.description is not None:
+            ticket.description = payload.description
+        if payload.category is not None and payload.category != ticket.category_id:
+            try:
+                ticket.category = Category.objects.get(id=payload.category)
+            except Category.DoesNotExist:
+                return 404, {"detail": "Category not found."}
+        if payload.priority is not None and payload.priority != ticket.priority_id:
+            try:
+                ticket.priority = TicketPriority.objects.get(id=payload.priority)
+            except TicketPriority.DoesNotExist:
+                return 404, {"detail": "Priority not found."}
+        if payload.building is not None:
+            ticket.building = payload.building
+        if payload.room_name is not None:
+            ticket.room_name = payload.room_name
+        if payload.status is not None and payload.status != ticket.status:
+            old_status = ticket.status
+            ticket.status = payload.status
+
+        changed_fields = _changed_field_names(ticket)
+        if attachment:
+            changed_fields.append("attachment")
+        changed = bool(changed_fields)
+        if changed:
+            now = timezone.now()
+            ticket.updated_at = now
+            if old_status is not None and request.user.is_staff:
+                record_first_staff_response(ticket, at=now)
+            record_ticket_changes(ticket, actor=request.user, at=now)
+            # Only the dirty columns are written.
+            ticket.save()
+            record_ticket_changed(ticket, old_rollup_key)
+
+        if attachment:
+            replace_ticket_attachments(
                 ticket=ticket,
-                old_status=old_status,
-                new_status=payload.status,
-                changed_by=request.user,
-                changed_at=timezone.now(),
+                uploaded_by=request.user,
+                attachments=attachment,
             )
-            notify_ticket_status_change(student=ticket.student, ticket_id=ticket.id,
-                                        ticket_number=ticket.ticket_number, ticket_title=ticket.title, new_status=payload.status)
-        ticket.status = payload.status
-
-    ticket.updated_at = timezone.now()
-    ticket.save()
 
-    if attachment:
-        replace_ticket_attachments(
-            ticket=ticket,
-            uploaded_by=request.user,
-            attachments=attachment,
-        )
+        _prefetch_attachments(ticket)
+        if changed:
+            publish_to(
+                ticket_event_groups(ticket),
+                _ticket_event(request, ticket, "updated",
+                              f"A ticket was updated by {request.user.name}", changed_fields),
+            )
 
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_ticket_update",
-            "data": {
-                "action": "updated",
-                "ticket_id": ticket.id,
-                "name": getattr(ticket.student, "name", None),
-                "avatar": getattr(ticket.student, "avatar", None),
-                "message": f"A ticket was updated by {request.user.name}",
-            }
-        }
-    )
+    if old_status is not None:
+        notify_ticket_status_change(student=ticket.student, ticket_id=ticket.id,
+                                    ticket_number=ticket.ticket_number, ticket_title=ticket.title, new_status=ticket.status)
 
-    ticket = Ticket.objects.prefetch_related(
-        'attachments_tickets').get(pk=ticket.id)
     return 200, TicketSchema.from_orm(ticket, request)
 
 
@@ -597,47 +649,42 @@ def admin_update_ticket(request, id: int, payload: TicketAdminUpdateSchema):
     if not request.user.is_staff:
         return 403, {"detail": "You do not have permission to perform this action."}
 
-    ticket = get_object_or_404(_active_tickets(), id=id)
-
-    if payload.status is not None:
-        old_status = ticket.status
-        if old_status != payload.status:
-            TicketStatusHistory.objects.create(
-                ticket=ticket,
-                old_status=old_status,
-                new_status=payload.status,
-                changed_by=request.user,
-                changed_at=timezone.now(),
+    old_status = None
+    with transaction.atomic():
+        ticket = get_object_or_404(_locked_for_update(_active_tickets()), id=id)
+        old_rollup_key = rollup_key(ticket)
+
+        if payload.status is not None and payload.status != ticket.status:
+            old_status = ticket.status
+            ticket.status = payload.status
+
+        if payload.priority is not None and payload.priority != ticket.priority_id:
+            try:
+                ticket.priority = TicketPriority.objects.get(id=payload.priority)
+            except TicketPriority.DoesNotExist:
+                return 404, {"detail": "Priority not found."}
+
+        changed_fields = _changed_field_names(ticket)
+        _prefetch_attachments(ticket)
+        if changed_fields:
+            now = timezone.now()
+            ticket.updated_at = now
+            if old_status is not None:
+                record_first_staff_response(ticket, at=now)
+            record_ticket_changes(ticket, actor=request.user, at=now)
+            # Only the dirty columns are written.
+            ticket.save()
+            record_ticket_changed(ticket, old_rollup_key)
+            publish_to(
+                ticket_event_groups(ticket),
+                _ticket_event(request, ticket, "updated",
+                              f"A ticket was updated to {payload.status}", changed_fields),
             )
-            notify_ticket_status_change(student=ticket.student, ticket_id=ticket.id,
-                                        ticket_number=ticket.ticket_number, ticket_title=ticket.title, new_status=payload.status)
-        ticket.status = payload.status
 
-    if payload.priority is not None:
-        try:
-            ticket.priority = TicketPriority.objects.get(id=payload.priority)
-        except TicketPriority.DoesNotExist:
-            return 404, {"detail": "Priority not found."}
-
-    ticket.updated_at = timezone.now()
-    ticket.save()
-
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_ticket_update",
-            "data": {
-                "action": "updated",
-                "ticket_id": ticket.id,
-                "name": getattr(ticket.student, "name", None),
-                "avatar": getattr(ticket.student, "avatar", None),
-                "message": f"A ticket was updated to {payload.status}",
-            }
-        }
-    )
+    if old_status is not None:
+        notify_ticket_status_change(student=ticket.student, ticket_id=ticket.id,
+                                    ticket_number=ticket.ticket_number, ticket_title=ticket.title, new_status=ticket.status)
 
-    ticket = Ticket.objects.prefetch_related(
-        'attachments_tickets').get(pk=ticket.id)
     return 200, TicketSchema.from_orm(ticket, request)
 
 
@@ -655,21 +702,23 @@ def delete_ticket(request, id: int):
 
     # Soft delete: archive ticket instead of hard delete
     ticket.archived_at = timezone.now()
-    ticket.save(update_fields=["archived_at"])
-
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_ticket_update",
-            "data": {
-                "action": "deleted",
-                "ticket_id": ticket.id,
-                "name": getattr(ticket.student, "name", None),
-                "avatar": getattr(ticket.student, "avatar", None),
-                "message": f"A ticket was deleted by {request.user.name}",
+    with transaction.atomic():
+        ticket.save(update_fields=["archived_at"])
+        record_ticket_archived(ticket)
+        publish_to(
+            ticket_event_groups(ticket),
+            {
+                "type": "send_ticket_update",
+                "data": {
+                    "action": "deleted",
+                    "ticket_id": ticket.id,
+                    "archived_at": ticket.archived_at,
+                    "name": getattr(ticket.student, "name", None),
+                    "avatar": getattr(ticket.student, "avatar", None),
+                    "message": f"A ticket was deleted by {request.user.name}",
+                }
             }
-        }
-    )
+        )
     return 204, None
 
 
@@ -695,12 +744,14 @@ def create_comment(request, id: int, payload: TicketCommentCreateSchema = Form(.
         except ValueError as e:
             return 400, {"detail": str(e)}
 
-    comment = create_comment_with_attachments(
-        ticket=ticket,
-        user=request.user,
-        message=payload.message,
-        attachments=attachment,
-    )
+    with transaction.atomic():
+        comment = create_comment_with_attachments(
+            ticket=ticket,
+            user=request.user,
+            message=payload.message,
+            attachments=attachment,
+        )
+        publish_to(ticket_event_groups(ticket), _comment_event(ticket, comment, "comment_created"))
 
     preview = (payload.message or "")[
         :80] + ("…" if len(payload.message or "") > 80 else "")
@@ -708,32 +759,8 @@ def create_comment(request, id: int, payload: TicketCommentCreateSchema = Form(.
         notify_ticket_comment(recipient_user=ticket.student, ticket_id=ticket.id,
                               ticket_number=ticket.ticket_number, ticket_title=ticket.title, message_preview=preview)
     else:
-        for staff_user in User.objects.filter(is_staff=True).exclude(pk=request.user.pk):
-            notify_ticket_comment(recipient_user=staff_user, ticket_id=ticket.id,
-                                  ticket_number=ticket.ticket_number, ticket_title=ticket.title, message_preview=preview)
-
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_comment_update",
-            "data": {
-                "type": "comment_created",
-                "ticket_id": ticket.id,
-                "comment": {
-                    "id": comment.id,
-                    "ticket_id": ticket.id,
-                    "user": {
-                        "id": comment.user.id,
-                        "email": comment.user.email,
-                        "name": getattr(comment.user, "name", None),
-                        "avatar": getattr(comment.user, "avatar", None),
-                    },
-                    "message": comment.message,
-                    "created_at": comment.created_at.isoformat(),
-                }
-            }
-        }
-    )
+        notify_staff_ticket_comment(author_id=request.user.pk, ticket_id=ticket.id,
+                                    ticket_number=ticket.ticket_number, ticket_title=ticket.title, message_preview=preview)
 
     return 200, TicketCommentSchema.model_validate(comment)
 
@@ -749,30 +776,9 @@ def edit_comment(request, id: int, comment_id: int, payload: TicketCommentUpdate
     if payload.message is not None:
         comment.message = payload.message
 
-    comment.save()
-
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_comment_update",
-            "data": {
-                "type": "comment_updated",
-                "ticket_id": ticket.id,
-                "comment": {
-                    "id": comment.id,
-                    "ticket_id": ticket.id,
-                    "user": {
-                        "id": comment.user.id,
-                        "email": comment.user.email,
-                        "name": getattr(comment.user, "name", None),
-                        "avatar": getattr(comment.user, "avatar", None),
-                    },
-                    "message": comment.message,
-                    "created_at": comment.created_at.isoformat(),
-                }
-            }
-        }
-    )
+    with transaction.atomic():
+        comment.save()
+        publish_to(ticket_event_groups(ticket), _comment_event(ticket, comment, "comment_updated"))
 
     return 200, TicketCommentSchema.from_orm(comment)
 
@@ -785,30 +791,9 @@ def delete_comment(request, id: int, comment_id: int):
     if comment.user != request.user:
         return 403, {"detail": "You do not have permission to delete this comment."}
 
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_comment_update",
-            "data": {
-                "type": "comment_deleted",
-                "ticket_id": ticket.id,
-                "comment": {
-                    "id": comment.id,
-                    "ticket_id": ticket.id,
-                    "user": {
-                        "id": comment.user.id,
-                        "email": comment.user.email,
-                        "name": getattr(comment.user, "name", None),
-                        "avatar": getattr(comment.user, "avatar", None),
-                    },
-                    "message": comment.message,
-                    "created_at": comment.created_at.isoformat(),
-                }
-            }
-        }
-    )
-
-    comment.delete()
+    with transaction.atomic():
+        publish_to(ticket_event_groups(ticket), _comment_event(ticket, comment, "comment_deleted"))
+        comment.delete()
     return 204, None
 
 
@@ -848,26 +833,22 @@ def create_feedback(request, id: int, payload: TicketFeedbackCreateSchema = Form
         except ValueError as e:
             return 400, {"detail": str(e)}
 
-    feedback = create_feedback_with_attachments(
-        ticket=ticket,
-        student=request.user,
-        rating=payload.rating,
-        comments=payload.comments,
-        attachments=attachment,
-    )
-
-    # Auto-close ticket upon feedback; record status history like update_ticket
-    old_status = ticket.status
-    if old_status != "closed":
-        TicketStatusHistory.objects.create(
+    with transaction.atomic():
+        feedback = create_feedback_with_attachments(
             ticket=ticket,
-            old_status=old_status,
-            new_status="closed",
-            changed_by=request.user,
-            changed_at=timezone.now(),
+            student=request.user,
+            rating=payload.rating,
+            comments=payload.comments,
+            attachments=attachment,
         )
-    ticket.status = "closed"
-    ticket.save()
+
+        # Auto-close ticket upon feedback; record status history like update_ticket
+        old_rollup_key = rollup_key(ticket)
+        ticket.status = "closed"
+        record_ticket_changes(ticket, actor=request.user)
+        ticket.save()
+        record_ticket_changed(ticket, old_rollup_key)
+        publish_to(ticket_event_groups(ticket), _feedback_event(ticket, feedback.id, "feedback_created"))
 
     try:
         student_name = getattr(request.user, "name",
@@ -883,18 +864,6 @@ def create_feedback(request, id: int, payload: TicketFeedbackCreateSchema = Form
         logger.exception("notify_feedback_submitted failed",
                          extra={"ticket_id": ticket.id})
 
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_feedback_update",
-            "data": {
-                "type": "feedback_created",
-                "ticket_id": ticket.id,
-                "feedback_id": feedback.id,
-            }
-        }
-    )
-
     return 201, TicketFeedbackSchema.from_orm(feedback)
 
 
@@ -917,20 +886,9 @@ def update_feedback(request, id: int, feedback_id: int, payload: TicketFeedbackU
     if payload.comments is not None:
         feedback.comments = payload.comments
 
-    feedback.save()
-
-    # Send WebSocket update (optional)
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_feedback_update",
-            "data": {
-                "type": "feedback_updated",
-                "ticket_id": ticket.id,
-                "feedback_id": feedback.id,
-            }
-        }
-    )
+    with transaction.atomic():
+        feedback.save()
+        publish_to(ticket_event_groups(ticket), _feedback_event(ticket, feedback.id, "feedback_updated"))
 
     return 200, TicketFeedbackSchema.from_orm(feedback)
 
@@ -948,20 +906,10 @@ def delete_feedback(request, id: int, feedback_id: int):
     if timezone.now() > feedback.created_at + timedelta(hours=24):
         return 400, {"detail": "Feedback can only be deleted within 24 hours of submission."}
 
-    # Send WebSocket update before deleting
-    _safe_group_send(
-        "ticket_updates",
-        {
-            "type": "send_feedback_update",
-            "data": {
-                "type": "feedback_deleted",
-                "ticket_id": ticket.id,
-                "feedback_id": feedback.id,
-            }
-        }
-    )
-
-    feedback.delete()
+    with transaction.atomic():
+        # The event is built before the row (and its id) goes away.
+        publish_to(ticket_event_groups(ticket), _feedback_event(ticket, feedback.id, "feedback_deleted"))
+        feedback.delete()
     return 204, None
 
 
@@ -972,11 +920,12 @@ def dashboard_stats(request):
     return 200, _calculate_dashboard_stats()
 
 
-@router.get("/stats/dashboard/export-csv")
+@router.get("/stats/dashboard/export-csv", response={202: ExportJobSchema})
 def export_dashboard_csv(
     request,
     start_date: str | None = None,
     end_date: str | None = None,
+    mode: Literal["stream", "async"] = "stream",
 ):
     if not request.user.is_staff:
         return HttpResponse('{"detail": "You do not have permission to view this data."}', status=403, content_type="application/json")
@@ -986,51 +935,35 @@ def export_dashboard_csv(
     except ValueError as exc:
         return HttpResponse(f'{{"detail": "{exc}"}}', status=400, content_type="application/json")
 
-    tickets = _get_tickets_for_window(start, end)
-
-    buffer = StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(
-        [
-            "ticket_number",
-            "title",
-            "status",
-            "priority",
-            "category",
-            "student_email",
-            "building",
-            "room_name",
-            "created_at",
-            "updated_at",
-        ]
-    )
+    if mode == "async":
+        job = _submit_export_job(request, export_format="csv", start=start, end=end)
+        return 202, ExportJobSchema.from_orm(job, request)
 
-    for ticket in tickets:
-        writer.writerow(
-            [
-                ticket.ticket_number,
-                ticket.title,
-                ticket.status,
-                ticket.priority.name if ticket.priority else "",
-                ticket.category.name if ticket.category else "",
-                ticket.student.email if ticket.student else "",
-                ticket.building,
-                ticket.room_name,
-                ticket.created_at.isoformat(),
-                ticket.updated_at.isoformat(),
-            ]
-        )
+    chunks = iter_ticket_csv(tickets_for_window(start, end))
+    gzip = accepts_gzip(request)
+    if gzip:
+        chunks = gzip_chunks(chunks)
 
-    response = HttpResponse(
-        buffer.getvalue(), content_type="text/csv; charset=utf-8")
+    response = StreamingHttpResponse(
+        response_stream(request, chunks), content_type="text/csv; charset=utf-8")
+    if gzip:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ["Accept-Encoding"])
     response["Content-Disposition"] = (
         f'attachment; filename="tickets-export-{start.isoformat()}-to-{end.isoformat()}.csv"'
     )
     return response
 
 
-@router.get("/activity/", response=ActivityLogListSchema)
-def get_activity_logs(request, limit: int = 50, offset: int = 0, ticket_id: int | None = None):
+@router.get("/activity/", response={200: ActivityLogListSchema, 400: dict})
+def get_activity_logs(
+    request,
+    limit: int = 50,
+    offset: int = 0,
+    ticket_id: int | None = None,
+    cursor: str | None = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+):
     limit = min(max(1, limit), 100)
     offset = max(0, offset)
 
@@ -1043,28 +976,28 @@ def get_activity_logs(request, limit: int = 50, offset: int = 0, ticket_id: int
     if ticket_id:
         qs = qs.filter(ticket_id=ticket_id)
 
-    total = qs.count()
+    total = None
+    next_cursor = prev_cursor = None
+    if _is_cursor_mode(pagination, cursor):
+        try:
+            items, next_cursor, prev_cursor = keyset_page(
+                qs, limit=limit, cursor=cursor)
+        except ValueError as exc:
+            return 400, {"detail": str(exc)}
+        offset = None
+    else:
+        total = qs.count()
 
-    # Paginate
-    items = list(qs[offset:offset + limit])
-
-    activity_items = []
-    for activity in items:
-        activity_items.append(ActivityLogSchema(
-            id=activity.id,
-            action=activity.action,
-            ticket_number=activity.ticket.ticket_number,
-            ticket_title=activity.ticket.title,
-            performed_by=activity.performed_by,
-            description=activity.description,
-            old_value=activity.old_value,
-            new_value=activity.new_value,
-            created_at=activity.created_at,
-        ))
-
-    return ActivityLogListSchema(
-        items=activity_items,
-        total=total,
-        limit=limit,
-        offset=offset,
-    )
+        # Paginate
+        items = list(qs[offset:offset + limit])
+
+    # Rendered here so ninja skips re-validating the trusted dicts; the
+    # declared schema still documents the payload.
+    return router.api.create_response(request, {
+        "items": [ActivityLogSchema.dump_trusted(activity) for activity in items],
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+    }, status=200)
@@ -1,8 +1,49 @@
-import json
+import asyncio
+import contextlib
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+
+from apps.realtime import frames, metrics
+from apps.realtime.outbox import replay_events
+
+from .subscriptions import TopicSubscriptions, parse_since
+
+# Close code for sockets that stopped answering heartbeats.
+IDLE_CLOSE_CODE = 4408
 
 
 class TicketNotificationConsumer(AsyncWebsocketConsumer):
+    """Per-user socket for ticket events and in-app notifications.
+
+    Clients send ``{"action": "subscribe" | "unsubscribe", "topic": ...}``
+    and get ``subscribed`` / ``unsubscribed`` / ``subscription_error`` back.
+    Students always receive events for their own tickets.
+
+    Every event carries ``seq``. A client reconnecting with ``?since=<seq>``
+    (or subscribing with ``"since"``) first gets the events it missed, then
+    ``replay_complete``; if the gap is too old it gets ``resync_required``
+    and should reload.
+
+    Offering the ``msgpack`` subprotocol switches both directions to binary
+    msgpack frames; JSON text is the default.
+
+    The server sends ``{"type": "ping"}`` every heartbeat interval and closes
+    sockets that send nothing (``{"action": "pong"}`` counts) for the idle
+    timeout. Outbound frames go through a bounded queue; when a slow reader
+    fills it the backlog is dropped and replaced by one ``resync_required``.
+    The channel layer sends ``resync_required`` too when it may have lost
+    events (see ``PostgresChannelLayer``).
+    """
+
+    codec = frames.JSON
+    user_id = None
+    send_queue = None
+    _tasks = ()
+    _replaying = False
+
     async def connect(self):
         user = self.scope.get("user")
         if not user or not user.is_authenticated:
@@ -12,32 +53,169 @@ class TicketNotificationConsumer(AsyncWebsocketConsumer):
             await self.close(code=1008)
             return
 
-        # Join the global ticket updates group
-        await self.channel_layer.group_add("ticket_updates", self.channel_name)
-        
-        # Join user-specific group for per-user notifications (e.g. status changes, comments)
-        self.user_group = f"user_{user.id}"
-        await self.channel_layer.group_add(self.user_group, self.channel_name)
+        if frames.MSGPACK in self.scope.get("subprotocols", ()):
+            self.codec = frames.MSGPACK
+        self.user_id = user.id
+        self.subscriptions = TopicSubscriptions(user.id, user.is_staff)
+        self.groups_joined = set()
+
+        await self._sync_groups()
+        await self.accept(subprotocol=frames.MSGPACK if self.codec == frames.MSGPACK else None)
+        metrics.incr("connections")
 
-        await self.accept()
+        loop = asyncio.get_running_loop()
+        self.last_seen = loop.time()
+        self.send_queue = asyncio.Queue(maxsize=settings.REALTIME_SEND_QUEUE_SIZE)
+        self._tasks = (
+            loop.create_task(self._write_frames()),
+            loop.create_task(self._heartbeat()),
+        )
+
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        since = parse_since(query.get("since", [None])[0])
+        if since is not None:
+            await self._replay(self.groups_joined, since)
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("ticket_updates", self.channel_name)
-        
-        if getattr(self, "user_group", None):
-            await self.channel_layer.group_discard(self.user_group, self.channel_name)
+        if self.send_queue is not None:
+            metrics.incr("connections", -1)
+            self.send_queue = None
+        for task in self._tasks:
+            task.cancel()
+        await self._leave_groups()
+
+    async def _leave_groups(self):
+        for group in getattr(self, "groups_joined", ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.groups_joined = set()
+
+    async def _write_frames(self):
+        queue = self.send_queue
+        while True:
+            frame = await queue.get()
+            if self.codec == frames.MSGPACK:
+                await self.send(bytes_data=frame)
+            else:
+                await self.send(text_data=frame)
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(settings.REALTIME_HEARTBEAT_INTERVAL)
+            if loop.time() - self.last_seen > settings.REALTIME_IDLE_TIMEOUT:
+                metrics.incr("evicted_idle")
+                # Leave the groups now; a dead peer may never complete the close.
+                await self._leave_groups()
+                await self.close(code=IDLE_CLOSE_CODE)
+                return
+            # Re-adding refreshes the memberships' expiry on the channel layer.
+            for group in self.groups_joined:
+                await self.channel_layer.group_add(group, self.channel_name)
+            await self._send_payload({"type": "ping"})
+
+    async def _sync_groups(self) -> set[str]:
+        """Join/leave groups to match the topics; returns the newly joined."""
+        wanted = self.subscriptions.groups()
+        added = wanted - self.groups_joined
+        for group in added:
+            await self.channel_layer.group_add(group, self.channel_name)
+        for group in self.groups_joined - wanted:
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.groups_joined = wanted
+        return added
+
+    async def _replay(self, groups, since: int):
+        events = await database_sync_to_async(replay_events)(sorted(groups), since)
+        if events is None:
+            await self._send_payload({"type": "resync_required", "since": since})
+            return
+        # Replay waits for queue space instead of overflowing it.
+        self._replaying = True
+        try:
+            for event in events:
+                # Same handlers as live delivery.
+                await self.dispatch(event)
+        finally:
+            self._replaying = False
+        await self._send_payload({"type": "replay_complete", "since": since, "count": len(events)})
+
+    async def receive(self, text_data=None, bytes_data=None):
+        self.last_seen = asyncio.get_running_loop().time()
+        try:
+            payload = frames.decode(bytes_data if self.codec == frames.MSGPACK else text_data, self.codec)
+            action = payload["action"]
+            topic = None if action == "pong" else str(payload["topic"])
+        except (ValueError, TypeError, KeyError):
+            await self._send_error(None, "Expected {\"action\": ..., \"topic\": ...}.")
+            return
+
+        if action == "pong":
+            return
+        if action == "subscribe":
+            error = await self.subscriptions.subscribe(topic)
+        elif action == "unsubscribe":
+            error = self.subscriptions.unsubscribe(topic)
+        else:
+            error = f"Unknown action {action!r}."
+
+        if error:
+            await self._send_error(topic, error)
+            return
+        added = await self._sync_groups()
+        await self._send_payload({"type": f"{action}d", "topic": topic})
+
+        since = parse_since(payload.get("since"))
+        if added and since is not None:
+            await self._replay(added, since)
+
+    async def _send_error(self, topic, detail: str):
+        await self._send_payload({"type": "subscription_error", "topic": topic, "detail": detail})
+
+    async def _send_frame(self, frame):
+        queue = self.send_queue
+        if queue is None:
+            return
+        if self._replaying:
+            await queue.put(frame)
+            return
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Slow reader: drop the backlog and have the client reload once.
+            dropped = 1
+            with contextlib.suppress(asyncio.QueueEmpty):
+                while True:
+                    queue.get_nowait()
+                    dropped += 1
+            metrics.incr("frames_dropped", dropped)
+            metrics.incr("overflow_resyncs")
+            queue.put_nowait(frames.encode({"type": "resync_required", "reason": "overflow"}, self.codec))
+
+    async def _send_payload(self, payload):
+        await self._send_frame(frames.encode(payload, self.codec))
+
+    async def _send_event(self, event):
+        frame = frames.client_frame(event, self.codec, self.user_id)
+        if frame is not None:
+            await self._send_frame(frame)
 
     async def send_ticket_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self._send_event(event)
 
     async def send_comment_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self._send_event(event)
 
     async def send_feedback_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self._send_event(event)
 
     async def send_notification(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self._send_event(event)
+
+    async def send_staff_notification(self, event):
+        await self._send_event(event)
 
     async def send_status_update(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+        await self._send_event(event)
+
+    async def send_resync(self, event):
+        await self._send_event(event)
@@ -0,0 +1,97 @@
+"""Server-Sent Events fallback for networks that break WebSockets.
+
+``GET /api/realtime/events?topics=staff,ticket:42`` streams the same events
+as ``TicketNotificationConsumer``, as ``text/event-stream``. Each event's
+``id`` is its ``seq``, so the browser's automatic ``Last-Event-ID`` on
+reconnect resumes from the outbox replay buffer. The stream is an async
+generator reading its own channel-layer channel, so an idle client holds no
+worker thread.
+"""
+import asyncio
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from ninja import Router
+from ninja.security import SessionAuth
+
+from apps.realtime import frames, metrics
+from apps.realtime.outbox import replay_events
+
+from .subscriptions import TopicSubscriptions, parse_since
+
+router = Router(auth=SessionAuth())
+
+# Browsers wait this long (ms) before reconnecting a dropped stream.
+SSE_RETRY_MS = 5000
+
+
+def format_sse(frame: str, seq: int | None = None) -> bytes:
+    # JSON frames are single-line, so one ``data:`` field is enough.
+    event_id = f"id: {seq}\n" if seq is not None else ""
+    return f"{event_id}data: {frame}\n\n".encode()
+
+
+async def event_stream(groups: set[str], *, user_id: int, since: int | None = None):
+    """Yield SSE chunks for ``groups`` until the client goes away."""
+    layer = get_channel_layer()
+    channel = await layer.new_channel("sse.")
+    for group in groups:
+        await layer.group_add(group, channel)
+    metrics.incr("sse_connections")
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+
+        if since is not None:
+            events = await database_sync_to_async(replay_events)(sorted(groups), since)
+            if events is None:
+                yield format_sse(frames.encode_json({"type": "resync_required", "since": since}))
+            else:
+                for event in events:
+                    frame = frames.client_frame(event, frames.JSON, user_id)
+                    if frame is not None:
+                        yield format_sse(frame, event.get("seq"))
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    layer.receive(channel), timeout=settings.REALTIME_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                # Refresh memberships and keep proxies from closing the stream.
+                for group in groups:
+                    await layer.group_add(group, channel)
+                yield b": ping\n\n"
+                continue
+            frame = frames.client_frame(event, frames.JSON, user_id)
+            if frame is not None:
+                yield format_sse(frame, event.get("seq"))
+    finally:
+        # Runs when the server cancels the response on client disconnect.
+        metrics.incr("sse_connections", -1)
+        for group in groups:
+            await layer.group_discard(group, channel)
+
+
+@router.get("/events", response={400: dict})
+async def ticket_event_stream(request, topics: str = "", since: int | None = None):
+    user = request.auth
+    subscriptions = TopicSubscriptions(user.id, user.is_staff)
+    for topic in filter(None, (t.strip() for t in topics.split(","))):
+        error = await subscriptions.subscribe(topic)
+        if error:
+            return 400, {"detail": error}
+
+    # EventSource sends Last-Event-ID itself when it reconnects.
+    resume_from = parse_since(request.headers.get("Last-Event-ID"))
+    if resume_from is None:
+        resume_from = since
+
+    response = StreamingHttpResponse(
+        event_stream(subscriptions.groups(), user_id=user.id, since=resume_from),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream.
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,95 @@
+from channels.db import database_sync_to_async
+
+from apps.notifications.utils import STAFF_GROUP
+from apps.realtime.groups import STAFF_TICKETS_GROUP, owner_group, ticket_group
+
+from ..models import Ticket
+
+
+# Topics a client can subscribe to: "staff" (every ticket event, staff only)
+# or "ticket:<id>" (one ticket the user may view).
+STAFF_TOPIC = "staff"
+TICKET_TOPIC_PREFIX = "ticket:"
+MAX_TICKET_TOPICS = 50
+
+
+def parse_since(value) -> int | None:
+    value = str(value) if value is not None else ""
+    return int(value) if value.isdigit() else None
+
+
+class TopicSubscriptions:
+    """The channel groups one realtime connection (WebSocket or SSE) is in.
+
+    Everyone gets their own notifications and ticket events; staff also get
+    staff-wide notifications. Topics add the staff firehose or single
+    tickets, skipping groups another membership already covers so each event
+    arrives once.
+    """
+
+    def __init__(self, user_id: int, is_staff: bool):
+        self.user_id = user_id
+        self.is_staff = is_staff
+        self.staff_topic = False
+        # Subscribed ticket id -> owner id.
+        self.ticket_topics = {}
+
+    def groups(self) -> set[str]:
+        groups = {f"user_{self.user_id}"}
+        if self.is_staff:
+            groups.add(STAFF_GROUP)
+        if self.staff_topic:
+            # The firehose already carries events on the user's own tickets.
+            groups.add(STAFF_TICKETS_GROUP)
+        else:
+            groups.add(owner_group(self.user_id))
+            groups.update(
+                ticket_group(ticket_id)
+                for ticket_id, owner_id in self.ticket_topics.items()
+                if owner_id != self.user_id
+            )
+        return groups
+
+    async def subscribe(self, topic: str) -> str | None:
+        """Add ``topic``; returns an error message if it is not allowed."""
+        if topic == STAFF_TOPIC:
+            if not self.is_staff:
+                return "Only staff can subscribe to all tickets."
+            self.staff_topic = True
+            return None
+
+        ticket_id = self._parse_ticket_topic(topic)
+        if ticket_id is None:
+            return f"Unknown topic {topic!r}."
+        if ticket_id not in self.ticket_topics and len(self.ticket_topics) >= MAX_TICKET_TOPICS:
+            return f"At most {MAX_TICKET_TOPICS} ticket subscriptions per connection."
+        owner_id = await self._ticket_owner(ticket_id)
+        if owner_id is None:
+            return "Ticket not found."
+        self.ticket_topics[ticket_id] = owner_id
+        return None
+
+    def unsubscribe(self, topic: str) -> str | None:
+        if topic == STAFF_TOPIC:
+            self.staff_topic = False
+            return None
+        ticket_id = self._parse_ticket_topic(topic)
+        if ticket_id is None:
+            return f"Unknown topic {topic!r}."
+        self.ticket_topics.pop(ticket_id, None)
+        return None
+
+    @staticmethod
+    def _parse_ticket_topic(topic: str) -> int | None:
+        if not topic.startswith(TICKET_TOPIC_PREFIX):
+            return None
+        ticket_id = topic[len(TICKET_TOPIC_PREFIX):]
+        return int(ticket_id) if ticket_id.isdigit() else None
+
+    @database_sync_to_async
+    def _ticket_owner(self, ticket_id: int):
+        # Same visibility rule as the REST views.
+        tickets = Ticket.objects.filter(pk=ticket_id, archived_at__isnull=True)
+        if not self.is_staff:
+            tickets = tickets.filter(student_id=self.user_id)
+        return tickets.values_list("student_id", flat=True).first()
@@ -20,5 +20,21 @@ app.conf.beat_schedule = {
     "weekly-performance-review": {
         "task": "apps.tickets.tasks.send_weekly_report",
         "schedule": crontab(hour=9, minute=0, day_of_week=1)
+    },
+    "relay-outbox": {
+        "task": "apps.realtime.tasks.relay_outbox",
+        "schedule": 15.0 # Safety net for missed commit-time kicks
+    },
+    "purge-outbox": {
+        "task": "apps.realtime.tasks.purge_outbox",
+        "schedule": crontab(minute="*/10")
+    },
+    "purge-notifications": {
+        "task": "apps.notifications.tasks.purge_notifications",
+        "schedule": crontab(hour=3, minute=30) # Nightly, off-peak
+    },
+    "ensure-ticket-number-sequences": {
+        "task": "apps.tickets.tasks.ensure_ticket_number_sequences",
+        "schedule": crontab(hour=0, minute=5)
     }
 }
\ No newline at end of file
@@ -0,0 +1,22 @@
+import ujson
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+
+class UJSONRenderer(BaseRenderer):
+    """JSON renderer backed by ujson.
+
+    Output matches ninja's default ``JSONRenderer``: anything ujson cannot
+    encode natively (datetimes, UUIDs, pydantic models, ...) goes through
+    ``NinjaJSONEncoder.default`` so timestamps keep the same format.
+    """
+
+    media_type = "application/json"
+    encoder = NinjaJSONEncoder()
+
+    def render(self, request, data, *, response_status):
+        return ujson.dumps(
+            data,
+            default=self.encoder.default,
+            escape_forward_slashes=False,
+        )
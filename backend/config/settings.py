@@ -114,6 +114,7 @@ INSTALLED_APPS = [
     'apps.users',
     'apps.tickets',
     'apps.notifications',
+    'apps.realtime',
 ]
 
 MIDDLEWARE = [
@@ -151,6 +152,8 @@ CORS_ALLOW_HEADERS = [
     "origin",
     "x-csrftoken",
 ]
+# Cursor for the next page of endpoints that keep a plain-list body.
+CORS_EXPOSE_HEADERS = ["X-Next-Cursor"]
 
 CORS_ALLOW_METHODS = (
     "DELETE",
@@ -201,23 +204,35 @@ _redis_url = os.getenv("REDIS_URL", "").strip()
 _use_redis_channels = bool(_redis_url) and _redis_url.startswith(
     ("redis://", "rediss://", "unix://"))
 
-if DEBUG or not _use_redis_channels:
-    if not DEBUG and not _use_redis_channels:
-        _logger.warning(
-            "REDIS_URL is missing or invalid for Channels; falling back to InMemoryChannelLayer. "
-            "Realtime events will only work reliably within a single process."
-        )
+if DEBUG:
     CHANNEL_LAYERS = {
         "default": {
             "BACKEND": "channels.layers.InMemoryChannelLayer"
         }
     }
+elif not _use_redis_channels:
+    _logger.warning(
+        "REDIS_URL is missing or invalid for Channels; using the Postgres LISTEN/NOTIFY "
+        "channel layer."
+    )
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "apps.realtime.pg_layer.PostgresChannelLayer",
+            "CONFIG": {
+                "capacity": 200,
+            },
+        }
+    }
 else:
     CHANNEL_LAYERS = {
         "default": {
             "BACKEND": "channels_redis.core.RedisChannelLayer",
             "CONFIG": {
                 "hosts": [_redis_url],
+                # Consumers re-add their groups on every heartbeat, so a
+                # membership left by a crashed process expires in minutes.
+                "group_expiry": 300,
+                "capacity": 200,
             },
         }
     }
@@ -347,6 +362,37 @@ CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# Without a broker, export jobs run on a background thread in the web process.
+EXPORT_JOBS_IN_PROCESS = not _redis_url
+
+# Who relays committed realtime outbox events to the channel layer:
+# "thread" (a background thread in the web process), "celery" (kick the relay
+# task) or "worker" (`manage.py relay_outbox` polls). "inline" relays on the
+# request path and is for tests only. See apps/realtime/outbox.py.
+REALTIME_RELAY_MODE = os.getenv("REALTIME_RELAY_MODE", "celery" if _redis_url else "thread")
+
+# WebSocket liveness and backpressure (seconds / frames). Sockets are pinged
+# every interval and closed after the idle timeout without any client frame;
+# each socket buffers at most REALTIME_SEND_QUEUE_SIZE outbound frames.
+REALTIME_HEARTBEAT_INTERVAL = float(os.getenv("REALTIME_HEARTBEAT_INTERVAL", 25))
+REALTIME_IDLE_TIMEOUT = float(os.getenv("REALTIME_IDLE_TIMEOUT", 75))
+REALTIME_SEND_QUEUE_SIZE = int(os.getenv("REALTIME_SEND_QUEUE_SIZE", 100))
+
+# Channel-layer publishing: each send is cut off after the timeout (seconds);
+# after THRESHOLD failures in a row sends fail fast and are retried RESET
+# seconds later.
+REALTIME_PUBLISH_TIMEOUT = float(os.getenv("REALTIME_PUBLISH_TIMEOUT", 0.5))
+REALTIME_BREAKER_THRESHOLD = int(os.getenv("REALTIME_BREAKER_THRESHOLD", 3))
+REALTIME_BREAKER_RESET = float(os.getenv("REALTIME_BREAKER_RESET", 10))
+
+# Notification retention (days / rows per user; 0 disables a policy), applied
+# nightly by apps.notifications.tasks.purge_notifications in batches.
+NOTIFICATION_READ_RETENTION_DAYS = int(os.getenv("NOTIFICATION_READ_RETENTION_DAYS", 30))
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(os.getenv("NOTIFICATION_UNREAD_RETENTION_DAYS", 180))
+NOTIFICATION_MAX_PER_USER = int(os.getenv("NOTIFICATION_MAX_PER_USER", 500))
+EMAIL_NOTIFICATION_RETENTION_DAYS = int(os.getenv("EMAIL_NOTIFICATION_RETENTION_DAYS", 90))
+NOTIFICATION_PURGE_BATCH_SIZE = int(os.getenv("NOTIFICATION_PURGE_BATCH_SIZE", 1000))
+
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
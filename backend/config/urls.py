@@ -7,16 +7,22 @@ from django.conf.urls.static import static
 from ninja import NinjaAPI
 from channels.layers import get_channel_layer
 from config import settings
+from config.renderers import UJSONRenderer
 
 from apps.tickets.views import router as tickets_router
 from apps.notifications.views import router as notifications_router
 from apps.users.views import router as user_router
+from apps.tickets.ws.sse import router as realtime_router
+from apps.realtime import metrics as realtime_metrics
+from apps.realtime import publisher as realtime_publisher
+from apps.realtime.outbox import outbox_lag
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=UJSONRenderer())
 
 api.add_router("tickets/", tickets_router)
 api.add_router("notifications/", notifications_router)
 api.add_router("/user/", user_router)
+api.add_router("realtime/", realtime_router)
 
 
 def healthcheck(_request):
@@ -46,8 +52,22 @@ def readiness_check(_request):
         checks["channels"] = False
 
     all_ok = all(checks.values())
+
+    # Reported for monitoring only; a lagging relay or an open publisher
+    # circuit degrades realtime delivery but the API itself still serves.
+    try:
+        outbox = outbox_lag()
+    except Exception:
+        outbox = None
+
     return JsonResponse(
-        {"status": "ready" if all_ok else "degraded", "checks": checks},
+        {
+            "status": "ready" if all_ok else "degraded",
+            "checks": checks,
+            "outbox": outbox,
+            "websocket": realtime_metrics.snapshot(),
+            "publisher": realtime_publisher.breaker.snapshot(),
+        },
         status=200 if all_ok else 503,
     )
 
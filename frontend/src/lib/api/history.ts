@@ -2,9 +2,23 @@ import { apiFetch } from "../../utils/api.ts";
 import type { HistoryItem } from "../../types/history.ts";
 
 const BASE = "/tickets";
+// The server's default page size; older pages load on demand.
+const PAGE_SIZE = 100;
 
-export async function fetchTicketHistory(): Promise<HistoryItem[]> {
-    const res = await apiFetch(`${BASE}/history`, {
+export type HistoryPage = {
+    items: HistoryItem[];
+    nextCursor: string | null;
+};
+
+// One page of the timeline, newest first. Pass the previous page's
+// `nextCursor` to continue; `null` means there is nothing older.
+export async function fetchTicketHistory(
+    cursor: string | null = null,
+    limit: number = PAGE_SIZE,
+): Promise<HistoryPage> {
+    const query = new URLSearchParams({ limit: String(limit) });
+    if (cursor) query.set("cursor", cursor);
+    const res = await apiFetch(`${BASE}/history?${query}`, {
         method: "GET",
         headers: { Accept: "application/json" },
     });
@@ -14,5 +28,8 @@ export async function fetchTicketHistory(): Promise<HistoryItem[]> {
         );
     }
     const data = await res.json();
-    return (data ?? []) as HistoryItem[];
+    return {
+        items: (data ?? []) as HistoryItem[],
+        nextCursor: res.headers.get("X-Next-Cursor"),
+    };
 }
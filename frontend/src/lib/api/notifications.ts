@@ -5,15 +5,50 @@ import { parseApiResponse } from "./core.ts";
 const BASE = "/notifications";
 const INAPP = `${BASE}/inapp`;
 
+export type NotificationPageParams = {
+	limit?: number;
+	cursor?: string | null;
+	since?: string | null;
+	unreadOnly?: boolean;
+};
+
+export type NotificationPage = {
+	items: Notification[];
+	// Older page; in `since` mode its presence means more than `limit` are new.
+	nextCursor: string | null;
+};
+
+export async function fetchNotificationsPage(
+	params: NotificationPageParams = {},
+): Promise<NotificationPage> {
+	const query = new URLSearchParams({ limit: String(params.limit ?? 50) });
+	if (params.cursor) query.set("cursor", params.cursor);
+	if (params.since) query.set("since", params.since);
+	if (params.unreadOnly) query.set("unread_only", "true");
+	const res = await apiFetch(`${INAPP}/?${query}`, {
+		method: "GET",
+		headers: { Accept: "application/json" },
+	});
+	const data = await parseApiResponse<Notification[]>(res);
+	return {
+		items: (data ?? []) as Notification[],
+		nextCursor: res.headers.get("X-Next-Cursor"),
+	};
+}
+
 export async function fetchNotifications(
 	limit: number = 50,
 ): Promise<Notification[]> {
-	const res = await apiFetch(`${INAPP}/?limit=${limit}`, {
+	return (await fetchNotificationsPage({ limit })).items;
+}
+
+export async function fetchUnreadCount(): Promise<number> {
+	const res = await apiFetch(`${INAPP}/unread-count`, {
 		method: "GET",
 		headers: { Accept: "application/json" },
 	});
-	const data = await parseApiResponse<Notification[]>(res);
-	return (data ?? []) as Notification[];
+	const data = await parseApiResponse<{ unread_count: number }>(res);
+	return data?.unread_count ?? 0;
 }
 
 export async function markAsRead(id: string): Promise<Notification> {
@@ -1,16 +1,24 @@
 import { get } from "svelte/store";
 import { beforeEach, describe, expect, it, vi } from "vitest";
 
-const { fetchNotificationsMock, markAsReadMock, markAllAsReadMock } = vi.hoisted(
-	() => ({
-		fetchNotificationsMock: vi.fn(),
-		markAsReadMock: vi.fn(),
-		markAllAsReadMock: vi.fn(),
-	}),
-);
+const {
+	fetchNotificationsMock,
+	fetchUnreadCountMock,
+	markAsReadMock,
+	markAllAsReadMock,
+} = vi.hoisted(() => ({
+	fetchNotificationsMock: vi.fn(),
+	fetchUnreadCountMock: vi.fn(),
+	markAsReadMock: vi.fn(),
+	markAllAsReadMock: vi.fn(),
+}));
 
 vi.mock("../lib/api/notifications.ts", () => ({
-	fetchNotifications: fetchNotificationsMock,
+	fetchNotificationsPage: async (...args: unknown[]) => ({
+		items: await fetchNotificationsMock(...args),
+		nextCursor: null,
+	}),
+	fetchUnreadCount: fetchUnreadCountMock,
 	markAsRead: markAsReadMock,
 	markAllAsRead: markAllAsReadMock,
 }));
@@ -38,6 +46,7 @@ const n2 = {
 describe("notificationStore", () => {
 	beforeEach(() => {
 		fetchNotificationsMock.mockReset();
+		fetchUnreadCountMock.mockReset();
 		markAsReadMock.mockReset();
 		markAllAsReadMock.mockReset();
 		notificationStore.clear();
@@ -45,6 +54,7 @@ describe("notificationStore", () => {
 
 	it("loadNotifications sets notifications and unread count", async () => {
 		fetchNotificationsMock.mockResolvedValue([n1, n2]);
+		fetchUnreadCountMock.mockResolvedValue(1);
 
 		await notificationStore.loadNotifications();
 		const state = get(notificationStore);
@@ -55,6 +65,7 @@ describe("notificationStore", () => {
 
 	it("markAsRead updates unread count", async () => {
 		fetchNotificationsMock.mockResolvedValue([n1]);
+		fetchUnreadCountMock.mockResolvedValue(1);
 		markAsReadMock.mockResolvedValue({ ...n1, read: true });
 		await notificationStore.loadNotifications();
 
@@ -67,6 +78,7 @@ describe("notificationStore", () => {
 
 	it("markAllAsRead marks all local notifications as read", async () => {
 		fetchNotificationsMock.mockResolvedValue([n1, { ...n1, id: "3", read: false }]);
+		fetchUnreadCountMock.mockResolvedValue(2);
 		markAllAsReadMock.mockResolvedValue({ marked: 2 });
 		await notificationStore.loadNotifications();
 
@@ -76,4 +88,32 @@ describe("notificationStore", () => {
 		expect(state.unreadCount).toBe(0);
 		expect(state.notifications.every((n) => n.read)).toBe(true);
 	});
+
+	it("uses the server's unread count, which covers notifications past the list limit", async () => {
+		fetchNotificationsMock.mockResolvedValue([n1]);
+		fetchUnreadCountMock.mockResolvedValue(120);
+		await notificationStore.loadNotifications(1);
+		expect(get(notificationStore).unreadCount).toBe(120);
+
+		notificationStore.addNotification({ ...n1, id: "4" }, 121);
+		expect(get(notificationStore).unreadCount).toBe(121);
+
+		notificationStore.setUnreadCount(0);
+		expect(get(notificationStore).unreadCount).toBe(0);
+	});
+
+	it("refresh prepends only notifications newer than the loaded ones", async () => {
+		fetchNotificationsMock.mockResolvedValueOnce([n1]);
+		fetchUnreadCountMock.mockResolvedValue(1);
+		await notificationStore.loadNotifications();
+
+		fetchNotificationsMock.mockResolvedValueOnce([{ ...n1, id: "5" }, n1]);
+		fetchUnreadCountMock.mockResolvedValue(2);
+		await notificationStore.refresh();
+
+		expect(fetchNotificationsMock).toHaveBeenLastCalledWith({ limit: 50, since: "1" });
+		const state = get(notificationStore);
+		expect(state.notifications.map((n) => n.id)).toEqual(["5", "1"]);
+		expect(state.unreadCount).toBe(2);
+	});
 });
@@ -4,14 +4,19 @@ import type {
 	NotificationState,
 } from "../types/notifications.ts";
 import {
-	fetchNotifications,
+	fetchNotificationsPage,
+	fetchUnreadCount,
 	markAsRead as apiMarkAsRead,
 	markAllAsRead as apiMarkAllAsRead,
 } from "../lib/api/notifications.ts";
 
 interface NotificationStore extends Readable<NotificationState> {
 	loadNotifications: (limit?: number) => Promise<void>;
-	addNotification: (notification: Notification) => void;
+	loadUnreadCount: () => Promise<void>;
+	loadOlder: (limit?: number) => Promise<void>;
+	refresh: (limit?: number) => Promise<void>;
+	addNotification: (notification: Notification, unreadCount?: number) => void;
+	setUnreadCount: (unreadCount: number) => void;
 	markAsRead: (id: string) => Promise<void>;
 	markAllAsRead: () => Promise<void>;
 	clear: () => void;
@@ -30,34 +35,95 @@ function createNotificationStore(): NotificationStore {
 		async loadNotifications(limit: number = 50) {
 			update((s) => ({ ...s, isLoading: true }));
 			try {
-				const list = await fetchNotifications(limit);
-				const unreadCount = list.filter((n) => !n.read).length;
-				update(() => ({ notifications: list, unreadCount, isLoading: false }));
+				// The list is capped at `limit`; the server keeps the real count.
+				const [page, unreadCount] = await Promise.all([
+					fetchNotificationsPage({ limit }),
+					fetchUnreadCount(),
+				]);
+				update(() => ({
+					notifications: page.items,
+					unreadCount,
+					isLoading: false,
+					nextCursor: page.nextCursor,
+				}));
 			} catch (e) {
 				console.error("Failed to load notifications:", e);
 				update((s) => ({ ...s, isLoading: false }));
 			}
 		},
 
-		addNotification(notification: Notification) {
+		async loadOlder(limit: number = 50) {
+			const cursor = get({ subscribe }).nextCursor;
+			if (!cursor) return;
+			try {
+				const page = await fetchNotificationsPage({ limit, cursor });
+				update((s) => ({
+					...s,
+					notifications: [...s.notifications, ...page.items],
+					nextCursor: page.nextCursor,
+				}));
+			} catch (e) {
+				console.error("Failed to load older notifications:", e);
+			}
+		},
+
+		// Fetch only what is newer than the newest loaded notification.
+		async refresh(limit: number = 50) {
+			const state = get({ subscribe });
+			const newest = state.notifications[0];
+			if (!newest) return this.loadNotifications(limit);
+			try {
+				const [page, unreadCount] = await Promise.all([
+					fetchNotificationsPage({ limit, since: newest.id }),
+					fetchUnreadCount(),
+				]);
+				if (page.nextCursor) {
+					// More arrived than one page holds; start over.
+					return this.loadNotifications(limit);
+				}
+				update((s) => {
+					const known = new Set(s.notifications.map((n) => n.id));
+					const fresh = page.items.filter((n) => !known.has(n.id));
+					return { ...s, notifications: [...fresh, ...s.notifications], unreadCount };
+				});
+			} catch (e) {
+				console.error("Failed to refresh notifications:", e);
+			}
+		},
+
+		async loadUnreadCount() {
+			try {
+				const unreadCount = await fetchUnreadCount();
+				update((s) => ({ ...s, unreadCount }));
+			} catch (e) {
+				console.error("Failed to load unread count:", e);
+			}
+		},
+
+		addNotification(notification: Notification, unreadCount?: number) {
 			update((s) => ({
 				notifications: [notification, ...s.notifications],
-				unreadCount: s.unreadCount + (notification.read ? 0 : 1),
+				unreadCount: unreadCount ?? s.unreadCount + (notification.read ? 0 : 1),
 				isLoading: false,
 			}));
 		},
 
+		setUnreadCount(unreadCount: number) {
+			update((s) => ({ ...s, unreadCount }));
+		},
+
 		async markAsRead(id: string) {
 			try {
 				await apiMarkAsRead(id);
 				update((s) => {
+					const wasUnread = s.notifications.some((n) => n.id === id && !n.read);
 					const notifications = s.notifications.map((n) =>
 						n.id === id ? { ...n, read: true } : n,
 					);
 					return {
 						...s,
 						notifications,
-						unreadCount: notifications.filter((n) => !n.read).length,
+						unreadCount: Math.max(0, s.unreadCount - (wasUnread ? 1 : 0)),
 					};
 				});
 			} catch (e) {
@@ -79,7 +145,7 @@ function createNotificationStore(): NotificationStore {
 		},
 
 		clear() {
-			set({ notifications: [], unreadCount: 0, isLoading: false });
+			set({ notifications: [], unreadCount: 0, isLoading: false, nextCursor: null });
 		},
 	};
 }
@@ -34,6 +34,7 @@ interface TicketsStore extends Readable<TicketsState> {
     addTicketToStore: (ticket: Ticket) => void;
     updateTicketInStore: (id: number, updates: Partial<Ticket>) => void;
     removeTicketFromStore: (id: number) => void;
+    applyTicketEvent: (ticket: Partial<Ticket> & { id: number; updated_at: string }, isNew: boolean) => void;
     adjustCommentCount: (ticketId: number, delta: number) => void;
 }
 
@@ -274,6 +275,23 @@ function createTicketsStore(): TicketsStore {
             update(s => ({ ...s, tickets: s.tickets.filter(t => t.id !== id) }));
         },
 
+        // Realtime ticket payloads are applied only if newer than what we hold,
+        // so replayed or duplicated events are harmless.
+        applyTicketEvent(ticket, isNew) {
+            update(s => {
+                const existing = s.tickets.find(t => t.id === ticket.id);
+                if (!existing) {
+                    if (!isNew || s.currentView === "community") return s;
+                    return { ...s, tickets: [ticket as Ticket, ...s.tickets], total: s.total + 1 };
+                }
+                if (Date.parse(ticket.updated_at) < Date.parse(existing.updated_at)) return s;
+                return {
+                    ...s,
+                    tickets: s.tickets.map(t => t.id === ticket.id ? { ...t, ...ticket } : t),
+                };
+            });
+        },
+
         adjustCommentCount(ticketId: number, delta: number) {
             update(s => ({
                 ...s,
@@ -12,6 +12,18 @@ function createWebSocketStore() {
 	let reconnectAttempts = 0;
 	const MAX_RECONNECT_ATTEMPTS = 10;
 	const BASE_DELAY = 1000;
+	// Topics ("staff", "ticket:<id>") are re-sent after every reconnect.
+	const topics = new Set<string>();
+	// Highest event seq seen; reconnects resume from it instead of reloading.
+	let lastSeq: number | null = null;
+	// Replay and live delivery can overlap, so remember recent seqs.
+	const recentSeqs = new Set<number>();
+	const MAX_RECENT_SEQS = 500;
+	// Some networks break WebSockets; after this many failed handshakes in a
+	// row switch to the Server-Sent Events stream for the session.
+	const SSE_FALLBACK_AFTER = 3;
+	let failedHandshakes = 0;
+	let eventSource: EventSource | null = null;
 
 	function getWsUrl(): string {
 		const apiOrigin = getApiOrigin();
@@ -20,7 +32,33 @@ function createWebSocketStore() {
 		}
 		const url = new URL(apiOrigin);
 		const protocol = url.protocol === "https:" ? "wss:" : "ws:";
-		return `${protocol}//${url.host}/ws/tickets/`;
+		const since = lastSeq !== null ? `?since=${lastSeq}` : "";
+		return `${protocol}//${url.host}/ws/tickets/${since}`;
+	}
+
+	function getSseUrl(): string {
+		const apiOrigin = getApiOrigin();
+		if (!apiOrigin) {
+			throw new Error("API origin is not configured.");
+		}
+		const params = new URLSearchParams();
+		if (topics.size) params.set("topics", [...topics].join(","));
+		if (lastSeq !== null) params.set("since", String(lastSeq));
+		const query = params.toString();
+		return `${apiOrigin}/api/realtime/events${query ? `?${query}` : ""}`;
+	}
+
+	function connectSse() {
+		eventSource?.close();
+		set("connecting");
+		const sseUrl = getSseUrl();
+		console.log(`Connecting to event stream at ${sseUrl}`);
+
+		// The browser reconnects by itself, sending Last-Event-ID.
+		eventSource = new EventSource(sseUrl, { withCredentials: true });
+		eventSource.onopen = () => set("connected");
+		eventSource.onmessage = (event) => handleMessage(event);
+		eventSource.onerror = () => set("connecting");
 	}
 
 	function connect(delayMs = 0) {
@@ -29,6 +67,10 @@ function createWebSocketStore() {
 			return;
 		}
 
+		if (eventSource) {
+			return;
+		}
+
 		if (
 			socket?.readyState === WebSocket.OPEN ||
 			socket?.readyState === WebSocket.CONNECTING
@@ -43,15 +85,21 @@ function createWebSocketStore() {
 
 		try {
 			socket = new WebSocket(wsUrl);
+			let opened = false;
 
 			socket.onopen = () => {
+				opened = true;
 				console.log("WebSocket connected");
 				set("connected");
 				reconnectAttempts = 0;
+				failedHandshakes = 0;
 				if (reconnectTimer) {
 					clearTimeout(reconnectTimer);
 					reconnectTimer = null;
 				}
+				for (const topic of topics) {
+					sendAction("subscribe", topic, lastSeq);
+				}
 			};
 
 			socket.onmessage = (event) => {
@@ -66,6 +114,14 @@ function createWebSocketStore() {
 				set("disconnected");
 				socket = null;
 
+				if (!opened) {
+					failedHandshakes++;
+				}
+				if (failedHandshakes >= SSE_FALLBACK_AFTER) {
+					console.log("WebSocket keeps failing; falling back to Server-Sent Events.");
+					connectSse();
+					return;
+				}
 				if (event.code !== 1000) {
 					scheduleReconnect();
 				}
@@ -77,16 +133,82 @@ function createWebSocketStore() {
 		}
 	}
 
+	function sendAction(
+		action: "subscribe" | "unsubscribe",
+		topic: string,
+		since: number | null = null,
+	) {
+		if (socket?.readyState === WebSocket.OPEN) {
+			socket.send(
+				JSON.stringify(since !== null ? { action, topic, since } : { action, topic }),
+			);
+		}
+	}
+
+	/** Returns false for an event already handled (replay overlapping live). */
+	function trackSeq(seq: number): boolean {
+		if (recentSeqs.has(seq)) return false;
+		recentSeqs.add(seq);
+		if (recentSeqs.size > MAX_RECENT_SEQS) {
+			recentSeqs.delete(recentSeqs.values().next().value as number);
+		}
+		lastSeq = lastSeq === null ? seq : Math.max(lastSeq, seq);
+		return true;
+	}
+
+	function subscribeTopic(topic: string) {
+		if (topics.has(topic)) return;
+		topics.add(topic);
+		if (eventSource) {
+			// Topics are fixed per stream; reopen it, resuming from lastSeq.
+			connectSse();
+			return;
+		}
+		sendAction("subscribe", topic);
+	}
+
+	function unsubscribeTopic(topic: string) {
+		if (!topics.delete(topic)) return;
+		if (eventSource) {
+			connectSse();
+			return;
+		}
+		sendAction("unsubscribe", topic);
+	}
+
 	function handleMessage(event: MessageEvent) {
 		try {
 			const data: WSMessage = JSON.parse(event.data);
 			console.log("Websocket message received:", data);
 
-			// Handle ticket updates
-			if (data.action === "created") {
-				ticketsStore.reloadTickets();
-			} else if (data.action === "updated") {
+			// Server heartbeat; silent sockets are closed after a timeout.
+			if (data.type === "ping") {
+				socket?.send(JSON.stringify({ action: "pong" }));
+				return;
+			}
+
+			if (data.type === "subscription_error") {
+				console.warn(`WebSocket subscription to ${data.topic} failed:`, data.detail);
+				return;
+			}
+
+			// Missed too much while disconnected: reload once, then go live.
+			if (data.type === "resync_required") {
 				ticketsStore.reloadTickets();
+				notificationStore.refresh();
+				return;
+			}
+
+			if (data.seq !== undefined && !trackSeq(data.seq)) {
+				return;
+			}
+
+			// Handle ticket updates: events carry the ticket itself, so apply it
+			// locally instead of refetching the list.
+			if (data.action === "created" || data.action === "updated") {
+				if (data.ticket) {
+					ticketsStore.applyTicketEvent(data.ticket, data.action === "created");
+				}
 			} else if (data.action === "deleted") {
 				if (data.ticket_id) {
 					ticketsStore.removeTicketFromStore(data.ticket_id);
@@ -120,7 +242,9 @@ function createWebSocketStore() {
 
 			// Handle real-time notifications (per-user, pushed via WebSocket)
 			if (data.type === "new_notification" && data.notification) {
-				notificationStore.addNotification(data.notification);
+				notificationStore.addNotification(data.notification, data.unread_count);
+			} else if (data.type === "unread_count") {
+				notificationStore.setUnreadCount(data.unread_count);
 			}
 		} catch (error) {
 			console.error("Failed to parse WebSocket message:", error);
@@ -159,11 +283,20 @@ function createWebSocketStore() {
 			socket = null;
 		}
 
+		if (eventSource) {
+			eventSource.close();
+			eventSource = null;
+		}
+		failedHandshakes = 0;
+
 		set("disconnected");
 		reconnectAttempts = 0;
+		topics.clear();
+		lastSeq = null;
+		recentSeqs.clear();
 	}
 
-	return { subscribe, connect, disconnect };
+	return { subscribe, connect, disconnect, subscribeTopic, unsubscribeTopic };
 }
 
 export const wsStore = createWebSocketStore();
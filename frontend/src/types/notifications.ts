@@ -13,6 +13,8 @@ export type NotificationState = {
 	notifications: Notification[];
 	unreadCount: number;
 	isLoading: boolean;
+	// Cursor for the next older page, null when everything is loaded.
+	nextCursor?: string | null;
 };
 
 export type NotificationFilter = "all" | "unread" | "read";
@@ -1,3 +1,5 @@
+import type { Ticket } from "./tickets.ts";
+
 export type WSStatus = "connected" | "disconnected" | "connecting";
 
 export type WSMessage = {
@@ -7,4 +9,12 @@ export type WSMessage = {
 	comment?: any;
 	message?: string;
 	notification?: any;
+	topic?: string;
+	detail?: string;
+	seq?: number;
+	// Ticket events: the serialized ticket (without comments_count on
+	// updates), the changed field names and its version.
+	ticket?: Partial<Ticket> & { id: number; updated_at: string };
+	changed?: string[];
+	updated_at?: string;
 };